@@ -0,0 +1,6 @@
+"""
+Extraction benchmarks: a synthetic workbook generator and a timing/memory runner.
+
+    python -m benchmarks.generate_workbooks --rows 10000
+    python -m benchmarks.run_extraction --check
+"""
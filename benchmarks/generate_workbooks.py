@@ -0,0 +1,224 @@
+"""
+Synthetic "Summary KWxx" workbooks for extraction benchmarks.
+
+The generated sheet follows the layout of the planning export: Excel row 1 holds the
+day headers ("Monday CW-16", merged over the early/late pair), row 2 the task column
+headers and the shift of each quantity column, rows 3-9 summary rows, and task rows
+start at row 10. Informational columns pad the sheet to the requested width and are
+sparsely filled, as in the real export. A previous-week sheet is added so the
+workbook has more than one summary sheet.
+
+Files are written as .xlsx straight into the zip container (inline strings, rows
+streamed), so large sheets need neither openpyxl's write mode nor much memory. No
+.xlsb writer is available for Python; the runner uses the .xlsb files in test_data/
+for that format.
+"""
+import argparse
+import os
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+TASK_HEADERS = [
+    "Scheduler Group /  Task", "Planning notes", "Lines", "Mitarbeiter pro Aufgabe",
+    "Planned Worktime in Min", "Prio", "PM & Rep", "Ticket oder MO ID"
+]
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+SHIFTS = ("early", "late")
+FIRST_TASK_ROW = 10  # Excel row number
+DEFAULT_WEEK = 16
+DEFAULT_COLUMNS = 200
+DEFAULT_SEED = 7
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '{sheets}</Types>'
+)
+_SHEET_CONTENT_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{n}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>{sheets}</sheets></workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{rels}'
+    '<Relationship Id="rIdStyles" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf/></cellStyleXfs><cellXfs count="1"><xf/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+def column_letter(index):
+    """Excel column letters of a 0-based column index."""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _cell_xml(ref, value):
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{escape(value)}</t></is></c>'
+
+
+def _row_xml(row_number, cells):
+    """``cells`` maps 0-based column index to a value; empty cells are omitted."""
+    body = ''.join(_cell_xml(f"{column_letter(col)}{row_number}", cells[col]) for col in sorted(cells))
+    return f'<row r="{row_number}">{body}</row>'
+
+
+class SheetLayout:
+    """Column positions of one synthetic summary sheet."""
+
+    def __init__(self, week, columns):
+        self.week = week
+        self.info_columns = max(0, columns - len(TASK_HEADERS) - len(DAYS) * len(SHIFTS))
+        first_quantity = len(TASK_HEADERS) + self.info_columns
+        self.quantity_columns = {
+            (day, shift): first_quantity + 2 * d + s
+            for d, day in enumerate(DAYS) for s, shift in enumerate(SHIFTS)
+        }
+        self.width = first_quantity + len(self.quantity_columns)
+
+    def header_rows(self):
+        day_row, shift_row = {}, {}
+        for col, header in enumerate(TASK_HEADERS):
+            shift_row[col] = header
+        for i in range(self.info_columns):
+            shift_row[len(TASK_HEADERS) + i] = f"Info {i + 1}"
+        for (day, shift), col in self.quantity_columns.items():
+            if shift == SHIFTS[0]:
+                # Merged over the early/late pair: only the first cell holds the value
+                day_row[col] = f"{day} CW-{self.week}"
+            shift_row[col] = shift
+        return day_row, shift_row
+
+    def merged_ranges(self):
+        return [
+            f"{column_letter(col)}1:{column_letter(col + 1)}1"
+            for (day, shift), col in self.quantity_columns.items() if shift == SHIFTS[0]
+        ]
+
+
+def _task_row(rng, layout, i):
+    pm = rng.random() < 0.7
+    cells = {
+        0: f"PM_Sch_Group_{i}" if pm else f"Task_{i}",
+        2: f"Line_{rng.randint(1, 40)}" if rng.random() < 0.6 else "",
+        3: rng.choice([1, 1, 2, 2, 2, 3]),
+        4: rng.choice([10, 15, 20, 30, 45, 60, 90, 120, 150, 180, 240]),
+        5: rng.choice("AABBBC"),
+        6: rng.choice(["PM", "PM Inspection", "PM Lubrication"]) if pm else rng.choice(["Rep", "Rep Fix", "REP"]),
+    }
+    if rng.random() < 0.3:
+        cells[1] = f"Note_{i}"
+    if rng.random() < 0.2:
+        cells[7] = f"MO{rng.randint(100000, 999999)}"
+    # A few rows with data errors, as real exports have
+    if rng.random() < 0.01:
+        cells[4] = ""
+    for i_col in range(layout.info_columns):
+        if rng.random() < 0.02:
+            cells[len(TASK_HEADERS) + i_col] = rng.choice(["x", "check", "ok", 1])
+    for col in layout.quantity_columns.values():
+        roll = rng.random()
+        if roll < 0.25:
+            cells[col] = rng.choice([1, 1, 1, 2, 3, 5])
+        elif roll < 0.3:
+            cells[col] = 0
+    return {col: value for col, value in cells.items() if value != ""}
+
+
+def _write_sheet(zf, part_name, layout, rows, rng):
+    with zf.open(part_name, 'w', force_zip64=True) as part:
+        write = lambda text: part.write(text.encode('utf-8'))
+        write('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+              '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+              f'<dimension ref="A1:{column_letter(layout.width - 1)}{FIRST_TASK_ROW + rows - 1}"/><sheetData>')
+        day_row, shift_row = layout.header_rows()
+        write(_row_xml(1, day_row))
+        write(_row_xml(2, shift_row))
+        for row_number in range(3, FIRST_TASK_ROW):
+            write(_row_xml(row_number, {0: f"Summary {row_number}"}))
+        for i in range(rows):
+            write(_row_xml(FIRST_TASK_ROW + i, _task_row(rng, layout, i + 1)))
+        merges = layout.merged_ranges()
+        write('</sheetData>')
+        write(f'<mergeCells count="{len(merges)}">' + ''.join(f'<mergeCell ref="{m}"/>' for m in merges) + '</mergeCells>')
+        write('</worksheet>')
+
+
+def write_workbook(path, rows, week=DEFAULT_WEEK, columns=DEFAULT_COLUMNS, seed=DEFAULT_SEED):
+    """Write a workbook with a "Summary KW{week}" sheet of ``rows`` task rows; returns ``path``."""
+    rng = random.Random(seed)
+    sheets = [(f"Summary KW{week}", rows), (f"Summary KW{week - 1}", min(rows, 100))]
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES.format(
+            sheets=''.join(_SHEET_CONTENT_TYPE.format(n=n + 1) for n in range(len(sheets)))))
+        zf.writestr('_rels/.rels', _ROOT_RELS)
+        zf.writestr('xl/workbook.xml', _WORKBOOK.format(sheets=''.join(
+            f'<sheet name="{name}" sheetId="{n + 1}" r:id="rId{n + 1}"/>' for n, (name, _) in enumerate(sheets))))
+        zf.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS.format(rels=''.join(
+            f'<Relationship Id="rId{n + 1}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{n + 1}.xml"/>' for n in range(len(sheets)))))
+        zf.writestr('xl/styles.xml', _STYLES)
+        for n, (name, sheet_rows) in enumerate(sheets):
+            sheet_week = int(name.replace('Summary KW', ''))
+            _write_sheet(zf, f'xl/worksheets/sheet{n + 1}.xml', SheetLayout(sheet_week, columns), sheet_rows, rng)
+    return path
+
+
+def corpus_path(directory, rows, columns=DEFAULT_COLUMNS, seed=DEFAULT_SEED):
+    return os.path.join(directory, f"summary_{rows}rows_{columns}cols_s{seed}.xlsx")
+
+
+def ensure_workbook(directory, rows, columns=DEFAULT_COLUMNS, seed=DEFAULT_SEED):
+    """Path of the corpus workbook for these parameters, generated on first use."""
+    path = corpus_path(directory, rows, columns, seed)
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        write_workbook(path + '.tmp', rows, columns=columns, seed=seed)
+        os.replace(path + '.tmp', path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--columns', type=int, default=DEFAULT_COLUMNS)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--out', default=os.path.join(os.path.dirname(__file__), 'corpus'))
+    args = parser.parse_args()
+    for rows in args.rows:
+        print(ensure_workbook(args.out, rows, args.columns, args.seed))
+
+
+if __name__ == '__main__':
+    main()
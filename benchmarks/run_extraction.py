@@ -0,0 +1,152 @@
+"""
+Time and peak memory of Excel extraction, compared against committed baselines.
+
+Each case runs extract_workbook() on one workbook with a pinned extraction context
+(so results do not depend on the day the runner is started): wall time is the best of
+--repeat runs, peak memory is measured with tracemalloc on a separate run. The .xlsx
+cases use the synthetic corpus from generate_workbooks (generated on first use into
+benchmarks/corpus/, which is not committed). No .xlsb writer is available, so the
+.xlsb cases are the fixture workbooks in test_data/.
+
+    python -m benchmarks.run_extraction                    # print results
+    python -m benchmarks.run_extraction --check            # exit 1 on a regression
+    python -m benchmarks.run_extraction --update-baseline  # rewrite baselines.json
+
+Timings depend on the machine; refresh the baselines when the reference machine
+changes, and compare runs made on the same machine.
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.generate_workbooks import DAYS, DEFAULT_COLUMNS, DEFAULT_WEEK, SHIFTS, ensure_workbook  # noqa: E402
+from src.services.extract_data import extract_workbook  # noqa: E402
+
+DEFAULT_SIZES = [1000, 10000, 50000]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+XLSB_FIXTURES = [('testsExcel.xlsb', 16), ('testsExcel2.xlsb', 17)]
+# A case regresses when it is this much slower or larger than its baseline
+DEFAULT_TOLERANCE = 1.5
+
+
+def _context(week):
+    return (f"Summary KW{week}", DAYS[0], SHIFTS[0], week)
+
+
+def build_cases(sizes, corpus, columns=DEFAULT_COLUMNS):
+    """(name, format, path, context) for every benchmark case."""
+    cases = []
+    for rows in sizes:
+        path = ensure_workbook(corpus, rows, columns)
+        cases.append((f"xlsx-{rows}rows-{columns}cols", 'xlsx', path, _context(DEFAULT_WEEK)))
+    for filename, week in XLSB_FIXTURES:
+        path = os.path.join(ROOT, 'test_data', filename)
+        if os.path.exists(path):
+            cases.append((f"xlsb-{os.path.splitext(filename)[0]}", 'xlsb', path, _context(week)))
+    return cases
+
+
+def _extract(path, context):
+    with open(path, 'rb') as file, contextlib.redirect_stdout(io.StringIO()):
+        # get_excel_engine() picks the reader from the upload's file name
+        file.filename = os.path.basename(path)
+        _, rows, errors = extract_workbook(file, context=context)
+    return len(rows), len(errors)
+
+
+def measure(path, context, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows, errors = _extract(path, context)
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        _extract(path, context)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'seconds': round(min(timings), 4),
+        'peak_mb': round(peak / (1024 * 1024), 2),
+        'file_mb': round(os.path.getsize(path) / (1024 * 1024), 2),
+        'rows': rows,
+        'errors': errors
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Messages for every case slower or larger than ``tolerance`` times its baseline."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get('cases', {}).get(name)
+        if not reference:
+            continue
+        if (result['rows'], result['errors']) != (reference['rows'], reference['errors']):
+            regressions.append(f"{name}: extracted {result['rows']} rows / {result['errors']} errors, "
+                               f"baseline {reference['rows']} / {reference['errors']}")
+        for metric in ('seconds', 'peak_mb'):
+            if reference[metric] and result[metric] > reference[metric] * tolerance:
+                regressions.append(f"{name}: {metric} {result[metric]} vs baseline {reference[metric]}")
+    return regressions
+
+
+def _environment():
+    return {'python': platform.python_version(), 'machine': platform.machine(), 'system': platform.system()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark Excel extraction against the committed baselines.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='task rows per synthetic workbook')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case (best is kept)')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--check', action='store_true', help='exit with status 1 when a case regresses')
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {}
+    print(f"{'case':<32} {'rows':>7} {'errors':>7} {'file MB':>8} {'seconds':>9} {'peak MB':>8} {'vs base':>8}")
+    for name, _, path, context in build_cases(args.sizes, args.corpus):
+        result = results[name] = measure(path, context, args.repeat)
+        reference = baseline.get('cases', {}).get(name)
+        ratio = f"{result['seconds'] / reference['seconds']:.2f}x" if reference and reference['seconds'] else '-'
+        print(f"{name:<32} {result['rows']:>7} {result['errors']:>7} {result['file_mb']:>8} "
+              f"{result['seconds']:>9} {result['peak_mb']:>8} {ratio:>8}")
+
+    if args.update_baseline:
+        cases = dict(baseline.get('cases', {}))
+        cases.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'environment': _environment(), 'cases': cases}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    return 1 if regressions and args.check else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,10 @@
 import os
 import sys
-from flask import Flask, g, jsonify
+from flask import Flask, g, jsonify, request
 from flask_wtf.csrf import CSRFProtect
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import FileSystemBytecodeCache
 
 # Add project root to sys.path to allow importing config
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -16,6 +16,7 @@ from src.config import Config
 # Import from local services package (relative to src)
 from .services.security import SecurityMiddleware
 from .services.logging_config import LoggingConfig
+from .services.compression import compress_response
 
 # Import Blueprints
 from .routes.main import main_bp
@@ -23,6 +24,13 @@ from .routes.api import api_bp
 from .routes.health import health_bp
 from .extensions import db_manager
 
+def precompile_templates(app):
+    """Load every template into app.jinja_env (and the bytecode cache) before the first request."""
+    names = app.jinja_env.list_templates(filter_func=lambda name: name.endswith('.html'))
+    for name in names:
+        app.jinja_env.get_template(name)
+    app.logger.info(f"Precompiled {len(names)} templates.")
+
 def create_app():
     app = Flask(__name__,
                 template_folder='templates',
@@ -54,14 +62,19 @@ def create_app():
 
     DATABASE_PATH = app.config['DATABASE_PATH']
 
-    # Jinja environment for generate_html_files
-    env = Environment(loader=FileSystemLoader(app.config['TEMPLATES_FOLDER']))
+    # One Jinja environment (app.jinja_env) renders pages and dashboards alike; compiled
+    # templates are cached on disk so restarted workers skip the compile step
+    os.makedirs(app.config['TEMPLATE_CACHE_DIR'], exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config['TEMPLATE_CACHE_DIR'])
 
     # Register Blueprints
     app.register_blueprint(main_bp)
     app.register_blueprint(api_bp)
     app.register_blueprint(health_bp)
 
+    if app.config['TEMPLATE_PRECOMPILE']:
+        precompile_templates(app)
+
     # Configure CSRF exemptions after blueprint registration
     csrf.exempt(main_bp)
     csrf.exempt(api_bp)
@@ -69,7 +82,13 @@ def create_app():
     # Security middleware
     @app.after_request
     def after_request(response):
-        return SecurityMiddleware.add_security_headers(response)
+        response = SecurityMiddleware.add_security_headers(response)
+        if app.config['RESPONSE_COMPRESSION_ENABLED']:
+            response = compress_response(
+                response, request.headers.get('Accept-Encoding', ''), app.config['RESPONSE_COMPRESSION_MIN_SIZE'],
+                app.config['RESPONSE_COMPRESSION_GZIP_LEVEL'], app.config['RESPONSE_COMPRESSION_BROTLI_QUALITY']
+            )
+        return response
     @app.errorhandler(404)
     def not_found(error):
         from flask import request
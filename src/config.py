@@ -57,10 +57,75 @@ class Config:
     TEMPLATES_FOLDER = os.path.join(SRC_DIR, 'templates')
     STATIC_FOLDER = os.path.join(SRC_DIR, 'static')
 
+    # Compiled Jinja templates are kept here across restarts; templates are compiled at startup
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR') or os.path.join(INSTANCE_DIR, 'template_cache')
+    TEMPLATE_PRECOMPILE = os.environ.get('TEMPLATE_PRECOMPILE', '1').lower() in ('1', 'true', 'yes')
+
     # File upload restrictions
     MAX_CONTENT_LENGTH = int(os.environ.get('MAX_UPLOAD_SIZE', '16777216'))  # 16MB default
     ALLOWED_EXTENSIONS = {'xlsx', 'xls', 'xlsb', 'csv'}
 
+    # Cache of extraction results keyed by upload content + week/day/shift
+    PARSE_CACHE_ENABLED = os.environ.get('PARSE_CACHE_ENABLED', '1').lower() in ('1', 'true', 'yes')
+    PARSE_CACHE_DIR = os.environ.get('PARSE_CACHE_DIR') or os.path.join(INSTANCE_DIR, 'parse_cache')
+    PARSE_CACHE_MAX_BYTES = int(os.environ.get('PARSE_CACHE_MAX_BYTES', '67108864'))  # 64MB default
+    PARSE_CACHE_TTL = int(os.environ.get('PARSE_CACHE_TTL', '86400'))  # 24 hours default
+
+    # Background upload parsing (/upload with async=1); finished jobs are kept for UPLOAD_JOB_TTL seconds
+    UPLOAD_JOBS_ENABLED = os.environ.get('UPLOAD_JOBS_ENABLED', '1').lower() in ('1', 'true', 'yes')
+    UPLOAD_JOB_WORKERS = int(os.environ.get('UPLOAD_JOB_WORKERS', '2'))
+    UPLOAD_JOB_TTL = int(os.environ.get('UPLOAD_JOB_TTL', '600'))  # 10 minutes default
+    # Uploads are copied once into a spooled temp file; files up to this size stay in memory
+    UPLOAD_SPOOL_MAX_MEMORY = int(os.environ.get('UPLOAD_SPOOL_MAX_MEMORY', '1048576'))  # 1MB default
+
+    # Uploaded rows per session: 'memory' (per process) or 'sqlite' (shared by all worker processes)
+    SESSION_STORE_BACKEND = os.environ.get('SESSION_STORE_BACKEND', 'memory').lower()
+    SESSION_STORE_PATH = os.environ.get('SESSION_STORE_PATH') or os.path.join(INSTANCE_DIR, 'sessions.db')
+    SESSION_STORE_MAX_BYTES = int(os.environ.get('SESSION_STORE_MAX_BYTES', '67108864'))  # 64MB default (compressed)
+
+    # Plans reused for identical /generate_dashboard inputs while skills and planning configuration are unchanged
+    PLAN_CACHE_ENABLED = os.environ.get('PLAN_CACHE_ENABLED', '1').lower() in ('1', 'true', 'yes')
+    PLAN_CACHE_MAX_ENTRIES = int(os.environ.get('PLAN_CACHE_MAX_ENTRIES', '32'))
+    PLAN_CACHE_TTL = int(os.environ.get('PLAN_CACHE_TTL', '600'))  # 10 minutes default
+
+    # Content-addressed dashboard files under output/dashboards: age and count limits of the cleanup
+    DASHBOARD_OUTPUT_MAX_AGE = int(os.environ.get('DASHBOARD_OUTPUT_MAX_AGE', '86400'))  # 1 day default
+    DASHBOARD_OUTPUT_MAX_FILES = int(os.environ.get('DASHBOARD_OUTPUT_MAX_FILES', '200'))
+
+    # --- Response Compression ---
+    # JSON/HTML responses of at least RESPONSE_COMPRESSION_MIN_SIZE bytes are sent gzip- or Brotli-compressed
+    RESPONSE_COMPRESSION_ENABLED = os.environ.get('RESPONSE_COMPRESSION_ENABLED', '1').lower() in ('1', 'true', 'yes')
+    RESPONSE_COMPRESSION_MIN_SIZE = int(os.environ.get('RESPONSE_COMPRESSION_MIN_SIZE', '1024'))
+    RESPONSE_COMPRESSION_GZIP_LEVEL = int(os.environ.get('RESPONSE_COMPRESSION_GZIP_LEVEL', '6'))
+    RESPONSE_COMPRESSION_BROTLI_QUALITY = int(os.environ.get('RESPONSE_COMPRESSION_BROTLI_QUALITY', '5'))
+
+    # --- Planner Configuration ---
+    # Number of most expensive task definitions listed in each planner profile
+    PLANNER_PROFILE_TOP_N = int(os.environ.get('PLANNER_PROFILE_TOP_N', '5'))
+    # Structured decision trace (off by default); capacity bounds the ring buffer per plan
+    PLANNER_TRACE_ENABLED = os.environ.get('PLANNER_TRACE_ENABLED', '0').lower() in ('1', 'true', 'yes')
+    PLANNER_TRACE_CAPACITY = int(os.environ.get('PLANNER_TRACE_CAPACITY', '5000'))
+    # Default strategy: greedy, beam, local_search or exact (a request may pick another one)
+    PLANNER_STRATEGY = os.environ.get('PLANNER_STRATEGY', 'greedy').lower()
+    # Per-strategy budgets; knobs not listed here keep the defaults from planner_strategies
+    PLANNER_BUDGETS = {
+        'beam': {
+            'beam_width': int(os.environ.get('PLANNER_BEAM_WIDTH', '4')),
+            'time_limit': float(os.environ.get('PLANNER_SEARCH_TIME_LIMIT', '5'))
+        },
+        'local_search': {
+            'max_iterations': int(os.environ.get('PLANNER_LOCAL_SEARCH_MAX_ITERATIONS', '200')),
+            'time_limit': float(os.environ.get('PLANNER_SEARCH_TIME_LIMIT', '5'))
+        },
+        'exact': {
+            'time_limit': float(os.environ.get('PLANNER_EXACT_TIME_LIMIT', '10'))
+        }
+    }
+
+    # --- Task Name Resolution ---
+    # Minimum token overlap (Jaccard, 0-1) for matching an Excel task name to a known task
+    TASK_NAME_FUZZY_THRESHOLD = float(os.environ.get('TASK_NAME_FUZZY_THRESHOLD', '0.8'))
+
     # Ensure these directories exist
     os.makedirs(INSTANCE_DIR, exist_ok=True)
     os.makedirs(OUTPUT_FOLDER, exist_ok=True)
@@ -106,5 +171,13 @@ class Config:
         if not os.path.exists(db_dir):
             errors.append(f"Database directory does not exist: {db_dir}")
 
+        if cls.SESSION_STORE_BACKEND not in ('memory', 'sqlite'):
+            errors.append(f"SESSION_STORE_BACKEND must be 'memory' or 'sqlite', not '{cls.SESSION_STORE_BACKEND}'")
+
+        if not 1 <= cls.RESPONSE_COMPRESSION_GZIP_LEVEL <= 9:
+            errors.append("RESPONSE_COMPRESSION_GZIP_LEVEL must be between 1 and 9")
+        if not 0 <= cls.RESPONSE_COMPRESSION_BROTLI_QUALITY <= 11:
+            errors.append("RESPONSE_COMPRESSION_BROTLI_QUALITY must be between 0 and 11")
+
         if errors:
             raise ValueError("Configuration validation failed:\n" + "\n".join(f"- {error}" for error in errors))
@@ -17,6 +17,7 @@ from ..services.db_utils import (
     get_db_connection
 )
 from ..services.config_manager import load_app_config, TECHNICIAN_GROUPS
+from ..services.task_name_index import invalidate_task_name_index
 from ..services.security import InputValidator, validate_request, require_json_fields
 import sqlite3
 
@@ -978,6 +979,7 @@ def add_task_api():
                 return jsonify({"message": f"Invalid Technology ID format: {tech_id}."}), 400
 
         task_id = task_manager.get_or_create(task_name)
+        invalidate_task_name_index()
 
         # Add required skills
         for tech_id in technology_ids:
@@ -1055,6 +1057,7 @@ def update_task_api(task_id):
             task_manager.add_required_skill(task_id, int(tech_id)) # Add new skills
 
         g.db.commit()
+        invalidate_task_name_index()
 
         cursor.execute("SELECT id, name FROM tasks WHERE id = ?", (task_id,))
         updated_task_data = cursor.fetchone()
@@ -1087,6 +1090,7 @@ def delete_task_api(task_id):
         cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
 
         g.db.commit()
+        invalidate_task_name_index()
 
         if cursor.rowcount > 0: # Checks if the task itself was deleted
             return jsonify({"message": f"Task '{task_name}' (ID: {task_id}) and its assignments deleted successfully."}), 200
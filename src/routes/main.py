@@ -1,72 +1,175 @@
-from flask import Blueprint, render_template, send_from_directory, current_app, request, jsonify, url_for, g
+from flask import Blueprint, render_template, current_app, request, jsonify, url_for, g
 from flask_wtf.csrf import CSRFProtect
-from io import BytesIO
 import json
-import pandas as pd
-import random
+import os
 import time
 
-from ..services.extract_data import extract_data, get_current_day, get_current_week_number
-from ..services.data_processing import sanitize_data, calculate_work_time
-from ..services.dashboard import generate_html_files
+from ..services.extract_data import extract_workbook, get_current_day, get_current_week, get_current_week_number, get_extraction_context
+from ..services.data_processing import build_typed_tasks, calculate_work_time
+from ..services.dashboard import (
+    DASHBOARD_FILENAME_PATTERN, DASHBOARD_OUTPUT_DIR, cleanup_dashboard_outputs, render_dashboard, write_dashboard_html
+)
 from ..services.config_manager import TECHNICIANS, TECHNICIAN_GROUPS, TECHNICIAN_LINES
-from ..services.db_utils import get_db_connection, TaskManager, get_all_technician_skills_by_name
+from ..services.db_utils import get_db_connection, get_data_version, PLANNING_CONFIG_DATA_VERSION
 from ..services.security import InputValidator
+from ..services.planner_profile import PlannerProfile
+from ..services.planner_trace import DecisionTrace
+from ..services.planner_strategies import STRATEGIES
+from ..services.task_name_index import get_task_name_index, resolve_tasks
+from ..services.parse_cache import get_parse_cache, extract_workbook_cached
+from ..services.upload_jobs import get_upload_job_manager, job_status
+from ..services.upload_spool import UploadSpool
+from ..services.upload_diff import diff_rows
+from ..services.session_store import get_session_store
+from ..services.skill_snapshot import get_skill_snapshot
+from ..services.plan_cache import get_plan_cache, make_plan_key
+from ..services.compression import send_precompressed
 
 main_bp = Blueprint('main', __name__)
 
-# Enhanced session management with timestamps
-session_excel_data_cache = {}
+# Uploaded rows per browser session, kept in the configured session store
 SESSION_TIMEOUT_SECONDS = 5 * 60  # 5 minutes to match frontend
+DASHBOARD_CACHE_MAX_AGE = 365 * 24 * 60 * 60  # dashboard URLs are content-addressed
 
-def cleanup_expired_sessions():
-    """Remove expired sessions from cache."""
-    current_time = time.time()
-    expired_sessions = []
-
-    for session_id, session_data in session_excel_data_cache.items():
-        if isinstance(session_data, dict) and 'timestamp' in session_data:
-            if current_time - session_data['timestamp'] > SESSION_TIMEOUT_SECONDS:
-                expired_sessions.append(session_id)
-
-    for session_id in expired_sessions:
-        del session_excel_data_cache[session_id]
-        current_app.logger.info(f"Expired session removed: {session_id}")
+def get_sessions():
+    return get_session_store(
+        current_app.config['SESSION_STORE_BACKEND'], SESSION_TIMEOUT_SECONDS,
+        current_app.config['SESSION_STORE_MAX_BYTES'], current_app.config['SESSION_STORE_PATH']
+    )
 
 def is_session_valid(session_id):
     """Check if session exists and is not expired."""
-    cleanup_expired_sessions()  # Clean up first
-
-    if session_id not in session_excel_data_cache:
-        return False
-
-    session_data = session_excel_data_cache[session_id]
-    if not isinstance(session_data, dict) or 'timestamp' not in session_data:
-        return False
-
-    current_time = time.time()
-    return current_time - session_data['timestamp'] <= SESSION_TIMEOUT_SECONDS
+    return session_id in get_sessions()
 
 def get_session_data(session_id):
     """Get session data if session is valid."""
-    if not is_session_valid(session_id):
+    entry = get_sessions().get(session_id)
+    return entry['data'] if entry is not None else None
+
+def get_session_tasks(session_id):
+    """Sanitized, typed tasks of a valid session (see build_typed_tasks), or None."""
+    sessions = get_sessions()
+    entry = sessions.get(session_id)
+    if entry is None:
         return None
-    return session_excel_data_cache[session_id]['data']
-
-def store_session_data(session_id, data):
-    """Store data with timestamp for session management."""
-    session_excel_data_cache[session_id] = {
+    if entry.get('tasks') is None:  # Stored before typed tasks were kept with the session
+        entry['tasks'] = build_typed_tasks(entry['data'], current_app.logger)
+        sessions.put(session_id, entry)
+    return entry['tasks']
+
+def store_session_data(session_id, data, tasks=None):
+    """Store data with timestamp for session management; ``tasks`` are the typed tasks built from ``data``."""
+    get_sessions().put(session_id, {
         'data': data,
+        'tasks': tasks,
         'timestamp': time.time()
-    }
+    })
     current_app.logger.info(f"Session data stored: {session_id}")
 
 def update_session_timestamp(session_id):
     """Update session timestamp to extend session life."""
-    if session_id in session_excel_data_cache:
-        session_excel_data_cache[session_id]['timestamp'] = time.time()
+    if get_sessions().touch(session_id):
         current_app.logger.info(f"Session timestamp updated: {session_id}")
 
+def process_excel_upload(upload, session_id, progress=None):
+    """
+    Parse a spooled upload (UploadSpool) into the session cache.
+
+    Returns the (response_dict, status_code) of /upload; ``progress`` receives the
+    extraction phases (see EXTRACTION_PHASES).
+    """
+    current_week_number = get_current_week_number()
+    # One pass over the workbook: the sheet list and the week's rows come from the same handle
+    if current_app.config.get('PARSE_CACHE_ENABLED'):
+        parse_cache = get_parse_cache(
+            current_app.config['PARSE_CACHE_DIR'], current_app.config['PARSE_CACHE_MAX_BYTES'],
+            current_app.config['PARSE_CACHE_TTL']
+        )
+        sheet_names, excel_data_list, extraction_errors = extract_workbook_cached(
+            upload.open(), parse_cache, current_app.logger, progress, content_hash=upload.content_hash
+        )
+    else:
+        sheet_names, excel_data_list, extraction_errors = extract_workbook(upload.open(), progress=progress)
+
+    expected_sheet_name = f"Summary KW{current_week_number}"
+    if expected_sheet_name not in sheet_names:
+        available_weeks = [s.replace('Summary KW', '') for s in sheet_names if s.startswith('Summary KW')]
+        available_weeks.sort()
+        error_msg = f"Week mismatch: File is not for current week ({current_week_number}). Available: {', '.join(available_weeks) if available_weeks else 'None'}."
+        return {"message": error_msg}, 400
+
+    excel_data_list_with_ids = []
+    for idx, item in enumerate(excel_data_list):
+        item_with_id = item.copy()
+        item_with_id['id'] = str(idx + 1)
+        if 'name' not in item_with_id or not item_with_id['name']:
+            item_with_id['name'] = item_with_id.get('scheduler_group_task', f'Unnamed Task {idx+1}')
+        excel_data_list_with_ids.append(item_with_id)
+
+    # A re-upload within the session is diffed against the rows it replaces
+    previous_rows = get_session_data(session_id)
+    change_set = diff_rows(previous_rows, excel_data_list_with_ids) if previous_rows is not None else None
+    # Sanitized and typed once; stage 2 and /generate_dashboard reuse them from the session
+    typed_tasks = build_typed_tasks(excel_data_list_with_ids, current_app.logger)
+    store_session_data(session_id, excel_data_list_with_ids, typed_tasks)
+    if change_set is not None:
+        current_app.logger.info(
+            f"Re-upload for session {session_id}: {len(change_set.added)} added, {len(change_set.removed)} removed, "
+            f"{len(change_set.modified)} modified, {change_set.unchanged} unchanged tasks."
+        )
+
+    pm_tasks_for_ui = [
+        {
+            "id": str(i + 1), "name": task.get("scheduler_group_task", "Unknown PM"),
+            "lines": task.get("lines", ""), "mitarbeiter_pro_aufgabe": task["mitarbeiter_pro_aufgabe"],
+            "planned_worktime_min": task["planned_worktime_min"], "priority": task.get("priority", "C"),
+            "quantity": task["quantity"], "task_type": "PM",
+            "ticket_mo": task.get("ticket_mo", ""), "ticket_url": task.get("ticket_url", "")
+        } for i, task in enumerate(t for t in typed_tasks if t.get('task_type', '').upper() == 'PM')
+    ]
+
+    response_message = "File processed."
+    if extraction_errors: response_message += f" {len(extraction_errors)} issues found."
+    elif not excel_data_list: response_message += " No data extracted."
+    else: response_message += " PM tasks extracted."
+
+    response_data = {
+        "message": response_message, "pm_tasks": pm_tasks_for_ui,
+        "technicians": TECHNICIANS, "technician_groups": TECHNICIAN_GROUPS,
+        "session_id": session_id, "extraction_errors": extraction_errors
+    }
+    if change_set is not None:
+        response_data["changes"] = change_set.to_dict()
+    return response_data, 200
+
+def get_upload_jobs():
+    # Job state lives in the session store's backend, so every worker process sees it
+    store = get_session_store(
+        current_app.config['SESSION_STORE_BACKEND'], current_app.config['UPLOAD_JOB_TTL'],
+        current_app.config['SESSION_STORE_MAX_BYTES'], current_app.config['SESSION_STORE_PATH'], table='upload_jobs'
+    )
+    return get_upload_job_manager(current_app.config['UPLOAD_JOB_WORKERS'], store, current_app.logger)
+
+def spool_upload(file_storage):
+    return UploadSpool(file_storage.stream, file_storage.filename, current_app.config['UPLOAD_SPOOL_MAX_MEMORY'])
+
+def start_upload_job(excel_file_stream, session_id):
+    """Queue the workbook for background parsing and answer 202 with the job's URLs."""
+    # The request's file stream is closed once the response is sent; the job owns the spooled copy
+    upload = spool_upload(excel_file_stream)
+    app = current_app._get_current_object()
+
+    def work(progress):
+        with upload, app.app_context():
+            return process_excel_upload(upload, session_id, progress)
+
+    job = get_upload_jobs().submit(session_id, work)
+    current_app.logger.info(f"Upload job {job['job_id']} queued for session: {session_id}")
+    return jsonify({
+        "message": "File received. Processing...", "job_id": job['job_id'], "session_id": session_id,
+        "status_url": url_for('main.upload_job_status_route', job_id=job['job_id'])
+    }), 202
+
 @main_bp.route('/')
 def index_route():
     return render_template('index.html')
@@ -77,7 +180,17 @@ def manage_mappings_route():
 
 @main_bp.route('/output/<path:filename>')
 def output_file_route(filename):
-    return send_from_directory(current_app.config['OUTPUT_FOLDER'], filename)
+    return send_precompressed(current_app.config['OUTPUT_FOLDER'], filename, request.headers.get('Accept-Encoding', ''))
+
+@main_bp.route('/dashboards/<filename>')
+def dashboard_file_route(filename):
+    """Serve a content-addressed dashboard; its content never changes, so browsers may cache it for good."""
+    if not DASHBOARD_FILENAME_PATTERN.match(filename):
+        return jsonify({"message": "Dashboard not found."}), 404
+    output_dir = os.path.join(current_app.config['OUTPUT_FOLDER'], DASHBOARD_OUTPUT_DIR)
+    response = send_precompressed(output_dir, filename, request.headers.get('Accept-Encoding', ''), max_age=DASHBOARD_CACHE_MAX_AGE)
+    response.headers['Cache-Control'] = f'public, max-age={DASHBOARD_CACHE_MAX_AGE}, immutable'
+    return response
 
 @main_bp.route('/upload', methods=['POST'])
 def upload_file_route():
@@ -104,55 +217,12 @@ def upload_file_route():
 
         if 'excelFile' in request.files and request.files['excelFile'].filename != '':
             excel_file_stream = request.files['excelFile']
+            if request.form.get('async') == '1' and current_app.config.get('UPLOAD_JOBS_ENABLED'):
+                return start_upload_job(excel_file_stream, session_id)
             try:
-                current_week_number = get_current_week_number()
-                excel_file_copy = excel_file_stream.read()
-                excel_file_stream.seek(0)
-                original_filename = getattr(excel_file_stream, 'filename', '').lower()
-                engine_to_use = 'pyxlsb' if original_filename.endswith('.xlsb') else 'openpyxl'
-
-                with pd.ExcelFile(BytesIO(excel_file_copy), engine=engine_to_use) as xls:
-                    expected_sheet_name = f"Summary KW{current_week_number}"
-                    if expected_sheet_name not in xls.sheet_names:
-                        available_weeks = [s.replace('Summary KW', '') for s in xls.sheet_names if s.startswith('Summary KW')]
-                        available_weeks.sort()
-                        error_msg = f"Week mismatch: File is not for current week ({current_week_number}). Available: {', '.join(available_weeks) if available_weeks else 'None'}."
-                        return jsonify({"message": error_msg}), 400
-
-                excel_file_stream.seek(0)
-                excel_data_list, extraction_errors = extract_data(excel_file_stream)
-
-                excel_data_list_with_ids = []
-                for idx, item in enumerate(excel_data_list):
-                    item_with_id = item.copy()
-                    item_with_id['id'] = str(idx + 1)
-                    if 'name' not in item_with_id or not item_with_id['name']:
-                        item_with_id['name'] = item_with_id.get('scheduler_group_task', f'Unnamed Task {idx+1}')
-                    excel_data_list_with_ids.append(item_with_id)
-
-                store_session_data(session_id, excel_data_list_with_ids)
-
-                sanitized_data_for_pm_ui = sanitize_data(excel_data_list, current_app.logger)
-                pm_tasks_for_ui = [
-                    {
-                        "id": str(i + 1), "name": task.get("scheduler_group_task", "Unknown PM"),
-                        "lines": task.get("lines", ""), "mitarbeiter_pro_aufgabe": int(task.get("mitarbeiter_pro_aufgabe", 1)),
-                        "planned_worktime_min": int(task.get("planned_worktime_min", 0)), "priority": task.get("priority", "C"),
-                        "quantity": int(task.get("quantity", 1)), "task_type": "PM",
-                        "ticket_mo": task.get("ticket_mo", ""), "ticket_url": task.get("ticket_url", "")
-                    } for i, task in enumerate(s_data for s_data in sanitized_data_for_pm_ui if s_data.get('task_type', '').upper() == 'PM')
-                ]
-
-                response_message = "File processed."
-                if extraction_errors: response_message += f" {len(extraction_errors)} issues found."
-                elif not excel_data_list: response_message += " No data extracted."
-                else: response_message += " PM tasks extracted."
-
-                return jsonify({
-                    "message": response_message, "pm_tasks": pm_tasks_for_ui,
-                    "technicians": TECHNICIANS, "technician_groups": TECHNICIAN_GROUPS,
-                    "session_id": session_id, "extraction_errors": extraction_errors
-                })
+                with spool_upload(excel_file_stream) as upload:
+                    response_data, status_code = process_excel_upload(upload, session_id)
+                return jsonify(response_data), status_code
             except Exception as e:
                 current_app.logger.error(f"Error during initial file upload: {e}", exc_info=True)
                 return jsonify({"message": f"Error processing file: {str(e)}"}), 500
@@ -163,9 +233,9 @@ def upload_file_route():
                 current_app.logger.warning(f"Session validation failed for session: {session_id}")
                 return jsonify({"message": "Session expired. Re-upload."}), 400
 
-            # Get cached data using new session management
-            excel_data_list_cached = get_session_data(session_id)
-            if excel_data_list_cached is None:
+            # Typed tasks cached with the session by the upload
+            session_tasks = get_session_tasks(session_id)
+            if session_tasks is None:
                 current_app.logger.warning(f"No session data found for session: {session_id}")
                 return jsonify({"message": "Session expired. Re-upload."}), 400
 
@@ -178,30 +248,25 @@ def upload_file_route():
                 present_technicians = [tech for tech in all_technicians_flat if tech not in absent_technicians]
 
                 total_work_minutes = calculate_work_time(get_current_day())
-                sanitized_data = sanitize_data(excel_data_list_cached, current_app.logger)
-
-                all_tasks_for_processing = [
-                    {
-                        "id": str(idx + 1), "name": row.get("scheduler_group_task", "Unknown"),
-                        "lines": row.get("lines", ""), "mitarbeiter_pro_aufgabe": int(row.get("mitarbeiter_pro_aufgabe", 1)),
-                        "planned_worktime_min": int(row.get("planned_worktime_min", 0)), "priority": row.get("priority", "C"),
-                        "quantity": int(row.get("quantity", 1)), "task_type": row.get("task_type", ""),
-                        "ticket_mo": row.get("ticket_mo", ""), "ticket_url": row.get("ticket_url", "")
-                    } for idx, row in enumerate(sanitized_data)
-                ]
 
                 rep_tasks_for_ui = []
                 eligible_technicians_for_rep_modal = {}
-                raw_rep_tasks = [t for t in all_tasks_for_processing if t['task_type'].upper() == 'REP']
-
-                for task_rep in raw_rep_tasks:
+                raw_rep_tasks = [t for t in session_tasks if t.get('task_type', '').upper() == 'REP']
+
+                for row in raw_rep_tasks:
+                    task_rep = {
+                        "id": str(row['id']), "name": row.get("scheduler_group_task", "Unknown"),
+                        "lines": row.get("lines", ""), "mitarbeiter_pro_aufgabe": row["mitarbeiter_pro_aufgabe"],
+                        "planned_worktime_min": row["planned_worktime_min"], "priority": row.get("priority", "C"),
+                        "quantity": row["quantity"], "task_type": row.get("task_type", ""),
+                        "ticket_mo": row.get("ticket_mo", ""), "ticket_url": row.get("ticket_url", "")
+                    }
                     task_id_rep = task_rep['id']
                     rep_tasks_for_ui.append(task_rep)
                     eligible_technicians_for_rep_modal[task_id_rep] = []
-                    task_duration_rep = int(task_rep.get('planned_worktime_min', 0))
+                    task_duration_rep = task_rep['planned_worktime_min']
                     min_acceptable_time = task_duration_rep * 0.75
-                    task_lines_rep_str = str(task_rep.get('lines', ''))
-                    task_lines_rep_list = [int(l.strip()) for l in task_lines_rep_str.split(',') if l.strip().isdigit()] if task_lines_rep_str and task_lines_rep_str.lower() not in ['nan', ''] else []
+                    task_lines_rep_list = row['line_numbers']
 
                     for tech_name in present_technicians:
                         tech_available_time = total_work_minutes
@@ -225,6 +290,13 @@ def upload_file_route():
         current_app.logger.error(f"Unexpected error in upload_file_route: {e}", exc_info=True)
         return jsonify({"message": "An unexpected error occurred."}), 500
 
+@main_bp.route('/upload/jobs/<job_id>')
+def upload_job_status_route(job_id):
+    job = get_upload_jobs().get(job_id)
+    if job is None:
+        return jsonify({"message": "Upload job not found or expired."}), 404
+    return jsonify(job_status(job))
+
 @main_bp.route('/generate_dashboard', methods=['POST'])
 def generate_dashboard_route():
     try:
@@ -235,20 +307,28 @@ def generate_dashboard_route():
             current_app.logger.warning(f"Session validation failed for dashboard generation: {session_id}")
             return jsonify({"message": "Invalid session. Re-upload Excel."}), 400
 
-        excel_data_from_cache = get_session_data(session_id)
-        if excel_data_from_cache is None:
+        session_tasks = get_session_tasks(session_id)
+        if session_tasks is None:
             current_app.logger.warning(f"No session data found for dashboard generation: {session_id}")
             return jsonify({"message": "Invalid session. Re-upload Excel."}), 400
 
         update_session_timestamp(session_id)
 
+        planner_strategy = (form_data.get('strategy') or current_app.config['PLANNER_STRATEGY']).lower()
+        if planner_strategy not in STRATEGIES:
+            return jsonify({"message": f"Unknown planner strategy '{planner_strategy}'. Available: {', '.join(sorted(STRATEGIES))}"}), 400
+
         present_technicians = json.loads(form_data.get('present_technicians', '[]'))
         rep_assignments_from_ui = json.loads(form_data.get('rep_assignments', '[]'))
         all_processed_tasks_from_ui = json.loads(form_data.get('all_processed_tasks', '[]'))
 
-        task_manager = TaskManager(g.db)
-        technician_skills_map = get_all_technician_skills_by_name(g.db)
+        task_index = get_task_name_index(g.db, current_app.config['DATABASE_PATH'], current_app.config['TASK_NAME_FUZZY_THRESHOLD'])
+        # Shared snapshot; reloaded only when a skill or technician write bumped the data version
+        skill_snapshot = get_skill_snapshot(g.db, current_app.config['DATABASE_PATH'])
+        technician_skills_map = skill_snapshot.by_name
         final_tasks_map = {}
+        # Excel/UI task name per task; resolved to DB tasks and their skills in one bulk pass below
+        task_names = {}
 
         for task_from_ui in all_processed_tasks_from_ui:
             task_id_ui = str(task_from_ui.get('id'))
@@ -256,16 +336,12 @@ def generate_dashboard_route():
             task_to_add = task_from_ui.copy()
             task_name = task_to_add.get('name', task_to_add.get('scheduler_group_task', f'Unknown Task UI {task_id_ui}'))
             if not task_to_add.get('name'): task_to_add['name'] = task_name
-            db_task_id = task_manager.get_or_create(task_name)
-            task_to_add.update({'db_task_id': db_task_id})
-
-            required_skills_objects = task_manager.get_required_skills(db_task_id)
-            technology_ids_for_task = [skill['technology_id'] for skill in required_skills_objects]
-            task_to_add['technology_ids'] = technology_ids_for_task
-
+            task_names[task_id_ui] = task_name
             final_tasks_map[task_id_ui] = task_to_add
+        # Tasks sent back by the UI are typed here; the session's tasks were typed at upload
+        final_tasks_map = dict(zip(final_tasks_map, build_typed_tasks(list(final_tasks_map.values()), current_app.logger)))
 
-        for task_from_cache in excel_data_from_cache:
+        for task_from_cache in session_tasks:
             cache_task_id_ui = str(task_from_cache.get('id'))
             if not cache_task_id_ui or cache_task_id_ui in final_tasks_map: continue
             if task_from_cache.get('task_type', '').upper() == 'PM':
@@ -273,37 +349,87 @@ def generate_dashboard_route():
                 task_name = task_to_add.get('name', task_to_add.get('scheduler_group_task', f'Unknown Cache PM {cache_task_id_ui}'))
                 if not task_to_add.get('name'): task_to_add['name'] = task_name
                 task_to_add['isAdditionalTask'] = False
-                db_task_id = task_manager.get_or_create(task_name)
-                task_to_add.update({'db_task_id': db_task_id})
-
-                required_skills_objects = task_manager.get_required_skills(db_task_id)
-                technology_ids_for_task = [skill['technology_id'] for skill in required_skills_objects]
-                task_to_add['technology_ids'] = technology_ids_for_task
-
+                task_names[cache_task_id_ui] = task_name
                 final_tasks_map[cache_task_id_ui] = task_to_add
-        g.db.commit()
+
+        resolved_tasks = resolve_tasks(g.db, task_index, task_names.values(), current_app.logger)
+        for task_key, task_to_add in final_tasks_map.items():
+            db_task_id, technology_ids_for_task = resolved_tasks.get(task_names[task_key], (None, []))
+            task_to_add.update({'db_task_id': db_task_id, 'technology_ids': technology_ids_for_task})
 
         all_tasks_for_dashboard = list(final_tasks_map.values())
-        available_time_summary, under_resourced_pm_tasks = generate_html_files(
-            all_tasks=all_tasks_for_dashboard, 
-            present_technicians=present_technicians, 
-            rep_assignments=rep_assignments_from_ui,
-            env=current_app.jinja_env, 
-            output_folder=current_app.config['OUTPUT_FOLDER'], 
-            all_technicians_global=TECHNICIANS, 
-            technician_groups_global=TECHNICIAN_GROUPS, 
-            db_conn=g.db, # Pass the connection here
-            logger=current_app.logger, 
-            technician_technology_skills=technician_skills_map
+        planner_budget = current_app.config['PLANNER_BUDGETS'].get(planner_strategy)
+
+        def plan():
+            planner_profile = PlannerProfile(top_n=current_app.config['PLANNER_PROFILE_TOP_N'])
+            decision_trace = None
+            if current_app.config['PLANNER_TRACE_ENABLED']:
+                decision_trace = DecisionTrace(capacity=current_app.config['PLANNER_TRACE_CAPACITY'], enabled=True)
+            available_time_summary, under_resourced_pm_tasks, technician_html = render_dashboard(
+                all_tasks=all_tasks_for_dashboard, 
+                present_technicians=present_technicians, 
+                rep_assignments=rep_assignments_from_ui,
+                env=current_app.jinja_env, 
+                all_technicians_global=TECHNICIANS, 
+                technician_groups_global=TECHNICIAN_GROUPS, 
+                db_conn=g.db, # Pass the connection here
+                logger=current_app.logger, 
+                technician_technology_skills=technician_skills_map,
+                planner_profile=planner_profile,
+                decision_trace=decision_trace,
+                strategy=planner_strategy,
+                planner_budget=planner_budget,
+                tasks_typed=True
+            )
+            return {
+                "available_time": available_time_summary,
+                "under_resourced_tasks": under_resourced_pm_tasks,
+                "planner_profile": planner_profile.to_dict(),
+                "decision_trace": decision_trace.to_dict() if decision_trace is not None else None,
+                "html": technician_html
+            }
+
+        # Identical inputs on unchanged skills/configuration reuse the plan (see plan_cache)
+        config_version = get_data_version(g.db, PLANNING_CONFIG_DATA_VERSION)
+        if current_app.config['PLAN_CACHE_ENABLED'] and skill_snapshot.version is not None and config_version is not None:
+            plan_key = make_plan_key({
+                "tasks": all_tasks_for_dashboard, "present_technicians": present_technicians,
+                "rep_assignments": rep_assignments_from_ui, "strategy": planner_strategy, "budget": planner_budget,
+                "trace": [current_app.config['PLANNER_TRACE_ENABLED'], current_app.config['PLANNER_TRACE_CAPACITY']],
+                "profile_top_n": current_app.config['PLANNER_PROFILE_TOP_N'],
+                "technicians": TECHNICIANS, "technician_groups": TECHNICIAN_GROUPS, "technician_lines": TECHNICIAN_LINES,
+                "context": get_extraction_context(), "date": get_current_week()[1].date(),
+                "skills_version": skill_snapshot.version, "config_version": config_version
+            })
+            plan_cache = get_plan_cache(current_app.config['PLAN_CACHE_MAX_ENTRIES'], current_app.config['PLAN_CACHE_TTL'])
+            plan_result, plan_source = plan_cache.get_or_compute(plan_key, plan)
+        else:
+            plan_result, plan_source = plan(), 'miss'
+        if plan_source != 'miss':
+            current_app.logger.info(f"Plan served from cache ({plan_source}) for session: {session_id}")
+        output_folder = current_app.config['OUTPUT_FOLDER']
+        dashboard_file = write_dashboard_html(
+            output_folder, plan_result["html"], current_app.logger,
+            current_app.config['RESPONSE_COMPRESSION_GZIP_LEVEL'], current_app.config['RESPONSE_COMPRESSION_BROTLI_QUALITY']
+        )
+        cleanup_dashboard_outputs(
+            output_folder, current_app.config['DASHBOARD_OUTPUT_MAX_AGE'],
+            current_app.config['DASHBOARD_OUTPUT_MAX_FILES'], current_app.logger
         )
-        dashboard_url = url_for('main.output_file_route', filename='technician_dashboard.html', _external=True) + f'?cache_bust={random.randint(1,100000)}'
-        return jsonify({
+
+        dashboard_url = url_for('main.dashboard_file_route', filename=dashboard_file, _external=True)
+        response_data = {
             "message": "Dashboard generated.",
-            "available_time": available_time_summary,
-            "under_resourced_tasks": under_resourced_pm_tasks,
+            "available_time": plan_result["available_time"],
+            "under_resourced_tasks": plan_result["under_resourced_tasks"],
             "session_id": session_id,
-            "dashboard_url": dashboard_url
-        })
+            "dashboard_url": dashboard_url,
+            "planner_profile": plan_result["planner_profile"],
+            "plan_cache": plan_source
+        }
+        if plan_result["decision_trace"] is not None:
+            response_data["decision_trace"] = plan_result["decision_trace"]
+        return jsonify(response_data)
     except Exception as e:
         current_app.logger.error(f"Error in generate_dashboard_route: {e}", exc_info=True)
         if hasattr(g, 'db') and g.db is not None:
@@ -0,0 +1,134 @@
+"""
+Compression of HTTP responses.
+
+JSON and HTML responses above a size threshold are compressed on the way out with
+Brotli (when the ``brotli`` package is installed) or gzip, whichever the client prefers
+in Accept-Encoding. Streamed responses and files sent from disk
+are left alone.
+
+Files that are written once and served many times -- the rendered dashboards -- are
+compressed when they are written instead: write_precompressed() stores ``.gz`` (and
+``.br``) siblings next to the plain file, and send_precompressed() sends the sibling
+matching the request's Accept-Encoding, so nothing is compressed per request.
+"""
+import gzip
+import mimetypes
+import os
+import tempfile
+
+from flask import send_from_directory
+
+try:
+    import brotli
+except ImportError:  # Optional dependency; gzip is used instead
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+# File suffix of each precompressed sibling, in order of preference
+PRECOMPRESSED_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encoding, encodings=None):
+    """
+    The encoding to use for a request's Accept-Encoding header, or None.
+
+    Encodings with q=0 are refused; among the accepted ones the first of ``encodings``
+    (default: available_encodings(), Brotli before gzip) wins.
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in encodings if encodings is not None else available_encodings():
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding, gzip_level=6, brotli_quality=5):
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    # mtime=0 keeps the output deterministic for identical content
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def _add_vary(response):
+    vary = {value.strip().lower() for value in response.headers.get('Vary', '').split(',') if value.strip()}
+    if 'accept-encoding' not in vary:
+        response.headers.add('Vary', 'Accept-Encoding')
+
+
+def compress_response(response, accept_encoding, min_size=1024, gzip_level=6, brotli_quality=5):
+    """Compress ``response`` in place when it is a large enough JSON/HTML body; returns it."""
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    _add_vary(response)
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return response
+    response.set_data(compress(data, encoding, gzip_level, brotli_quality))
+    response.headers['Content-Encoding'] = encoding
+    if response.headers.get('ETag'):
+        # The compressed body is a different representation
+        response.headers['ETag'] = response.headers['ETag'].rstrip('"') + f'-{encoding}"'
+    return response
+
+
+def write_atomic(path, data):
+    """Write ``data`` to a temp file next to ``path`` and rename it, so a reader never sees a partial file."""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def write_precompressed(path, data, gzip_level=6, brotli_quality=5):
+    """Write the compressed siblings of ``path`` (``.gz``, and ``.br`` if Brotli is installed)."""
+    for encoding in available_encodings():
+        write_atomic(path + PRECOMPRESSED_SUFFIXES[encoding], compress(data, encoding, gzip_level, brotli_quality))
+
+
+def precompressed_paths(path):
+    return [path + suffix for suffix in PRECOMPRESSED_SUFFIXES.values()]
+
+
+def send_precompressed(directory, filename, accept_encoding, **kwargs):
+    """
+    send_from_directory() that sends a precompressed sibling of ``filename`` when one
+    exists and the client accepts its encoding.
+    """
+    path = os.path.join(directory, filename)
+    existing = [encoding for encoding, suffix in PRECOMPRESSED_SUFFIXES.items() if os.path.isfile(path + suffix)]
+    encoding = choose_encoding(accept_encoding, existing) if existing else None
+    if encoding is None:
+        response = send_from_directory(directory, filename, **kwargs)
+    else:
+        mimetype = kwargs.pop('mimetype', None) or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(directory, filename + PRECOMPRESSED_SUFFIXES[encoding], mimetype=mimetype, **kwargs)
+        response.headers['Content-Encoding'] = encoding
+    if existing:
+        _add_vary(response)
+    return response
@@ -1,8 +1,12 @@
 # src/dashboard.py
+import hashlib
 import logging # Add logging import
+import re
+import time
 from .extract_data import get_current_day, get_current_shift, get_current_week_number, get_current_week # Corrected relative import
 import os
 from .task_assigner import assign_tasks # Corrected relative import
+from .compression import precompressed_paths, write_atomic, write_precompressed
 from .data_processing import calculate_work_time, sanitize_data, validate_assignments_flat_input #, calculate_available_time, normalize_string # Unused imports removed
 
 def prepare_dashboard_data(tasks, assignments, unassigned_tasks, incomplete_tasks, logger=None): # Added logger
@@ -45,6 +49,13 @@ def prepare_dashboard_data(tasks, assignments, unassigned_tasks, incomplete_task
             # If a task is neither PM nor REP, it won't appear in pm_tasks_data or rep_tasks_data.
             # This behavior is consistent with the original separation.
 
+    # Index the planner output once instead of scanning it for every task instance
+    technicians_by_instance = {}
+    for assignment in assignments or []:
+        if assignment.get('technician') is not None:
+            technicians_by_instance.setdefault(assignment['instance_id'], []).append(str(assignment['technician']))
+    incomplete_ids = set(incomplete_tasks or ())
+
     display_id_counter = 1
     original_task_id_to_display_id_map = {}
 
@@ -58,30 +69,24 @@ def prepare_dashboard_data(tasks, assignments, unassigned_tasks, incomplete_task
         color_b = (current_display_id * 37 % 200 + 55)
         color_hex = f"#{color_r:02x}{color_g:02x}{color_b:02x}"
 
-        # Logic for group_counter, unassigned_instance_details, incomplete_instances_list
-        # This uses the original task ID (task_id_original_for_instances) for matching with assignments.
+        # group_counter, unassigned_instance_details and incomplete_instances_list in one pass over
+        # the task's instances, using the original task ID to match the indexed assignments.
         task_id_original_for_instances = str(task['id'])
         quantity_val = int(task.get('quantity', 1))
 
         group_counter_calc = {}
-        if assignments: # Ensure assignments is not None
-            for i in range(quantity_val):
-                instance_id_calc = f"{task_id_original_for_instances}_{i + 1}"
-                group_assignments_calc = [a for a in assignments if a['instance_id'] == instance_id_calc]
-                if group_assignments_calc:
-                    group_names_calc = [str(a['technician']) for a in group_assignments_calc if a.get('technician') is not None]
-                    if group_names_calc:
-                        group_display_calc = " & ".join(sorted(list(set(group_names_calc))))
-                        group_counter_calc[group_display_calc] = group_counter_calc.get(group_display_calc, 0) + 1
-
         unassigned_details_calc = []
         incomplete_list_calc = []
         for i in range(quantity_val):
             instance_id_calc = f"{task_id_original_for_instances}_{i + 1}"
+            group_names_calc = technicians_by_instance.get(instance_id_calc)
+            if group_names_calc:
+                group_display_calc = " & ".join(sorted(set(group_names_calc)))
+                group_counter_calc[group_display_calc] = group_counter_calc.get(group_display_calc, 0) + 1
             # unassigned_tasks is unassigned_reasons_dict, incomplete_tasks is incomplete_ids
             if unassigned_tasks and instance_id_calc in unassigned_tasks:
                 unassigned_details_calc.append({'num': i + 1, 'reason': unassigned_tasks[instance_id_calc]})
-            if incomplete_tasks and instance_id_calc in incomplete_tasks:
+            if instance_id_calc in incomplete_ids:
                 incomplete_list_calc.append(i + 1)
 
         return {
@@ -122,7 +127,61 @@ def _log(logger, level, message, *args):
     else:
         print(f"[{level.upper()}] {message % args if args else message}")
 
-def generate_html_files(all_tasks, present_technicians, rep_assignments, env, output_folder, all_technicians_global, technician_groups_global, db_conn, logger, technician_technology_skills=None):
+# Rendered dashboards are content-addressed: the file name carries a hash of the HTML, so
+# concurrent requests never overwrite each other's dashboard and a URL's content never
+# changes (it can be cached by the browser for good).
+DASHBOARD_OUTPUT_DIR = "dashboards"
+DASHBOARD_FILENAME_PATTERN = re.compile(r"^technician_dashboard-[0-9a-f]{16}\.html$")
+
+def dashboard_filename(technician_html):
+    digest = hashlib.sha256(technician_html.encode("utf-8")).hexdigest()[:16]
+    return f"technician_dashboard-{digest}.html"
+
+def write_dashboard_html(output_folder, technician_html, logger=None, gzip_level=6, brotli_quality=5):
+    """
+    Write the dashboard under ``output_folder/dashboards`` together with its precompressed
+    siblings (see compression.write_precompressed) and return its file name.
+    """
+    output_dir = os.path.join(output_folder, DASHBOARD_OUTPUT_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+    filename = dashboard_filename(technician_html)
+    output_path = os.path.join(output_dir, filename)
+    if os.path.exists(output_path):
+        # Same content already on disk; refresh its mtime so cleanup keeps it
+        os.utime(output_path)
+        _log(logger, "info", f"Dashboard output {output_path} already exists, reused")
+        return filename
+    data = technician_html.encode("utf-8")
+    # The siblings go first: once the plain file exists, its compressed forms do too
+    write_precompressed(output_path, data, gzip_level, brotli_quality)
+    write_atomic(output_path, data)
+    _log(logger, "info", f"Written output to {output_path} via dashboard.py")
+    return filename
+
+def cleanup_dashboard_outputs(output_folder, max_age_seconds, max_files, logger=None):
+    """Delete dashboards older than ``max_age_seconds`` and all but the ``max_files`` newest; returns the number removed."""
+    output_dir = os.path.join(output_folder, DASHBOARD_OUTPUT_DIR)
+    try:
+        entries = [entry for entry in os.scandir(output_dir) if DASHBOARD_FILENAME_PATTERN.match(entry.name)]
+    except FileNotFoundError:
+        return 0
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for position, entry in enumerate(entries):
+        if position >= max_files or entry.stat().st_mtime < cutoff:
+            for path in [entry.path] + precompressed_paths(entry.path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            removed += 1
+    if removed:
+        _log(logger, "info", f"Removed {removed} old dashboard output(s) from {output_dir}")
+    return removed
+
+def render_dashboard(all_tasks, present_technicians, rep_assignments, env, all_technicians_global, technician_groups_global, db_conn, logger, technician_technology_skills=None, planner_profile=None, decision_trace=None, strategy='greedy', planner_budget=None, tasks_typed=False):
+    """Plan the tasks and render the technician dashboard: (available_time_summary, under_resourced_pm_tasks, html)."""
     if logger is None:
         # Basic fallback logger if none is provided
         logger = logging.getLogger(__name__)
@@ -132,7 +191,7 @@ def generate_html_files(all_tasks, present_technicians, rep_assignments, env, ou
     logger.info(f"Starting HTML file generation. Received {len(all_tasks)} tasks, {len(present_technicians)} present technicians.")
     if technician_technology_skills is None:
         technician_technology_skills = {} # Ensure it's a dict if not provided
-        logger.warning("Technician technology skills not provided to generate_html_files. Skill-based assignment may be limited.")
+        logger.warning("Technician technology skills not provided to render_dashboard. Skill-based assignment may be limited.")
 
 
     current_day = get_current_day()
@@ -143,7 +202,8 @@ def generate_html_files(all_tasks, present_technicians, rep_assignments, env, ou
     # Sanitize data (e.g., ensure numeric types, default missing fields if any still exist)
     # sanitize_data itself also ensures 'name' from 'scheduler_group_task' if needed,
     # but app.py should have already done this robustly.
-    tasks_for_processing = sanitize_data(all_tasks, logger) # Pass logger to sanitize_data
+    # tasks_typed: the caller passes build_typed_tasks() output (e.g. the session's cached tasks)
+    tasks_for_processing = all_tasks if tasks_typed else sanitize_data(all_tasks, logger) # Pass logger to sanitize_data
 
     _log(logger, "debug", f"Tasks for assigner in dashboard.py (after sanitize): {len(tasks_for_processing)}")
     # For detailed debugging of tasks entering assign_tasks:
@@ -159,7 +219,11 @@ def generate_html_files(all_tasks, present_technicians, rep_assignments, env, ou
         db_conn,
         rep_assignments, # Pass the filtered and structured REP assignments
         logger,
-        technician_technology_skills=technician_technology_skills # Pass skills
+        technician_technology_skills=technician_technology_skills, # Pass skills
+        profile=planner_profile,
+        trace=decision_trace,
+        strategy=strategy,
+        budget=planner_budget
     )
     logger.info(f"Task assignment phase completed. {len(assigned_tasks_details)} task segments assigned.")
     if unassigned_tasks_reasons:
@@ -200,9 +264,4 @@ def generate_html_files(all_tasks, present_technicians, rep_assignments, env, ou
         under_resourced_pm_tasks=under_resourced_pm_tasks
     )
 
-    output_path = os.path.join(output_folder, "technician_dashboard.html")
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(technician_html)
-    _log(logger, "info", f"Written output to {output_path} via dashboard.py")
-
-    return available_time_summary, under_resourced_pm_tasks
+    return available_time_summary, under_resourced_pm_tasks, technician_html
@@ -1,22 +1,38 @@
 # src/data_processing.py
-import re
+from functools import lru_cache
 import pandas as pd
 import logging
 
 # Get a logger for this module
 logger = logging.getLogger(__name__)
 
+# Umlauts are folded in one translate() pass. (Mojibake such as 'Ã¼' can never match:
+# the string is lowercased first.)
+_UMLAUT_TABLE = str.maketrans({'ü': 'u', 'ö': 'o', 'ä': 'a', 'ß': 'ss'})
+# German -> English word replacements, applied in order after folding. Words that still
+# contain umlauts ('jährlich', 'prüfung', ...) were unreachable after folding and are omitted.
+_WORD_REPLACEMENTS = (
+    ('monatlich', 'monthly'),
+    ('inspektion', 'inspection'),
+    ('der druckanlage', ''),
+    ('alle', 'all'),
+    ('jahre', 'years'),
+)
+
+@lru_cache(maxsize=4096)
+def _normalize_cached(s):
+    s = ' '.join(s.lower().split())
+    s = s.translate(_UMLAUT_TABLE)
+    for word, replacement in _WORD_REPLACEMENTS:
+        if word in s:
+            s = s.replace(word, replacement)
+    return s
+
 def normalize_string(s):
+    """Lowercase, collapse whitespace, fold umlauts and translate common German task words (memoized)."""
     if not s or not isinstance(s, str):
         return ""
-    s = s.lower().strip()
-    s = re.sub(r'\s+', ' ', s)
-    s = s.replace('Ã¼', 'u').replace('Ã¶', 'o').replace('Ã¤', 'a').replace('ÃŸ', 'ss')
-    s = s.replace('ü', 'u').replace('ö', 'o').replace('ä', 'a').replace('ß', 'ss')
-    s = s.replace('jährlich', 'yearly').replace('viertaljährlich', 'quarterly').replace('monatlich', 'monthly')
-    s = s.replace('wöchentlich', 'weekly').replace('prüfung', 'check').replace('inspektion', 'inspection')
-    s = s.replace('der druckanlage', '').replace('alle', 'all').replace('jahre', 'years')
-    return s
+    return _normalize_cached(s)
 
 def calculate_work_time(day):
     return {"Monday": 434, "Friday": 434, "Sunday": 434, "Saturday": 651}.get(day, 434)
@@ -85,6 +101,28 @@ def sanitize_data(data, logger=None): # Added logger parameter
     _log_sanitize('info', f"Sanitized {len(sanitized_data)} rows from {len(data)} input rows via data_processing.")
     return sanitized_data
 
+def parse_task_lines(lines):
+    """Line numbers of a task's comma-separated 'lines' cell; [] when blank, 'nan' or not numeric."""
+    lines_str = str(lines)
+    if not lines_str.strip() or lines_str.lower() == 'nan':
+        return []
+    try:
+        return [int(line.strip()) for line in lines_str.split(',') if line.strip().isdigit()]
+    except ValueError:
+        return []
+
+def build_typed_tasks(rows, logger=None):
+    """
+    sanitize_data() plus the parsed line numbers of each task ('line_numbers').
+
+    /upload stores the result with the session, so later requests on the session
+    reuse the typed values instead of sanitizing the raw Excel strings again.
+    """
+    typed_tasks = sanitize_data(rows, logger)
+    for task in typed_tasks:
+        task['line_numbers'] = parse_task_lines(task['lines'])
+    return typed_tasks
+
 def validate_assignments_flat_input(assignments_list):
     valid_assignments = []
     if not isinstance(assignments_list, list):
@@ -106,6 +106,15 @@ def populate_dummy_data(conn, logger):
     conn.commit()
     logger.info("Dummy data population complete.")
 
+# data_versions rows and the tables whose writes bump them
+SKILLS_DATA_VERSION = 'skills'
+PLANNING_CONFIG_DATA_VERSION = 'planning_config'
+DATA_VERSION_TABLES = {
+    SKILLS_DATA_VERSION: ('technician_technology_skills', 'technicians'),
+    PLANNING_CONFIG_DATA_VERSION: ('technician_groups', 'technician_group_members', 'satellite_points', 'lines',
+                                   'technologies', 'task_required_skills'),
+}
+
 def init_db(db_path, logger=None, debug_use_test_db=False):
     db_exists = os.path.exists(db_path)
     
@@ -329,6 +338,30 @@ def init_db(db_path, logger=None, debug_use_test_db=False):
         ON task_required_skills (technology_id)
     ''')
 
+    # 4. Data versions: triggers bump a counter on every write to the tables behind it, so
+    # in-memory snapshots and caches (see skill_snapshot, plan_cache) notice writes from any
+    # connection or process
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    # Random start: a recreated database file does not repeat the versions of the one it replaced
+    for version_name, tables in DATA_VERSION_TABLES.items():
+        cursor.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES (?, abs(random() % 1000000000000))",
+                       (version_name,))
+        for table in tables:
+            for event in ('INSERT', 'UPDATE', 'DELETE'):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_{version_name}_version
+                    AFTER {event} ON {table}
+                    BEGIN
+                        UPDATE data_versions SET version = version + 1 WHERE name = '{version_name}';
+                    END
+                ''')
+    logger.info("Data version triggers ensured.") if logger else None
+
     conn.commit()
 
     # Populate with dummy data if the DB was just created and we are in debug mode
@@ -501,6 +534,10 @@ class TechnologyManager:
         return [{"id": row['id'], "name": row['name']} for row in self.cursor.fetchall()]
 
 
+# Parameters per IN (...) list; stays below SQLite's default host-parameter limit
+SQL_IN_CHUNK = 500
+
+
 class TaskManager:
     """Manages tasks and their required skills in the database."""
     def __init__(self, conn):
@@ -518,6 +555,48 @@ class TaskManager:
             self.conn.commit()
             return self.cursor.lastrowid
 
+    def get_ids_by_name(self, task_names):
+        """Maps each existing name in ``task_names`` to its task ID (one query per SQL_IN_CHUNK names)."""
+        ids = {}
+        names = list(task_names)
+        for start in range(0, len(names), SQL_IN_CHUNK):
+            chunk = names[start:start + SQL_IN_CHUNK]
+            self.cursor.execute(f"SELECT id, name FROM tasks WHERE name IN ({','.join('?' * len(chunk))})", chunk)
+            ids.update((row[1], row[0]) for row in self.cursor.fetchall())
+        return ids
+
+    def get_or_create_many(self, task_names):
+        """
+        get_or_create() for many names at once: {name: task_id}.
+
+        Missing tasks are inserted with one executemany in the order given. Does not
+        commit, so the caller can keep the lookup and its skill queries in one transaction.
+        """
+        names = list(dict.fromkeys(task_names))
+        ids = self.get_ids_by_name(names)
+        missing = [name for name in names if name not in ids]
+        if missing:
+            self.cursor.executemany("INSERT OR IGNORE INTO tasks (name) VALUES (?)", [(name,) for name in missing])
+            ids.update(self.get_ids_by_name(missing))
+        return ids
+
+    def get_required_technology_ids(self, task_ids):
+        """{task_id: [technology_id, ...]} for many tasks, ordered by technology name as in get_required_skills()."""
+        technology_ids = {task_id: [] for task_id in task_ids}
+        ids = list(technology_ids)
+        for start in range(0, len(ids), SQL_IN_CHUNK):
+            chunk = ids[start:start + SQL_IN_CHUNK]
+            self.cursor.execute(f"""
+                SELECT trs.task_id, trs.technology_id
+                FROM task_required_skills trs
+                JOIN technologies t ON trs.technology_id = t.id
+                WHERE trs.task_id IN ({','.join('?' * len(chunk))})
+                ORDER BY trs.task_id, t.name
+            """, chunk)
+            for row in self.cursor.fetchall():
+                technology_ids[row[0]].append(row[1])
+        return technology_ids
+
     def add_required_skill(self, task_id, technology_id):
         """Adds a required technology/skill to a task."""
         try:
@@ -576,6 +655,14 @@ def get_all_technician_skills_by_name(conn):
         skills_map[tech_name][technology_id] = skill_level
     return skills_map
 
+def get_data_version(conn, name):
+    """Current counter of a data_versions row, or None if the database predates the table."""
+    try:
+        row = conn.execute("SELECT version FROM data_versions WHERE name = ?", (name,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
 # You might also need functions to add/update technician skills, for example:
 def update_technician_skill(conn, technician_id, technology_id, skill_level):
     cursor = conn.cursor()
@@ -0,0 +1,523 @@
+"""
+Exact optimization back end for the task planner.
+
+Every task instance is expanded into options (candidate group x start slot). The model
+picks at most one option per instance so that no technician works two options at the
+same time, maximizing a priority-weighted value. PuLP/CBC is used when it is installed;
+otherwise a pure-Python branch and bound searches the same model. Both are capped by a
+time limit and report the optimality gap of the plan they return.
+
+The candidate groups follow the same eligibility rules as the heuristic planner
+(skills, lines, group size range, Prio 'A' helpers, REP selections from the UI), so the
+result can be dropped into the schedule structures assign_tasks already produces.
+"""
+import math
+import time
+from collections import defaultdict
+from itertools import combinations
+
+from .config_manager import TECHNICIAN_LINES
+from . import planner_trace
+from .task_assigner import _log, MAX_TECHS_FOR_COMBINATIONS, GROUP_SIZE_SEARCH_RANGE
+
+try:
+    import pulp
+except ImportError:  # Optional dependency; the built-in branch and bound is used instead
+    pulp = None
+
+# Start times are probed on the same grid as the heuristic planner
+SLOT_MINUTES = 15
+# A task cut by the shift end is still planned if at least this share of it fits
+MIN_PARTIAL_FRACTION = 0.75
+# Value of planning one instance, per priority_val (A=1, B=2, C=3, other=4)
+PRIORITY_WEIGHTS = {1: 1000, 2: 100, 3: 10, 4: 1}
+# Model size limits; larger plans are left to the heuristic planner
+MAX_GROUPS_PER_INSTANCE = 10
+MAX_INSTANCES = 300
+MAX_OPTIONS = 50000
+
+
+class _Instance:
+    """One task instance with its feasible (group, start) options, best option first."""
+
+    def __init__(self, task, instance_num, position):
+        self.task = task
+        self.instance_num = instance_num
+        self.position = position
+        self.instance_id = f"{task['id']}_{instance_num}"
+        self.display_name = f"{task.get('name', 'Unknown')} (Instance {instance_num}/{int(task.get('quantity', 1))})"
+        self.options = []
+        self.candidate_groups = 0
+
+    @property
+    def best_value(self):
+        return self.options[0]['value'] if self.options else 0
+
+
+class ExactSolution:
+    """Plan found by solve_exact, in the structures used by assign_tasks."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.status = 'not_solved'
+        self.objective = 0.0
+        self.bound = 0.0
+        self.nodes = 0
+        self.seconds = 0.0
+        self.assignments = []
+        self.schedules = {}
+        self.unassigned = {}
+        self.incomplete = []
+        self.under_resourced = []
+        self.helper_assignments = []
+
+    @property
+    def gap(self):
+        """Relative distance between the plan and the best proven bound (0.0 = optimal)."""
+        if self.bound <= 0:
+            return 0.0
+        return max(0.0, (self.bound - self.objective) / self.bound)
+
+    def stats(self):
+        return {
+            'backend': self.backend,
+            'status': self.status,
+            'objective': round(self.objective, 6),
+            'bound': round(self.bound, 6),
+            'gap': round(self.gap, 6),
+            'nodes': self.nodes,
+            'seconds': round(self.seconds, 6)
+        }
+
+
+def _parse_lines(task, logger):
+    # Typed session tasks carry their parsed lines (see build_typed_tasks)
+    if task.get('line_numbers') is not None:
+        return task['line_numbers']
+    task_lines_str = str(task.get('lines', ''))
+    if task_lines_str and task_lines_str.lower() != 'nan' and task_lines_str.strip() != '':
+        try:
+            return [int(line.strip()) for line in task_lines_str.split(',') if line.strip().isdigit()]
+        except ValueError:
+            _log(logger, "warning", f"  Warning ({task['task_type_upper']}): Invalid line format '{task_lines_str}' for task {task.get('name')}")
+    return []
+
+
+def _pm_candidate_groups(task, task_lines_list, present_technicians, technician_technology_skills, under_resourced,
+                         max_techs_for_combinations, group_size_search_range):
+    """Return (groups, failure_reason) for a standard PM task; groups are dicts sorted best first."""
+    task_technology_ids = task.get('technology_ids', [])
+    num_technicians_needed = int(task.get('mitarbeiter_pro_aufgabe', 1))
+    if not task_technology_ids:
+        return [], f"Skipped (PM): Task {task.get('name')} (ID: {task['id']}) has no required technology_ids defined."
+
+    eligible = []
+    for tech in present_technicians:
+        tech_skills_map = technician_technology_skills.get(tech, {})
+        relevant = {sid: tech_skills_map[sid] for sid in task_technology_ids if tech_skills_map.get(sid, 0) > 0}
+        if not relevant:
+            continue
+        if task_lines_list and not any(line in TECHNICIAN_LINES.get(tech, []) for line in task_lines_list):
+            continue
+        eligible.append((tech, relevant))
+
+    if not eligible:
+        return [], "No technicians eligible for this PM task (possess at least one skill > 0, meet line/task mapping)."
+
+    if len(eligible) < num_technicians_needed and not any(t['task_id'] == task['id'] for t in under_resourced):
+        under_resourced.append({
+            'task_id': task['id'],
+            'task_name': task.get('name'),
+            'needed': num_technicians_needed,
+            'available': len(eligible),
+            'eligible_technicians': [name for name, _ in eligible]
+        })
+
+    eligible.sort(key=lambda e: sum(e[1].values()), reverse=True)
+    eligible = eligible[:max_techs_for_combinations]
+    skills_by_tech = dict(eligible)
+    eligible_names = [name for name, _ in eligible]
+    required = set(task_technology_ids)
+
+    def describe(group, skilled, size_diff, is_helper_group):
+        per_skill = []
+        points = []
+        for sid in sorted(task_technology_ids):
+            levels = [skills_by_tech[name][sid] for name in skilled if sid in skills_by_tech[name]]
+            per_skill.append(sum(levels) / len(levels) if levels else 0)
+            points.extend(levels)
+        return {
+            'group': list(group),
+            'size_diff': size_diff,
+            'per_skill_avg': tuple(per_skill),
+            'combined_avg_skill': sum(points) / len(points) if points else 0,
+            'is_helper_group': is_helper_group
+        }
+
+    groups = []
+    min_size = max(1, num_technicians_needed - group_size_search_range)
+    max_size = min(len(eligible_names), num_technicians_needed + group_size_search_range)
+    for size in range(min_size, max_size + 1):
+        for group in combinations(eligible_names, size):
+            covered = set()
+            for name in group:
+                covered.update(skills_by_tech[name])
+            if required.issubset(covered):
+                groups.append(describe(group, group, abs(size - num_technicians_needed), False))
+
+    if str(task.get('priority', 'C')).upper() == 'A' and 0 < len(eligible_names) < num_technicians_needed:
+        skilled_set = set(eligible_names)
+        helper_names = [
+            tech for tech in present_technicians
+            if tech not in skilled_set and (not task_lines_list or any(line in TECHNICIAN_LINES.get(tech, []) for line in task_lines_list))
+        ]
+        for num_skilled in range(len(eligible_names), 0, -1):
+            num_helpers_needed = num_technicians_needed - num_skilled
+            if num_helpers_needed <= 0 or len(helper_names) < num_helpers_needed:
+                continue
+            found_helper_group = False
+            for skilled in combinations(eligible_names, num_skilled):
+                covered = set()
+                for name in skilled:
+                    covered.update(skills_by_tech[name])
+                if not required.issubset(covered):
+                    continue
+                for helpers in combinations(helper_names, num_helpers_needed):
+                    groups.append(describe(skilled + helpers, skilled, 0, True))
+                    found_helper_group = True
+            if found_helper_group:
+                break
+
+    if not groups:
+        return [], f"No viable technician groups found that collectively cover all required skills: {task_technology_ids}. Eligible techs: {len(eligible_names)} (Target size: {num_technicians_needed})."
+
+    groups.sort(key=lambda g: (
+        g['size_diff'],
+        tuple(-level for level in g['per_skill_avg']),
+        -g['combined_avg_skill'],
+        ''.join(sorted(g['group']))
+    ))
+    return groups[:MAX_GROUPS_PER_INSTANCE], None
+
+
+def _rep_candidate_groups(task, task_lines_list, present_technicians, rep_assignments_map):
+    """Return (groups, failure_reason, selection) for a REP task from the technicians chosen in the UI."""
+    num_technicians_needed = int(task.get('mitarbeiter_pro_aufgabe', 1))
+    assignment_info = rep_assignments_map.get(task['id'])
+    if not assignment_info:
+        return [], "Skipped (REP): Task data not received from UI.", None
+    if assignment_info.get('skipped'):
+        return [], assignment_info.get('skip_reason', "Skipped by user."), None
+
+    selected = assignment_info.get('technicians', [])
+    eligible = [
+        tech['name'] for tech in selected
+        if tech['name'] in present_technicians and
+           (not task_lines_list or any(line in TECHNICIAN_LINES.get(tech['name'], []) for line in task_lines_list))
+    ]
+    selection = (len(selected), len(eligible))
+    if not eligible and num_technicians_needed > 0:
+        return [], "Skipped (REP): None of the user-selected technicians are eligible.", selection
+
+    forced = [tech['name'] for tech in selected if tech.get('force_assign') and tech['name'] in eligible]
+    others = [name for name in eligible if name not in forced]
+    groups = []
+    for size in range(len(others) + 1):
+        for other_group in combinations(others, size):
+            group = forced + list(other_group)
+            if group:
+                groups.append({'group': group, 'size_diff': abs(len(group) - num_technicians_needed), 'combined_avg_skill': 0})
+    if not groups and num_technicians_needed > 0:
+        return [], "Skipped (REP): No viable groups could be formed from eligible UI-selected techs.", selection
+
+    groups.sort(key=lambda g: (g['size_diff'], ''.join(sorted(g['group']))))
+    return groups[:MAX_GROUPS_PER_INSTANCE], None, selection
+
+
+def _expand_options(task, groups, total_work_minutes):
+    """Turn candidate groups into (group, start, duration) options with their objective value."""
+    base_duration = int(task.get('planned_worktime_min', 0))
+    num_technicians_needed = int(task.get('mitarbeiter_pro_aufgabe', 1))
+    weight = PRIORITY_WEIGHTS.get(task['priority_val'], 1)
+    options = []
+    for group_rank, candidate in enumerate(groups):
+        group = candidate['group']
+        effective_duration = base_duration
+        if base_duration > 0 and num_technicians_needed > 0 and group:
+            effective_duration = (base_duration * num_technicians_needed) / len(group)
+        starts = [0] if effective_duration == 0 else range(0, total_work_minutes, SLOT_MINUTES)
+        for start in starts:
+            duration = effective_duration
+            incomplete = False
+            if effective_duration > 0 and start + effective_duration > total_work_minutes:
+                remaining = max(0, total_work_minutes - start)
+                if remaining <= 0 or remaining < effective_duration * MIN_PARTIAL_FRACTION:
+                    continue
+                duration = remaining
+                incomplete = True
+            value = weight * (0.5 if incomplete else 1.0)
+            value -= 0.01 * candidate['size_diff'] + 1e-4 * group_rank
+            value += 0.001 * candidate['combined_avg_skill']
+            value -= 1e-6 * start
+            options.append({
+                'value': value, 'group': tuple(group), 'start': start, 'duration': duration,
+                'incomplete': incomplete, 'candidate': candidate
+            })
+    options.sort(key=lambda o: -o['value'])
+    return options
+
+
+def _overlaps(busy, start, end):
+    return any(s < end and start < e for s, e in busy)
+
+
+def _solve_branch_and_bound(instances, time_limit):
+    """Depth-first branch and bound; returns (chosen option per instance, objective, bound, nodes, proven)."""
+    n = len(instances)
+    suffix_bound = [0.0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        suffix_bound[i] = suffix_bound[i + 1] + instances[i].best_value
+
+    busy = defaultdict(list)
+    chosen = [None] * n
+    chosen_index = [-1] * n
+    best = {'value': -1.0, 'choice': [None] * n}
+    deadline = time.perf_counter() + time_limit
+    state = {'nodes': 0, 'timed_out': False}
+
+    def search(i, value):
+        state['nodes'] += 1
+        if state['nodes'] % 256 == 0 and time.perf_counter() > deadline:
+            state['timed_out'] = True
+        if state['timed_out'] or value + suffix_bound[i] <= best['value'] + 1e-9:
+            return
+        if i == n:
+            best['value'] = value
+            best['choice'] = list(chosen)
+            return
+        instance = instances[i]
+        # Instances of the same task definition are interchangeable: keep their choices ordered
+        sibling = i > 0 and instances[i - 1].task is instance.task
+        if not (sibling and chosen_index[i - 1] == -1):
+            first_index = chosen_index[i - 1] if sibling else 0
+            for index in range(first_index, len(instance.options)):
+                option = instance.options[index]
+                end = option['start'] + option['duration']
+                if option['duration'] > 0 and any(_overlaps(busy[tech], option['start'], end) for tech in option['group']):
+                    continue
+                for tech in option['group']:
+                    busy[tech].append((option['start'], end))
+                chosen[i] = option
+                chosen_index[i] = index
+                search(i + 1, value + option['value'])
+                for tech in option['group']:
+                    busy[tech].pop()
+                if state['timed_out']:
+                    break
+        chosen[i] = None
+        chosen_index[i] = -1
+        if not state['timed_out']:
+            search(i + 1, value)
+
+    search(0, 0.0)
+    proven = not state['timed_out']
+    objective = max(best['value'], 0.0)
+    bound = objective if proven else _capacity_bound(instances)
+    return best['choice'], objective, bound, state['nodes'], proven
+
+
+def _capacity_bound(instances):
+    """
+    Upper bound on the objective when the search did not finish: the smaller of the sum of
+    the best option values and a fractional knapsack over the technician-minutes available.
+    """
+    optimistic = sum(instance.best_value for instance in instances)
+    technicians = set()
+    horizon = 0
+    items = []
+    for instance in instances:
+        cheapest = min(max(option['duration'], 1) * len(option['group'] or (None,)) for option in instance.options)
+        items.append((instance.best_value / cheapest, cheapest, instance.best_value))
+        for option in instance.options:
+            technicians.update(option['group'])
+            horizon = max(horizon, option['start'] + option['duration'])
+    capacity = len(technicians) * horizon
+    bound = 0.0
+    for density, minutes, value in sorted(items, reverse=True):
+        if capacity <= 0:
+            break
+        taken = min(1.0, capacity / minutes)
+        bound += value * taken
+        capacity -= minutes * taken
+    return min(optimistic, bound)
+
+
+def _solve_with_pulp(instances, time_limit):
+    """Solve the model as a MILP with CBC; returns the same tuple as _solve_branch_and_bound."""
+    problem = pulp.LpProblem('weekend_plan', pulp.LpMaximize)
+    variables = {}
+    coverage = defaultdict(list)
+    for i, instance in enumerate(instances):
+        for j, option in enumerate(instance.options):
+            var = pulp.LpVariable(f"x_{i}_{j}", cat='Binary')
+            variables[i, j] = var
+            # Starts lie on the slot grid, so two options overlap exactly when one covers the other's start
+            first_point = option['start']
+            last_point = math.ceil(option['start'] + option['duration'])
+            for point in range(first_point, last_point, SLOT_MINUTES):
+                for tech in option['group']:
+                    coverage[tech, point].append(var)
+        if instance.options:
+            problem += pulp.lpSum(variables[i, j] for j in range(len(instance.options))) <= 1
+    problem += pulp.lpSum(instances[i].options[j]['value'] * var for (i, j), var in variables.items())
+    for covering in coverage.values():
+        if len(covering) > 1:
+            problem += pulp.lpSum(covering) <= 1
+
+    problem.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit))
+    choice = [None] * len(instances)
+    for (i, j), var in variables.items():
+        if var.value() is not None and var.value() > 0.5:
+            choice[i] = instances[i].options[j]
+    objective = sum(option['value'] for option in choice if option)
+    proven = pulp.LpStatus[problem.status] == 'Optimal' and getattr(problem, 'sol_status', 1) == 1
+    bound = objective if proven else _capacity_bound(instances)
+    return choice, objective, bound, 0, proven
+
+
+def solve_exact(tasks, present_technicians, total_work_minutes, rep_assignments, technician_technology_skills,
+                logger=None, time_limit=10.0, trace=None, profile=None,
+                max_techs_for_combinations=MAX_TECHS_FOR_COMBINATIONS, group_size_search_range=GROUP_SIZE_SEARCH_RANGE):
+    """
+    Plan all task instances with the exact model.
+
+    ``tasks`` are the preprocessed task definitions built by assign_tasks. Returns an
+    ExactSolution, or None when the model exceeds the size limits (the caller then falls
+    back to the heuristic planner).
+    """
+    started_at = time.perf_counter()
+    tracing = trace is not None and trace.enabled
+    solution = ExactSolution('pulp' if pulp is not None else 'branch_and_bound')
+    rep_assignments_map = {item['task_id']: item for item in rep_assignments} if rep_assignments else {}
+    instances = []
+
+    for position, task in enumerate(tasks):
+        task_started_at = time.perf_counter()
+        task_type = task['task_type_upper']
+        quantity = int(task.get('quantity', 1))
+        num_technicians_needed = int(task.get('mitarbeiter_pro_aufgabe', 1))
+        base_duration = int(task.get('planned_worktime_min', 0))
+        if quantity <= 0:
+            continue
+        if num_technicians_needed <= 0:
+            if num_technicians_needed < 0:
+                reason = f"Skipped ({task_type}): Invalid 'Mitarbeiter pro Aufgabe' ({num_technicians_needed}) - value must be positive."
+            elif base_duration == 0:
+                reason = f"Skipped ({task_type}): Task requires 0 technicians and has 0 duration. Cannot be scheduled."
+            else:
+                reason = f"Skipped ({task_type}): Invalid 'Mitarbeiter pro Aufgabe' (0) for non-zero duration task."
+            for instance_num in range(1, quantity + 1):
+                solution.unassigned[f"{task['id']}_{instance_num}"] = reason
+            continue
+
+        task_lines_list = _parse_lines(task, logger)
+        groups, reason, selection, trace_code = [], None, None, None
+        if task_type == 'PM' and not task.get('isAdditionalTask', False):
+            groups, reason = _pm_candidate_groups(
+                task, task_lines_list, present_technicians, technician_technology_skills, solution.under_resourced,
+                max_techs_for_combinations, group_size_search_range
+            )
+            trace_code = planner_trace.NO_VIABLE_GROUP
+        elif task_type == 'REP':
+            groups, reason, selection = _rep_candidate_groups(task, task_lines_list, present_technicians, rep_assignments_map)
+            trace_code = planner_trace.NO_VIABLE_GROUP
+            if task['id'] not in rep_assignments_map:
+                trace_code = planner_trace.REP_NOT_RECEIVED
+            elif selection is None:
+                trace_code = planner_trace.REP_SKIPPED
+
+        options = _expand_options(task, groups, total_work_minutes) if groups else []
+        for instance_num in range(1, quantity + 1):
+            instance = _Instance(task, instance_num, position)
+            instance.candidate_groups = len(groups)
+            instance.selection = selection
+            if not options:
+                solution.unassigned[instance.instance_id] = reason or f"Could not find a suitable time slot or group for {instance.display_name}."
+                if tracing: trace.record(instance.instance_id, task_type, trace_code or planner_trace.NO_SLOT, len(groups))
+                continue
+            instance.options = options
+            instances.append(instance)
+        if profile is not None:
+            profile.record_task(task, time.perf_counter() - task_started_at, len(groups), 0, len(options))
+
+    option_count = sum(len(instance.options) for instance in instances)
+    if len(instances) > MAX_INSTANCES or option_count > MAX_OPTIONS:
+        _log(logger, "info", f"Exact planner skipped: {len(instances)} instances / {option_count} options exceed the model limits.")
+        return None
+
+    instances.sort(key=lambda inst: (-inst.best_value, inst.position, inst.instance_num))
+    remaining_time = max(0.1, time_limit - (time.perf_counter() - started_at))
+    if pulp is not None:
+        choice, solution.objective, solution.bound, solution.nodes, proven = _solve_with_pulp(instances, remaining_time)
+    else:
+        choice, solution.objective, solution.bound, solution.nodes, proven = _solve_branch_and_bound(instances, remaining_time)
+    solution.status = 'optimal' if proven else 'time_limit'
+
+    solution.schedules = {tech: [] for tech in present_technicians}
+    for instance, option in sorted(zip(instances, choice), key=lambda pair: (pair[0].position, pair[0].instance_num)):
+        task = instance.task
+        task_type = task['task_type_upper']
+        num_technicians_needed = int(task.get('mitarbeiter_pro_aufgabe', 1))
+        base_duration = int(task.get('planned_worktime_min', 0))
+        if option is None:
+            if task_type == 'PM':
+                reason = f"No suitable group/slot for PM task {instance.display_name}. Required skills: {task.get('technology_ids', [])}"
+            else:
+                reason = "No group/slot for REP task from UI selection."
+            solution.unassigned[instance.instance_id] = reason
+            if tracing: trace.record(instance.instance_id, task_type, planner_trace.NO_SLOT, instance.candidate_groups)
+            continue
+
+        group = list(option['group'])
+        if option['incomplete']:
+            solution.incomplete.append(instance.instance_id)
+        if task_type == 'PM':
+            technician_task_info = 'Skill_Based'
+            if len(group) != num_technicians_needed:
+                mismatch_note = f"Task planned for {num_technicians_needed} techs; assigned to {len(group)}."
+            else:
+                mismatch_note = f"Assigned {len(group)} as planned."
+            if option['candidate'].get('is_helper_group'):
+                solution.helper_assignments.append((task, group))
+        else:
+            technician_task_info = 'N/A_REP'
+            raw_count, eligible_count = instance.selection
+            mismatch_note = None
+            if len(group) != num_technicians_needed:
+                mismatch_note = f"Task requires {num_technicians_needed}. Assigned to {len(group)} from UI pool of {raw_count} ({eligible_count} eligible)."
+            elif raw_count != num_technicians_needed:
+                mismatch_note = f"Task requires {num_technicians_needed}. User selected {raw_count} ({eligible_count} eligible). Assigned to optimal {len(group)}."
+
+        for tech in group:
+            solution.schedules[tech].append((option['start'], option['start'] + option['duration'], instance.display_name))
+            solution.assignments.append({
+                'technician': tech, 'task_name': instance.display_name,
+                'start': option['start'], 'duration': option['duration'],
+                'is_incomplete': option['incomplete'],
+                'original_duration': base_duration,
+                'instance_id': instance.instance_id,
+                'technician_task_info': technician_task_info,
+                'resource_mismatch_info': mismatch_note
+            })
+        if tracing:
+            trace.record(
+                instance.instance_id, task_type,
+                planner_trace.SCHEDULED_INCOMPLETE if option['incomplete'] else planner_trace.SCHEDULED,
+                instance.candidate_groups, group, option['start'], option['duration']
+            )
+
+    for schedule in solution.schedules.values():
+        schedule.sort()
+    solution.seconds = time.perf_counter() - started_at
+    _log(logger, "info", f"Exact planner ({solution.backend}) finished: status {solution.status}, objective {solution.objective:.3f}, gap {solution.gap:.2%}, {solution.seconds:.3f}s.")
+    return solution
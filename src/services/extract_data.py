@@ -1,6 +1,15 @@
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import re
+import shutil
+from tempfile import TemporaryFile
+try:
+    import openpyxl
+except ImportError:  # Only needed for .xlsx uploads
+    openpyxl = None
+from pyxlsb import open_workbook as open_xlsb_workbook
+from pyxlsb.worksheet import Worksheet as XlsbWorksheet
 try:
     from src.config import Config
 except ImportError:  # Fallback if direct import path differs
@@ -46,44 +55,27 @@ def get_current_shift():
     else:  # 6 PM to 6 AM
         return "late"
 
+def get_extraction_context():
+    """(sheet_name, day, shift, week number) that an extraction right now would use."""
+    return get_current_week()[0], get_current_day(), get_current_shift(), get_current_week_number()
+
 # Helper function to fill merged cells
 def fill_merged_cells(row):
-    filled_row = row.copy()
-    last_value = ""
-    for i in range(len(filled_row)):
-        if pd.isna(filled_row.iloc[i]) or str(filled_row.iloc[i]).strip() == "":
-            filled_row.iloc[i] = last_value
-        else:
-            last_value = str(filled_row.iloc[i]).strip()
-    return filled_row
+    """Fill blank header cells (merged ranges) with the last non-blank value, stripped."""
+    text = row.map(lambda value: "" if pd.isna(value) else str(value).strip())
+    blank = text == ""
+    return row.mask(blank, text.mask(blank).ffill().fillna(""))
 
 # Step 3: Find the correct column and apply filter
-def find_and_filter_data(df, current_day, current_shift):
-    # Determine Day/Shift headers for quantity column (assumed to be in row 0 and 1)
-    day_headers_row = fill_merged_cells(df.iloc[0])  # Fill merged cells in row 1 (0-indexed)
-    shift_headers_row = fill_merged_cells(df.iloc[1])  # Row 2 (index 1) contains the shift
-
-    target_day = current_day
-    current_week = get_current_week_number()
-    target_header = f"{target_day} CW-{current_week}"
-    matching_columns_for_day = []
-
-    for idx, col_header_val in enumerate(day_headers_row):
-        if str(col_header_val).strip() == target_header:
-            matching_columns_for_day.append(idx)
-
-    if not matching_columns_for_day:
-        raise ValueError(f"No columns found for day header '{target_header}'. Check Excel row 1 (index 0).")
+def _no_rows_error(target_header, current_shift):
+    return ValueError(f"No data rows found with quantity >= 1 in column for '{target_header}' (shift '{current_shift}') at or after Excel row 10 (index 9).")
 
-    target_col = None
-    for col_idx in matching_columns_for_day:
-        shift_value = str(shift_headers_row.iloc[col_idx]).lower().strip()
-        if shift_value == current_shift:
-            target_col = col_idx
-            break
 
-    if target_col is None:
-        raise ValueError(f"Column for {target_day} with shift '{current_shift}' not found under day header '{target_header}'. Check Excel row 2 (index 1).")
+def find_and_filter_data(df, current_day, current_shift):
+    # Determine Day/Shift headers for quantity column (assumed to be in row 0 and 1)
+    # Row 1 (index 0) holds the day, row 2 (index 1) the shift
+    headers = HeaderMap(fill_merged_cells(df.iloc[0]).tolist(), fill_merged_cells(df.iloc[1]).tolist())
+    target_header, target_col = headers.quantity_column(current_day, current_shift, get_current_week_number())
 
     # Convert target column to numeric for filtering quantity
     df.iloc[:, target_col] = pd.to_numeric(df.iloc[:, target_col], errors='coerce')
@@ -96,203 +88,681 @@ def find_and_filter_data(df, current_day, current_shift):
     filtered_df = filtered_df[filtered_df.index >= 9]
 
     if filtered_df.empty:
-        raise ValueError(f"No data rows found with quantity >= 1 in column for '{target_header}' (shift '{current_shift}') at or after Excel row 10 (index 9).")
+        raise _no_rows_error(target_header, current_shift)
 
     return filtered_df, target_col
 
 
-# Step 4: Extract data
-def extract_data(excel_file_object):  # MODIFIED: Changed argument name
-    try:
-        error_messages = []  # Initialize list for error messages
-        sheet_name = get_current_week()[0]  # e.g., "Summary KW17"
-        current_day = get_current_day()  # e.g., "Monday"
-        current_shift = get_current_shift()  # e.g., "early"
-        current_week = get_current_week_number()
-
-        # MODIFIED: Determine engine based on original filename from the stream object
-        original_filename = getattr(excel_file_object, 'filename', '').lower()
-        engine_to_use = 'pyxlsb' if original_filename.endswith('.xlsb') else 'openpyxl'
-
-        # MODIFIED: Read from the excel_file_object (stream)
-        df = pd.read_excel(excel_file_object, sheet_name=sheet_name, engine=engine_to_use, header=None)
-
-        # Find the target column for quantity and the filtered DataFrame
-        filtered_df, target_col = find_and_filter_data(df, current_day, current_shift)
-
-        # Get the actual headers for data columns from Excel row 2 (index 1)
-        headers = fill_merged_cells(df.iloc[1])
-        # print("Headers for data columns (from Excel row 2 / index 1):", headers.to_list())
-
-        required_columns = {
-            "scheduler_col": "Scheduler Group /  Task",
-            "planning_notes_col": "Planning notes",
-            "lines_col": "Lines",
-            "mitarbeiter_col": "Mitarbeiter pro Aufgabe",
-            "worktime_col": "Planned Worktime in Min",
-            "priority_col": "Prio",
-            "task_type_col": "&",
-            "ticket_mo_col": "Ticket oder MO ID"
-        }
+# Columns read for every task, matched against the shift header row (Excel row 2 / index 1)
+REQUIRED_COLUMNS = {
+    "scheduler_col": "Scheduler Group /  Task",
+    "planning_notes_col": "Planning notes",
+    "lines_col": "Lines",
+    "mitarbeiter_col": "Mitarbeiter pro Aufgabe",
+    "worktime_col": "Planned Worktime in Min",
+    "priority_col": "Prio",
+    "task_type_col": "&",
+    "ticket_mo_col": "Ticket oder MO ID"
+}
+
+# Strings the pandas Excel reader treats as missing; streamed cells keep the same meaning
+NA_STRINGS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+])
+
+# Data rows start at Excel row 10 (index 9)
+FIRST_DATA_ROW = 9
+
+# Chunk size for copying a sheet part out of an .xlsb workbook
+SHEET_COPY_CHUNK_SIZE = 1024 * 1024
+
+# Phases reported to an extraction progress callback, in order
+EXTRACTION_PHASES = ('read', 'sheet_detect', 'filter', 'validate')
+
+# Day/shift quantity columns captured by the weekly index (day names as get_current_day returns them)
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+SHIFTS = ("early", "late")
+
+
+def _normalize_header(header_text):
+    """Header text as compared by the REQUIRED_COLUMNS search."""
+    header_text = header_text.lower().replace('\\n', ' ')
+    header_text = re.sub(r'\\s*/\\s*', '/', header_text)
+    return re.sub(r'\\s+', ' ', header_text).strip()
+
+
+class HeaderMap:
+    """
+    The day (Excel row 1) and shift (Excel row 2) header rows of a week sheet, processed once.
+
+    Both rows are filled over merged cells. Every (day header, shift) pair maps to its
+    first column in a dict, and the shift row is normalized once for the
+    REQUIRED_COLUMNS search, whose results are memoized per search pattern.
+    """
+
+    def __init__(self, day_headers, shift_headers):
+        self.day_headers = list(day_headers)
+        self.shift_headers = list(shift_headers)
+        self._days = set()
+        self._quantity_columns = {}
+        for col, (day, shift) in enumerate(zip(self.day_headers, self.shift_headers)):
+            day = str(day).strip()
+            self._days.add(day)
+            self._quantity_columns.setdefault((day, str(shift).lower().strip()), col)
+        # Only text headers take part in the column search, as with Series.str
+        self._normalized = [_normalize_header(h) if isinstance(h, str) else None for h in self.shift_headers]
+        self._has_text = not self.shift_headers or any(isinstance(h, str) for h in self.shift_headers)
+        self._matches = {}
+
+    @classmethod
+    def from_values(cls, day_values, shift_values):
+        """Build from raw streamed rows; both are padded to the same width and NA strings become NaN."""
+        width = max(len(day_values), len(shift_values))
+        nan = float('nan')
+
+        def header_series(values):
+            return pd.Series(
+                [nan if isinstance(v, str) and v in NA_STRINGS else v for v in values] + [nan] * (width - len(values)),
+                dtype=object
+            )
+        return cls(fill_merged_cells(header_series(day_values)).tolist(),
+                   fill_merged_cells(header_series(shift_values)).tolist())
+
+    def quantity_column(self, day, shift, week):
+        """(target_header, column) of a day/shift quantity column; raises ValueError if it is missing."""
+        target_header = f"{day} CW-{week}"
+        if target_header not in self._days:
+            raise ValueError(f"No columns found for day header '{target_header}'. Check Excel row 1 (index 0).")
+        target_col = self._quantity_columns.get((target_header, shift))
+        if target_col is None:
+            raise ValueError(f"Column for {day} with shift '{shift}' not found under day header '{target_header}'. Check Excel row 2 (index 1).")
+        return target_header, target_col
+
+    def find_column(self, pattern):
+        """First column whose normalized shift-row header contains ``pattern`` (regex, any case), or None."""
+        if pattern not in self._matches:
+            regex = re.compile(pattern, flags=re.IGNORECASE)
+            self._matches[pattern] = next(
+                (col for col, header in enumerate(self._normalized) if header is not None and regex.search(header)),
+                None
+            )
+        return self._matches[pattern]
 
+    def resolve_columns(self):
+        """
+        Map REQUIRED_COLUMNS to column indices.
+
+        Optional columns that are missing map to their field name instead and get a
+        default value in the returned defaults dict.
+        """
+        if not self._has_text:
+            raise AttributeError("Can only use .str accessor with string values!")
         column_indices = {}
-        for col_name, header_text in required_columns.items():
+        defaults = {}
+        for col_name, header_text in REQUIRED_COLUMNS.items():
             if col_name == "task_type_col":
-                # Use headers (from df.iloc[1]) to find the '&' column
-                matching_columns = headers[headers.str.contains(r"&", na=False, case=False)]
-                if matching_columns.empty:
+                # Use headers (from Excel row 2 / index 1) to find the '&' column
+                task_type_col = self.find_column(r"&")
+                if task_type_col is None:
                     print("Warning: No column header with '&' found in Excel row 2 (index 1). Assuming all tasks are PM.")
-                    filtered_df['task_type'] = 'PM'
+                    defaults['task_type'] = 'PM'
                     column_indices[col_name] = 'task_type'
                 else:
-                    column_indices[col_name] = matching_columns.index[0]
+                    column_indices[col_name] = task_type_col
+                continue
+
+            # Normalize header_text from required_columns for searching in Excel headers
+            normalized_search_header = re.sub(r'\\s+', ' ', header_text.lower().replace('\\n', ' ').strip())
+            normalized_search_header = re.sub(r'\\s*/\\s*', '/', normalized_search_header) # Handle " / " vs "/"
+            matching_col = self.find_column(normalized_search_header)
+
+            if matching_col is None and col_name not in ["planning_notes_col", "priority_col", "ticket_mo_col"]:
+                raise ValueError(f"Column '{header_text}' not found in Excel row 2 (index 1).")
+            elif matching_col is None and col_name == "planning_notes_col":
+                print(f"Warning: Column '{header_text}' not found in Excel row 2 (index 1). Setting planning_notes to empty.")
+                defaults['planning_notes'] = ''
+                column_indices[col_name] = 'planning_notes'
+            elif matching_col is None and col_name == "priority_col":
+                print(f"Warning: Column '{header_text}' not found in Excel row 2 (index 1). Setting priority to 'R'.")
+                defaults['priority'] = 'R'
+                column_indices[col_name] = 'priority'
+            elif matching_col is None and col_name == "ticket_mo_col":
+                print(f"Warning: Column '{header_text}' not found in Excel row 2 (index 1). Setting ticket_mo to empty.")
+                defaults['ticket_mo'] = ''
+                column_indices[col_name] = 'ticket_mo'
             else:
-                # Normalize header_text from required_columns for searching in Excel headers
-                normalized_search_header = re.sub(r'\\s+', ' ', header_text.lower().replace('\\n', ' ').strip())
-                normalized_search_header = re.sub(r'\\s*/\\s*', '/', normalized_search_header) # Handle " / " vs "/"
-
-                # Normalize Excel headers for comparison
-                excel_headers_normalized = headers.str.lower().str.replace('\\n', ' ', regex=False)
-                excel_headers_normalized = excel_headers_normalized.str.replace(r'\\s*/\\s*', '/', regex=True)
-                excel_headers_normalized = excel_headers_normalized.str.replace(r'\\s+', ' ', regex=True).str.strip()
-
-                matching_columns = headers[excel_headers_normalized.str.contains(normalized_search_header, na=False, case=False)]
-
-                if matching_columns.empty and col_name not in ["planning_notes_col", "priority_col", "ticket_mo_col"]:
-                    raise ValueError(f"Column '{header_text}' not found in Excel row 2 (index 1).")
-                elif matching_columns.empty and col_name == "planning_notes_col":
-                    print(f"Warning: Column '{header_text}' not found in Excel row 2 (index 1). Setting planning_notes to empty.")
-                    filtered_df['planning_notes'] = ''
-                    column_indices[col_name] = 'planning_notes'
-                elif matching_columns.empty and col_name == "priority_col":
-                    print(f"Warning: Column '{header_text}' not found in Excel row 2 (index 1). Setting priority to 'R'.")
-                    filtered_df['priority'] = 'R'
-                    column_indices[col_name] = 'priority'
-                elif matching_columns.empty and col_name == "ticket_mo_col":
-                    print(f"Warning: Column '{header_text}' not found in Excel row 2 (index 1). Setting ticket_mo to empty.")
-                    filtered_df['ticket_mo'] = ''
-                    column_indices[col_name] = 'ticket_mo'
-                else:
-                    column_indices[col_name] = matching_columns.index[0]
+                column_indices[col_name] = matching_col
+        return column_indices, defaults
+
+
+def _convert_number(value):
+    """Integral floats become ints, as the pandas Excel readers do."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
 
-        # Clean task_type values
-        if column_indices["task_type_col"] != 'task_type':
-            filtered_df.iloc[:, column_indices["task_type_col"]] = filtered_df.iloc[:,
-                                                                   column_indices["task_type_col"]].apply(
-                lambda x: re.match(r'^(PM|Rep)', str(x), re.IGNORECASE).group(0).upper() if re.match(r'^(PM|Rep)',
-                                                                                                     str(x),
-                                                                                                     re.IGNORECASE) else 'PM'
+def _cell_text(value):
+    """String form of a cell as DataFrame.astype(str) would render it."""
+    if isinstance(value, str):
+        return 'nan' if value in NA_STRINGS else value
+    return str(value)
+
+
+class _XlsbReader:
+    """Row iterator over an .xlsb workbook (pyxlsb)."""
+
+    def __init__(self, excel_file_object):
+        self._workbook = open_xlsb_workbook(excel_file_object)
+        self.sheet_names = list(self._workbook.sheets)
+
+    def _open_sheet(self, sheet_name):
+        """
+        Workbook.get_sheet() without its full in-memory copy of the sheet part.
+
+        pyxlsb reads the whole decompressed part into a bytes object before writing it
+        to a temp file; here it is copied in chunks instead.
+        """
+        workbook = self._workbook
+        names = [name.lower() for name, _ in workbook._sheets]
+        name, target = workbook._sheets[names.index(sheet_name.lower())]
+        target = target.split('/')
+        temp = TemporaryFile()
+        with workbook._zf.open('xl/{}/{}'.format(target[0], target[-1]), 'r') as part:
+            shutil.copyfileobj(part, temp, SHEET_COPY_CHUNK_SIZE)
+        temp.seek(0)
+        return XlsbWorksheet(name=name, fp=temp, stringtable=workbook.stringtable)
+
+    def iter_rows(self, sheet_name):
+        """Yield (row_index, row) for each stored row; cells are converted lazily via cell()."""
+        with self._open_sheet(sheet_name) as sheet:
+            for row in sheet.rows(sparse=True):
+                yield row[0].r, row
+
+    @staticmethod
+    def cell(row, col):
+        if col >= len(row) or row[col].v is None:
+            return ""
+        return _convert_number(row[col].v)
+
+    def close(self):
+        self._workbook.close()
+
+
+class _XlsxReader:
+    """Row iterator over an .xlsx workbook (openpyxl read-only mode)."""
+
+    def __init__(self, excel_file_object):
+        if openpyxl is None:
+            raise ImportError("Missing optional dependency 'openpyxl'. Use pip or conda to install openpyxl.")
+        self._workbook = openpyxl.load_workbook(excel_file_object, read_only=True, data_only=True, keep_links=False)
+        self.sheet_names = list(self._workbook.sheetnames)
+
+    def iter_rows(self, sheet_name):
+        """Yield (row_index, row) for every row up to the last one with data."""
+        sheet = self._workbook[sheet_name]
+        sheet.reset_dimensions()
+        yield from enumerate(sheet.rows)
+
+    @staticmethod
+    def cell(row, col):
+        if col >= len(row) or row[col].value is None:
+            return ""
+        cell = row[col]
+        if cell.data_type == 'e':
+            return float('nan')
+        if cell.data_type == 'n':
+            return _convert_number(cell.value)
+        return cell.value
+
+    def close(self):
+        self._workbook.close()
+
+
+_READERS = {'pyxlsb': _XlsbReader, 'openpyxl': _XlsxReader}
+
+
+def _row_values(reader, row):
+    """All cells of a row with trailing blanks trimmed."""
+    values = [reader.cell(row, col) for col in range(len(row))]
+    while values and values[-1] == "":
+        values.pop()
+    return values
+
+
+def _quantity_candidate(quantity):
+    """The cell as a quantity: a float, None when it can never be >= 1, or the raw text for pd.to_numeric."""
+    if isinstance(quantity, (int, float)) and not isinstance(quantity, bool):
+        quantity = float(quantity)
+        return quantity if quantity >= 1 else None
+    return None if quantity == "" else quantity
+
+
+class WeeklyTaskIndex:
+    """
+    Every day/shift quantity column of one week sheet, read in a single pass.
+
+    Holds the sheet's HeaderMap, the captured columns (mapped task columns plus the
+    quantity column of each weekday and shift) and, for every data row with a quantity
+    in any of them, the captured cells. extract_from_index() answers any day/shift
+    from this index with the same rows and messages a dedicated parse would give.
+    """
+
+    def __init__(self, sheet_name, week, headers, columns, rows):
+        self.sheet_name = sheet_name
+        self.week = week
+        self.headers = headers
+        self.columns = list(columns)
+        self.rows = rows  # [(row_index, [cell per captured column]), ...]
+        self._positions = {col: pos for pos, col in enumerate(self.columns)}
+        # A missing required column is reported only after the empty-sheet check, as before
+        self.column_error = None
+        try:
+            self.column_indices, self.defaults = headers.resolve_columns()
+        except (ValueError, AttributeError) as e:
+            self.column_error = e
+            self.column_indices, self.defaults = {}, {}
+
+    @classmethod
+    def from_headers(cls, sheet_name, week, headers, extra_targets=()):
+        """Index with no rows yet; resolves which columns have to be captured while streaming."""
+        index = cls(sheet_name, week, headers, [], [])
+        targets = set()
+        for day, shift in [(day, shift) for day in WEEKDAYS for shift in SHIFTS] + list(extra_targets):
+            try:
+                targets.add(int(index.target_column(day, shift)[1]))
+            except ValueError:
+                pass
+        mapped = {int(idx) for idx in index.column_indices.values() if not isinstance(idx, str)}
+        index.target_columns = sorted(targets)
+        index.columns = sorted(mapped | targets)
+        index._positions = {col: pos for pos, col in enumerate(index.columns)}
+        return index
+
+    def target_column(self, day, shift):
+        """(target_header, column) of a day/shift; raises ValueError like find_and_filter_data."""
+        return self.headers.quantity_column(day, shift, self.week)
+
+    def covers(self, day, shift):
+        """True if extract() can answer this day/shift without reading the workbook again."""
+        try:
+            return self.target_column(day, shift)[1] in self._positions
+        except ValueError:
+            return True
+
+    def select_rows(self, day, shift):
+        """
+        Rows with quantity >= 1 for a day/shift as (row_index, quantity, cells).
+
+        Returns (target_header, rows); cells maps column index to the captured value.
+        """
+        target_header, target_col = self.target_column(day, shift)
+        position = self._positions[target_col]
+        candidates = []
+        for row_index, values in self.rows:
+            quantity = _quantity_candidate(values[position])
+            if quantity is not None:
+                candidates.append((row_index, quantity, dict(zip(self.columns, values))))
+
+        # Text quantities are converted together, with the same coercion as pd.to_numeric on the column
+        text_positions = [i for i, (_, quantity, _) in enumerate(candidates) if not isinstance(quantity, float)]
+        if text_positions:
+            converted = pd.to_numeric(
+                pd.Series([candidates[i][1] for i in text_positions], dtype=object), errors='coerce'
+            )
+            for i, quantity in zip(text_positions, converted):
+                row_index, _, cells = candidates[i]
+                candidates[i] = (row_index, float(quantity), cells)
+
+        rows = []
+        for row_index, quantity, cells in candidates:
+            if quantity >= 1:
+                cells[target_col] = quantity
+                rows.append((row_index, quantity, cells))
+        return target_header, rows
+
+    def to_dict(self):
+        """JSON-serialisable form (see from_dict)."""
+        return {
+            'sheet_name': self.sheet_name,
+            'week': self.week,
+            'day_headers': self.headers.day_headers,
+            'shift_headers': self.headers.shift_headers,
+            'columns': self.columns,
+            'rows': self.rows
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['sheet_name'], data['week'], HeaderMap(data['day_headers'], data['shift_headers']), data['columns'],
+            [(row_index, values) for row_index, values in data['rows']]
+        )
+
+
+def _scan_week_sheet(reader, sheet_name, week, extra_targets=()):
+    """
+    Stream the week sheet once into a WeeklyTaskIndex.
+
+    The two header rows locate the quantity column of every weekday and shift (plus
+    ``extra_targets``) and the mapped task columns; from Excel row 10 on, only those
+    cells of rows with a quantity in any of the quantity columns are kept.
+    """
+    header_values = {0: [], 1: []}
+    has_second_row = False
+    index = None
+    rows = []
+    for row_index, row in reader.iter_rows(sheet_name):
+        if index is None:
+            values = _row_values(reader, row)
+            if not values:
+                continue
+            if row_index < 2:
+                header_values[row_index] = values
+                has_second_row = row_index == 1
+                continue
+            index = WeeklyTaskIndex.from_headers(
+                sheet_name, week, HeaderMap.from_values(header_values[0], header_values[1]), extra_targets
             )
+        if row_index < FIRST_DATA_ROW:
+            continue
+
+        if any(_quantity_candidate(reader.cell(row, col)) is not None for col in index.target_columns):
+            rows.append((row_index, [reader.cell(row, col) for col in index.columns]))
+
+    if index is None:
+        # Fewer than two rows: the header lookup fails exactly as DataFrame.iloc[1] did
+        if not has_second_row:
+            raise IndexError("single positional indexer is out-of-bounds")
+        index = WeeklyTaskIndex.from_headers(
+            sheet_name, week, HeaderMap.from_values(header_values[0], header_values[1]), extra_targets
+        )
+    index.rows = rows
+    return index
+
+
+def _task_type_prefix(values):
+    """Leading 'PM' / 'Rep' of each value, upper-cased; NaN where there is none."""
+    return values.str.extract(r'^(PM|Rep)', flags=re.IGNORECASE, expand=False).str.upper()
+
+
+def _distinct(values):
+    """
+    Factorize a column into (codes, distinct values).
+
+    Task columns repeat a handful of values (crew sizes, worktimes, priorities, task
+    types), so checks run once per distinct value and are broadcast back to the rows
+    with ``result[codes]``.
+    """
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    return codes, pd.Series(uniques, dtype=object)
+
+
+def _is_blank(values):
+    return ((values == '') | (values.str.lower() == 'nan')).to_numpy()
+
+
+def _positive_number_errors(values, label):
+    """
+    Error message per value for a column that must hold a positive number, None where valid.
+
+    Plain decimals are parsed with pd.to_numeric; anything else goes through float() so
+    the accepted spellings are exactly those of the row-by-row validation.
+    """
+    blank = _is_blank(values)
+    simple = values.str.fullmatch(r'[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)').to_numpy(dtype=bool)
+    numeric = simple.copy()
+    numbers = np.full(len(values), np.nan)
+    numbers[simple] = pd.to_numeric(values[simple]).to_numpy(dtype=float)
+    raw = values.to_numpy()
+    for pos in np.flatnonzero(~blank & ~simple):
+        try:
+            numbers[pos] = float(raw[pos])
+            numeric[pos] = True
+        except ValueError:
+            pass
+
+    errors = np.full(len(values), None, dtype=object)
+    errors[blank] = f"{label} cannot be blank."
+    for pos in np.flatnonzero(~blank & ~numeric):
+        errors[pos] = f"{label} ('{raw[pos]}') must be a numeric value."
+    for pos in np.flatnonzero(numeric & (numbers <= 0)):
+        errors[pos] = f"{label} ('{raw[pos]}') must be a positive number."
+    return errors
+
+
+def _validate_rows(columns, task_type_found):
+    """
+    Validate the extracted task columns and build the task dicts for valid rows.
+
+    ``columns`` holds the cell strings of each task column, indexed by Excel row number.
+    Every check runs column-wise on the distinct values of the column; messages are
+    only formatted for failing rows. A row with any error is reported (in check order)
+    and left out of the extracted data.
+    """
+    row_numbers = columns.index.to_numpy()
+    n_rows = len(columns)
+
+    def stripped(name):
+        codes, uniques = _distinct(columns[name])
+        return codes, uniques.str.strip()
+
+    scheduler_codes, scheduler_values = stripped("scheduler_group_task")
+    mitarbeiter_codes, mitarbeiter_values = stripped("mitarbeiter_pro_aufgabe")
+    priority_codes, priority_values = stripped("priority")
+    worktime_codes, worktime_values = stripped("planned_worktime_min")
+    task_type_codes, task_type_values = stripped("task_type")
+    ticket_codes, ticket_values = stripped("ticket_mo")
+
+    # --- VALIDATIONS --- one message column per check (per distinct value), in reporting order
+    # 1. Scheduler Group / Task
+    scheduler_blank = _is_blank(scheduler_values)
+    scheduler_errors = np.where(scheduler_blank, "Scheduler Group / Task cannot be blank.", None)
+
+    # 2. Mitarbeiter pro Aufgabe
+    mitarbeiter_errors = _positive_number_errors(mitarbeiter_values, "Mitarbeiter pro Aufgabe")
+
+    # 3. Prio
+    priority_blank = _is_blank(priority_values)
+    priority_invalid = ~priority_blank & ~priority_values.str.match(r"^[A-Z]$").to_numpy(dtype=bool)
+    priority_errors = np.where(priority_blank, "Prio cannot be blank.", None)
+    for pos in np.flatnonzero(priority_invalid):
+        priority_errors[pos] = f"Prio ('{priority_values[pos]}') must be a single uppercase letter (A-Z)."
+
+    # 4. Planned Worktime in Min
+    worktime_errors = _positive_number_errors(worktime_values, "Planned Worktime in Min")
+
+    # 5. Task Type
+    if task_type_found:
+        processed_task_type = _task_type_prefix(task_type_values)
+        task_type_blank = _is_blank(task_type_values)
+        task_type_errors = np.where(task_type_blank, "Task Type (from '&' column) cannot be blank. Must be PM or Rep.", None)
+        for pos in np.flatnonzero(~task_type_blank & processed_task_type.isna().to_numpy()):
+            task_type_errors[pos] = f"Task Type (from '&' column) must be PM or Rep. Found: '{task_type_values[pos]}'."
+        processed_task_type = processed_task_type.fillna("").to_numpy(dtype=object)
+    else:
+        # The '&' column was NOT found; all tasks are PM by definition
+        processed_task_type = np.full(len(task_type_values), "PM", dtype=object)
+        task_type_errors = np.full(len(task_type_values), None, dtype=object)
+
+    # Boolean error matrix over the rows
+    checks = (
+        (scheduler_errors, scheduler_codes), (mitarbeiter_errors, mitarbeiter_codes),
+        (priority_errors, priority_codes), (worktime_errors, worktime_codes), (task_type_errors, task_type_codes)
+    )
+    error_matrix = np.column_stack([(errors != None)[codes] for errors, codes in checks])  # noqa: E711
+    failing = error_matrix.any(axis=1)
+
+    # Messages are only gathered and formatted for the failing rows
+    failing_rows = np.flatnonzero(failing)
+    # Use the task name in the error if it is available
+    task_descs = np.where(scheduler_blank, "N/A", scheduler_values.to_numpy())[scheduler_codes[failing_rows]]
+    row_errors = zip(*(errors[codes[failing_rows]].tolist() for errors, codes in checks))
+    error_messages = []
+    for row_number, task_desc_for_error, errors in zip(row_numbers[failing_rows].tolist(), task_descs.tolist(), row_errors):
+        prefix = f"Excel Row {row_number} (Task: '{task_desc_for_error}'): "
+        error_messages.extend(prefix + err for err in errors if err is not None)
+
+    # Rows that passed every check; REP tickets link to the issue (short IDs) or the planner grid
+    valid = np.flatnonzero(~failing)
+    ticket_urls = np.array([
+        "" if blank else (
+            f"https://flux-gfb.tesla.com/app/issues/view/{ticket}" if len(ticket) <= 6
+            else f"https://flux-gfb.tesla.com/app/schedules/planner-maintenance-grid?ids={ticket}"
+        )
+        for ticket, blank in zip(ticket_values, _is_blank(ticket_values))
+    ], dtype=object)
+    task_types = processed_task_type[task_type_codes[valid]]
+    ticket_url = np.where(task_types == 'REP', ticket_urls[ticket_codes[valid]], "")
+
+    fields = {
+        "scheduler_group_task": scheduler_values.to_numpy()[scheduler_codes[valid]],
+        "planning_notes": columns["planning_notes"].to_numpy()[valid],
+        "lines": columns["lines"].to_numpy()[valid],
+        "mitarbeiter_pro_aufgabe": mitarbeiter_values.to_numpy()[mitarbeiter_codes[valid]],
+        "planned_worktime_min": worktime_values.to_numpy()[worktime_codes[valid]],
+        "priority": priority_values.to_numpy()[priority_codes[valid]],
+        "quantity": columns["quantity"].to_numpy()[valid],
+        "task_type": task_types,
+        "ticket_mo": ticket_values.to_numpy()[ticket_codes[valid]],
+        "ticket_url": ticket_url
+    }
+    keys = tuple(fields)
+    extracted_data = [dict(zip(keys, values)) for values in zip(*(column.tolist() for column in fields.values()))]
+    return extracted_data, error_messages
+
+
+# Step 4: Extract data
+def get_excel_engine(excel_file_object):
+    """Pick the reader engine from the uploaded file's original name."""
+    original_filename = getattr(excel_file_object, 'filename', '').lower()
+    return 'pyxlsb' if original_filename.endswith('.xlsb') else 'openpyxl'
+
+
+def _report(progress, phase):
+    if progress:
+        progress(phase)
+
+
+def extract_workbook_index(excel_file_object, context=None, progress=None):
+    """
+    Open the workbook once, index its week sheet and extract one day/shift from it.
+
+    The sheet list is read from the same handle that parses the data, and only the
+    week sheet is read, row by row, into a WeeklyTaskIndex covering every day/shift
+    column. Returns (sheet_names, index, extracted_data, error_messages); index is None
+    when the sheet could not be indexed (e.g. the week sheet is missing), in which case
+    the error list explains why. Errors opening the workbook itself are raised to the
+    caller. ``context`` pins the week/day/shift (see get_extraction_context); it
+    defaults to the current one. ``progress`` is called with each phase name in
+    EXTRACTION_PHASES as it starts.
+    """
+    context = context or get_extraction_context()
+    _report(progress, 'read')
+    reader = _READERS[get_excel_engine(excel_file_object)](excel_file_object)
+    try:
+        sheet_names = list(reader.sheet_names)
+        _report(progress, 'sheet_detect')
+        index, error_messages = _index_workbook(reader, sheet_names, context)
+    finally:
+        reader.close()
+    if index is None:
+        return sheet_names, None, [], error_messages
+    extracted_data, error_messages = extract_from_index(index, context, progress)
+    return sheet_names, index, extracted_data, error_messages
+
+
+def extract_workbook(excel_file_object, context=None, progress=None):
+    """
+    Extract the current week's tasks for one day/shift; see extract_workbook_index.
+
+    Returns (sheet_names, extracted_data, error_messages).
+    """
+    sheet_names, _, extracted_data, error_messages = extract_workbook_index(excel_file_object, context, progress)
+    return sheet_names, extracted_data, error_messages
+
+
+def extract_data(excel_file_object):  # MODIFIED: Changed argument name
+    try:
+        _, extracted_data, error_messages = extract_workbook(excel_file_object)
+        return extracted_data, error_messages
+    except ValueError as ve:
+        return [], [f"Configuration or File Error: {str(ve)}"]
+    except Exception as e:
+        return [], [f"Critical error during data extraction: {str(e)}"]
+
+
+def _error_messages(error):
+    if isinstance(error, ValueError):
+        # These are often configuration/file structure issues
+        return [f"Configuration or File Error: {str(error)}"]
+    return [f"Critical error during data extraction: {str(error)}"]
+
+
+def _index_workbook(reader, sheet_names, context):
+    """(index, []) for the context's week sheet, or (None, error_messages)."""
+    sheet_name, current_day, current_shift, current_week = context
+    try:
+        # Validate the week sheet from the already opened workbook before parsing anything
+        if sheet_name not in sheet_names:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        return _scan_week_sheet(reader, sheet_name, current_week, [(current_day, current_shift)]), []
+    except Exception as e:
+        return None, _error_messages(e)
+
+
+def extract_from_index(index, context=None, progress=None):
+    """
+    (extracted_data, error_messages) for one day/shift of an indexed week sheet.
+
+    Returns None if the index is for another week sheet or does not hold that
+    day/shift's quantity column (a day name outside WEEKDAYS); the workbook has to be
+    read again in that case.
+    """
+    # e.g. "Summary KW17", "Monday", "early", "17"
+    sheet_name, current_day, current_shift, current_week = context or get_extraction_context()
+    if index.sheet_name != sheet_name or not index.covers(current_day, current_shift):
+        return None
+    try:
+        error_messages = []  # Initialize list for error messages
+        _report(progress, 'filter')
+        target_header, rows = index.select_rows(current_day, current_shift)
+        if not rows:
+            raise _no_rows_error(target_header, current_shift)
+        if index.column_error is not None:
+            raise index.column_error
+        column_indices = index.column_indices
+
+        # Clean task_type values
+        task_type_col = column_indices["task_type_col"]
+        if task_type_col != 'task_type':
+            cleaned = _task_type_prefix(pd.Series([_cell_text(cells[task_type_col]) for _, _, cells in rows])).fillna('PM')
+            for (_, _, cells), task_type in zip(rows, cleaned):
+                cells[task_type_col] = task_type
+
+        def column_data(col_key):
+            col = column_indices[col_key]
+            if isinstance(col, str):  # missing optional column, filled with its default
+                return [str(index.defaults[col])] * len(rows)
+            return [_cell_text(cells[col]) for _, _, cells in rows]
 
         # Extract data
-        scheduler_data = filtered_df.iloc[:, column_indices["scheduler_col"]].astype(str).tolist()
-        planning_notes_data = filtered_df.iloc[:, column_indices["planning_notes_col"]].astype(str).tolist() if \
-        column_indices["planning_notes_col"] != 'planning_notes' else filtered_df['planning_notes'].astype(str).tolist()
-        lines_data = filtered_df.iloc[:, column_indices["lines_col"]].astype(str).tolist()
-        mitarbeiter_data = filtered_df.iloc[:, column_indices["mitarbeiter_col"]].astype(str).tolist()
-        worktime_data = filtered_df.iloc[:, column_indices["worktime_col"]].astype(str).tolist()
-        priority_data = filtered_df.iloc[:, column_indices["priority_col"]].astype(str).tolist() if column_indices[
-                                                                                                        "priority_col"] != 'priority' else \
-        filtered_df['priority'].astype(str).tolist()
-        quantity_data = filtered_df.iloc[:, target_col].astype(str).tolist()
-        # Get raw task type data for validation before any transformation
-        raw_task_type_values = []
-        if column_indices["task_type_col"] != 'task_type': # if it's an actual column index
-            raw_task_type_values = filtered_df.iloc[:, column_indices["task_type_col"]].astype(str).tolist()
-        else: # if it was defaulted to 'task_type' string key (meaning column not found)
-            raw_task_type_values = ['PM'] * len(filtered_df) # Default to 'PM' for each row if column was missing
-
-        ticket_mo_data = filtered_df.iloc[:, column_indices["ticket_mo_col"]].astype(str).tolist() if column_indices[
-                                                                                                          "ticket_mo_col"] != 'ticket_mo' else \
-        filtered_df['ticket_mo'].astype(str).tolist()
-
-        extracted_data = []
-        for i in range(len(scheduler_data)):
-            # Corrected row_excel_number: original 0-based index + 1
-            row_excel_number = filtered_df.index[i] + 1
-            current_errors_for_row = []
-
-            val_scheduler_group_task = scheduler_data[i].strip()
-            val_mitarbeiter = mitarbeiter_data[i].strip()
-            val_priority = priority_data[i].strip()
-            val_worktime = worktime_data[i].strip()
-            raw_task_type_value = raw_task_type_values[i].strip()
-
-            # --- VALIDATIONS ---
-            # 1. Scheduler Group / Task
-            if not val_scheduler_group_task or val_scheduler_group_task.lower() == 'nan':
-                current_errors_for_row.append("Scheduler Group / Task cannot be blank.")
-
-            # 2. Mitarbeiter pro Aufgabe
-            if not val_mitarbeiter or val_mitarbeiter.lower() == 'nan':
-                current_errors_for_row.append("Mitarbeiter pro Aufgabe cannot be blank.")
-            else:
-                try:
-                    if float(val_mitarbeiter) <= 0:
-                        current_errors_for_row.append(f"Mitarbeiter pro Aufgabe ('{val_mitarbeiter}') must be a positive number.")
-                except ValueError:
-                    current_errors_for_row.append(f"Mitarbeiter pro Aufgabe ('{val_mitarbeiter}') must be a numeric value.")
-
-            # 3. Prio
-            if not val_priority or val_priority.lower() == 'nan':
-                current_errors_for_row.append("Prio cannot be blank.")
-            elif not re.match(r"^[A-Z]$", val_priority):
-                current_errors_for_row.append(f"Prio ('{val_priority}') must be a single uppercase letter (A-Z).")
-
-            # 4. Planned Worktime in Min
-            if not val_worktime or val_worktime.lower() == 'nan':
-                current_errors_for_row.append("Planned Worktime in Min cannot be blank.")
-            else:
-                try:
-                    if float(val_worktime) <= 0:
-                        current_errors_for_row.append(f"Planned Worktime in Min ('{val_worktime}') must be a positive number.")
-                except ValueError:
-                    current_errors_for_row.append(f"Planned Worktime in Min ('{val_worktime}') must be a numeric value.")
-
-            # 5. Task Type
-            processed_task_type = ""
-            # Check if task_type_col was found or defaulted
-            if column_indices["task_type_col"] == 'task_type': # This means the '&' column was NOT found, and we defaulted
-                # If it defaulted, it means we assumed 'PM'. This is acceptable by definition.
-                processed_task_type = "PM"
-            else: # The '&' column was found, validate its content
-                if not raw_task_type_value or raw_task_type_value.lower() == 'nan':
-                    current_errors_for_row.append(f"Task Type (from '&' column) cannot be blank. Must be PM or Rep.")
-                else:
-                    match = re.match(r'^(PM|Rep)', raw_task_type_value, re.IGNORECASE)
-                    if match:
-                        processed_task_type = match.group(0).upper()
-                    else:
-                        current_errors_for_row.append(f"Task Type (from '&' column) must be PM or Rep. Found: '{raw_task_type_value}'.")
-
-            if current_errors_for_row:
-                for err in current_errors_for_row:
-                    # Try to get a more descriptive task name for the error, if available
-                    task_desc_for_error = val_scheduler_group_task if val_scheduler_group_task and val_scheduler_group_task.lower() != 'nan' else "N/A"
-                    error_messages.append(f"Excel Row {row_excel_number} (Task: '{task_desc_for_error}'): {err}")
-                continue # Skip this row, do not add to extracted_data
-
-            # If all validations passed, proceed to create the data entry
-            ticket_mo = ticket_mo_data[i].strip()
-            ticket_url = ""
-            if processed_task_type.upper() == 'REP' and ticket_mo and ticket_mo.lower() != 'nan':
-                if len(ticket_mo) <= 6:
-                    ticket_url = f"https://flux-gfb.tesla.com/app/issues/view/{ticket_mo}"
-                else:
-                    ticket_url = f"https://flux-gfb.tesla.com/app/schedules/planner-maintenance-grid?ids={ticket_mo}"
-
-            extracted_data.append({
-                "scheduler_group_task": val_scheduler_group_task,
-                "planning_notes": planning_notes_data[i],
-                "lines": lines_data[i],
-                "mitarbeiter_pro_aufgabe": val_mitarbeiter,
-                "planned_worktime_min": val_worktime,
-                "priority": val_priority,
-                "quantity": quantity_data[i],
-                "task_type": processed_task_type,
-                "ticket_mo": ticket_mo,
-                "ticket_url": ticket_url
-            })
+        columns = pd.DataFrame({
+            "scheduler_group_task": column_data("scheduler_col"),
+            "planning_notes": column_data("planning_notes_col"),
+            "lines": column_data("lines_col"),
+            "mitarbeiter_pro_aufgabe": column_data("mitarbeiter_col"),
+            "planned_worktime_min": column_data("worktime_col"),
+            "priority": column_data("priority_col"),
+            "quantity": [_cell_text(quantity) for _, quantity, _ in rows],
+            # Task type values after cleaning (all 'PM' if the '&' column is missing)
+            "task_type": column_data("task_type_col"),
+            "ticket_mo": column_data("ticket_mo_col"),
+        }, index=[row_index + 1 for row_index, _, _ in rows], dtype=object)  # index: Excel row number
+
+        _report(progress, 'validate')
+        extracted_data, error_messages = _validate_rows(columns, task_type_found=task_type_col != 'task_type')
 
         if not extracted_data and not error_messages:
             error_messages.append(
@@ -305,20 +775,5 @@ def extract_data(excel_file_object):  # MODIFIED: Changed argument name
 
         return extracted_data, error_messages
 
-    except ValueError as ve: # Catch specific ValueErrors from find_and_filter or others
-        # These are often configuration/file structure issues
-        # Ensure error_messages is initialized if it wasn't (e.g., error in find_and_filter data before error_messages = [])
-        if 'error_messages' not in locals() and 'error_messages' not in globals():
-            error_messages = []
-        error_messages.append(f"Configuration or File Error: {str(ve)}")
-        return [], error_messages # Ensure tuple is returned
     except Exception as e:
-        # Ensure error_messages is initialized
-        if 'error_messages' not in locals() and 'error_messages' not in globals():
-            error_messages = []
-        error_messages.append(f"Critical error during data extraction: {str(e)}")
-        # import traceback
-        # error_messages.append(traceback.format_exc())
-        return [], error_messages # Ensure tuple is returned
-        # print(f"Error in extract_data: {str(e)}") # Keep for server logs if needed
-        # raise # Re-raising might hide specific error messages collected
+        return [], _error_messages(e)
@@ -51,6 +51,13 @@ class MetricsCollector:
     def __init__(self):
         self.request_metrics = {}
         self.database_metrics = {}
+        self.planner_metrics = {
+            'runs': 0,
+            'total_duration': 0,
+            'avg_duration': 0,
+            'phase_totals': {},
+            'last_profile': None
+        }
 
     def record_request_metric(self, endpoint, method, duration, status_code):
         """Record request timing and status metrics."""
@@ -94,11 +101,24 @@ class MetricsCollector:
         else:
             metrics['error_count'] += 1
 
+    def record_planner_profile(self, profile):
+        """Record the profile (PlannerProfile.to_dict()) of one planner run."""
+        metrics = self.planner_metrics
+        metrics['runs'] += 1
+        metrics['total_duration'] += profile.get('total_seconds', 0)
+        metrics['avg_duration'] = metrics['total_duration'] / metrics['runs']
+
+        for phase, seconds in profile.get('phase_seconds', {}).items():
+            metrics['phase_totals'][phase] = metrics['phase_totals'].get(phase, 0) + seconds
+
+        metrics['last_profile'] = profile
+
     def get_all_metrics(self):
         """Get all collected metrics."""
         return {
             'requests': self.request_metrics,
             'database': self.database_metrics,
+            'planner': self.planner_metrics,
             'collection_time': datetime.utcnow().isoformat()
         }
 
@@ -0,0 +1,198 @@
+"""
+Content-addressed cache of indexed week sheets.
+
+Entries are keyed by the SHA-256 of the uploaded bytes together with the week sheet,
+and hold the sheet list and the WeeklyTaskIndex of that sheet (every day/shift
+quantity column). The same file uploaded again -- for the same shift, the other
+shift, or the next day of the week -- is answered from the index without opening the
+workbook. Each entry is a gzip-compressed JSON file under the instance folder. The
+folder is kept under a byte limit by evicting the least recently used entries, and
+entries older than the TTL are ignored and removed.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .extract_data import WeeklyTaskIndex, extract_from_index, extract_workbook_index, get_extraction_context
+
+# Bump when the extracted row format changes so older entries are not reused
+FORMAT_VERSION = 2
+ENTRY_SUFFIX = '.json.gz'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def _now():
+    return time.time()
+
+
+def _log(logger, level, message):
+    if logger:
+        getattr(logger, level)(message)
+
+
+def hash_upload(stream):
+    """SHA-256 hex digest of an upload stream; the stream is rewound afterwards."""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """On-disk LRU cache of (sheet_names, index, error_messages) per upload and week sheet."""
+
+    def __init__(self, directory, max_bytes, ttl_seconds):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(content_hash, context):
+        """Cache key for an upload hash and an extraction context; only the week sheet is part of it."""
+        sheet_name = context[0]
+        return hashlib.sha256(f"{FORMAT_VERSION}|{content_hash}|{sheet_name}".encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """Return the cached result for ``key`` or None; a hit refreshes the entry's LRU position."""
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        now = _now()
+        if entry.get('version') != FORMAT_VERSION or now - entry.get('created', 0) > self.ttl_seconds:
+            self._remove(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        self.hits += 1
+        index = WeeklyTaskIndex.from_dict(entry['index']) if entry['index'] is not None else None
+        return entry['sheet_names'], index, entry['errors']
+
+    def put(self, key, sheet_names, index, error_messages):
+        """
+        Store a workbook's sheet list and week index and evict old entries beyond the size limit.
+
+        ``error_messages`` are the workbook-level errors that left ``index`` as None.
+        """
+        now = _now()
+        entry = {
+            'version': FORMAT_VERSION,
+            'created': now,
+            'sheet_names': list(sheet_names),
+            'index': index.to_dict() if index is not None else None,
+            'errors': list(error_messages)
+        }
+        # Header cells may hold dates; they are only ever compared as strings
+        data = gzip.compress(json.dumps(entry, separators=(',', ':'), default=str).encode('utf-8'))
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        # The file's mtime is its LRU timestamp
+        os.utime(path, (now, now))
+        self._evict()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Drop expired entries, then the least recently used ones until the folder fits max_bytes."""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith(ENTRY_SUFFIX):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            entries.sort()
+            cutoff = _now() - self.ttl_seconds
+            total = sum(size for _, size, _ in entries)
+            for mtime, size, path in entries:
+                if total <= self.max_bytes and mtime >= cutoff:
+                    continue
+                self._remove(path)
+                total -= size
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(ENTRY_SUFFIX):
+                self._remove(os.path.join(self.directory, name))
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+def get_parse_cache(directory, max_bytes, ttl_seconds):
+    """Return the process-wide cache for ``directory``, created on first use."""
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None or cache.max_bytes != max_bytes or cache.ttl_seconds != ttl_seconds:
+            cache = ParseCache(directory, max_bytes, ttl_seconds)
+            _caches[directory] = cache
+        return cache
+
+
+def extract_workbook_cached(excel_file_object, cache, logger=None, progress=None, content_hash=None):
+    """
+    extract_workbook() backed by ``cache``.
+
+    The upload is hashed and looked up for the current week sheet; a hit is answered
+    from the cached index for the current day/shift. On a miss (or when the index does
+    not hold that day/shift) the workbook is indexed once and the index is stored.
+    ``progress`` receives the extraction phases as in extract_workbook_index().
+    ``content_hash`` skips hashing when the caller already has it (see UploadSpool).
+    """
+    context = get_extraction_context()
+    if progress:
+        progress('read')
+    key = cache.make_key(content_hash or hash_upload(excel_file_object), context)
+    cached = cache.get(key)
+    if cached is not None:
+        sheet_names, index, error_messages = cached
+        if progress:
+            progress('sheet_detect')
+        if index is None:
+            _log(logger, 'info', f"Parse cache hit for upload ({context[0]}).")
+            return sheet_names, [], error_messages
+        result = extract_from_index(index, context, progress)
+        if result is not None:
+            _log(logger, 'info', f"Parse cache hit for upload ({context[0]}, {context[1]} {context[2]}).")
+            return (sheet_names,) + result
+
+    sheet_names, index, extracted_data, error_messages = extract_workbook_index(excel_file_object, context, progress)
+    try:
+        cache.put(key, sheet_names, index, error_messages if index is None else [])
+    except OSError as e:
+        _log(logger, 'warning', f"Could not store parse cache entry: {e}")
+    return sheet_names, extracted_data, error_messages
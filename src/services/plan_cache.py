@@ -0,0 +1,121 @@
+"""
+Cache of generated plans keyed by their inputs.
+
+/generate_dashboard with the same inputs -- a double click, a page reload, two
+supervisors looking at the same upload -- produces the same plan. The planner inputs
+(resolved tasks, present technicians, REP selections, strategy and budget, the
+technician configuration, the day/shift being planned) and the database's skills and
+planning configuration data versions are hashed into a canonical key. The cache keeps
+the planner outputs and the rendered dashboard HTML per key in an LRU with a TTL; a
+write to skills or planning configuration changes the data versions and therefore the
+key, so plans computed from older data are never served (and age out of the LRU).
+
+Identical requests arriving while a plan is being computed wait for that computation
+instead of starting their own (single-flight).
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _now():
+    return time.time()
+
+
+def make_plan_key(inputs):
+    """SHA-256 of the canonical JSON form of ``inputs`` (dict keys sorted, compact separators)."""
+    canonical = json.dumps(inputs, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class _Flight:
+    """A computation in progress; followers wait on ``done``."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class PlanCache:
+    """In-memory LRU of plan results with a TTL and single-flight computation."""
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries = OrderedDict()  # key -> (value, created)
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get_or_compute(self, key, compute):
+        """
+        Return (value, source) for ``key``; source is 'hit', 'coalesced' or 'miss'.
+
+        On a miss ``compute()`` runs in the calling thread and its result is stored.
+        Callers with the same key that arrive meanwhile wait for it and get the same
+        value (or its exception). Values are shared and must not be modified.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and _now() - entry[1] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], 'hit'
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, 'coalesced'
+
+        try:
+            flight.value = compute()
+        except Exception as e:
+            flight.error = e
+            raise
+        else:
+            with self._lock:
+                self._entries[key] = (flight.value, _now())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+        return flight.value, 'miss'
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'coalesced': self.coalesced, 'entries': len(self)}
+
+
+def get_plan_cache(max_entries, ttl_seconds):
+    """Return the process-wide plan cache, created on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None or _cache.max_entries != max_entries or _cache.ttl_seconds != ttl_seconds:
+            _cache = PlanCache(max_entries, ttl_seconds)
+        return _cache
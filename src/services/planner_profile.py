@@ -0,0 +1,112 @@
+"""
+Per-run profiling for the task planner.
+
+A PlannerProfile is filled in by assign_tasks while it runs and is cheap enough
+to be collected on every plan: phases are timed with perf_counter and the search
+counters are plain integers accumulated per task definition.
+"""
+import time
+from contextlib import contextmanager
+
+
+class TaskCounters:
+    """Search counters of one pass over a task definition."""
+
+    __slots__ = ('groups_enumerated', 'groups_pruned', 'slot_probes')
+
+    def __init__(self):
+        self.groups_enumerated = 0
+        self.groups_pruned = 0
+        self.slot_probes = 0
+
+
+class PlannerProfile:
+    """Wall time per planner phase plus search counters for one assign_tasks run."""
+
+    PHASES = ('preprocessing', 'exact_solve', 'hp_optimization', 'other_tasks', 'search', 'balancing')
+
+    def __init__(self, top_n=5):
+        self.top_n = top_n
+        self.phase_seconds = {phase: 0.0 for phase in self.PHASES}
+        self.orderings_evaluated = 0
+        self.groups_enumerated = 0
+        self.groups_pruned = 0
+        self.slot_probes = 0
+        self.task_stats = {}
+        self.total_seconds = 0.0
+        self.strategy = None
+        self.solver = None
+        self._started_at = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block of the planner and add it to the named phase."""
+        phase_start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + (time.perf_counter() - phase_start)
+
+    @contextmanager
+    def task(self, task_def):
+        """Time one pass over a task definition; the yielded TaskCounters are recorded with it."""
+        counters = TaskCounters()
+        task_start = time.perf_counter()
+        try:
+            yield counters
+        finally:
+            self.record_task(task_def, time.perf_counter() - task_start,
+                             counters.groups_enumerated, counters.groups_pruned, counters.slot_probes)
+
+    def record_task(self, task_def, elapsed, groups_enumerated, groups_pruned, slot_probes):
+        """Accumulate the cost of one pass over a task definition (called once per ordering)."""
+        task_id = str(task_def.get('id'))
+        stats = self.task_stats.get(task_id)
+        if stats is None:
+            stats = {
+                'task_id': task_id,
+                'name': task_def.get('name', 'Unknown'),
+                'task_type': task_def.get('task_type_upper', task_def.get('task_type', '')),
+                'quantity': task_def.get('quantity', 1),
+                'seconds': 0.0,
+                'passes': 0,
+                'groups_enumerated': 0,
+                'groups_pruned': 0,
+                'slot_probes': 0
+            }
+            self.task_stats[task_id] = stats
+        stats['seconds'] += elapsed
+        stats['passes'] += 1
+        stats['groups_enumerated'] += groups_enumerated
+        stats['groups_pruned'] += groups_pruned
+        stats['slot_probes'] += slot_probes
+
+        self.groups_enumerated += groups_enumerated
+        self.groups_pruned += groups_pruned
+        self.slot_probes += slot_probes
+
+    def finish(self):
+        """Freeze the total wall time of the run."""
+        self.total_seconds = time.perf_counter() - self._started_at
+        return self
+
+    def most_expensive_tasks(self, top_n=None):
+        """Return the N task definitions that consumed the most planner time."""
+        limit = self.top_n if top_n is None else top_n
+        ranked = sorted(self.task_stats.values(), key=lambda s: s['seconds'], reverse=True)
+        return [dict(stats, seconds=round(stats['seconds'], 6)) for stats in ranked[:limit]]
+
+    def to_dict(self):
+        """JSON-serialisable view used by /generate_dashboard and the metrics endpoint."""
+        return {
+            'strategy': self.strategy,
+            'total_seconds': round(self.total_seconds, 6),
+            'phase_seconds': {phase: round(seconds, 6) for phase, seconds in self.phase_seconds.items()},
+            'orderings_evaluated': self.orderings_evaluated,
+            'groups_enumerated': self.groups_enumerated,
+            'groups_pruned': self.groups_pruned,
+            'slot_probes': self.slot_probes,
+            'task_definitions_profiled': len(self.task_stats),
+            'most_expensive_tasks': self.most_expensive_tasks(),
+            'solver': self.solver
+        }
@@ -0,0 +1,353 @@
+"""
+Pluggable planning strategies for assign_tasks.
+
+assign_tasks builds one PlanningContext (preprocessed tasks, technicians, skills, profile,
+trace) and hands it to a strategy, which returns a PlanResult. Balancing, helper skill
+promotion and reporting are shared afterwards, so every strategy produces the same
+output structure. Each strategy has a budget (a dict of knobs) whose defaults live in
+DEFAULT_BUDGETS and can be overridden per deployment or per request.
+
+- greedy: HP permutations for small HP sets, then priority-ordered greedy assignment.
+- beam: builds the task order step by step, keeping the best partial plans.
+- local_search: starts from the greedy plan and improves the task order by swaps.
+- exact: exact model from exact_solver; falls back to greedy for large plans.
+
+beam and local_search evaluate many candidate plans and do not record a decision trace
+(local_search runs its greedy seed untraced as well).
+"""
+import time
+from itertools import permutations
+
+from .task_assigner import (
+    _log, _assign_task_definition_to_schedule, _calculate_hp_assignment_score,
+    MAX_PERMUTATION_TASKS, MAX_TECHS_FOR_COMBINATIONS, GROUP_SIZE_SEARCH_RANGE
+)
+from .exact_solver import solve_exact, PRIORITY_WEIGHTS
+
+_SEARCH_KNOBS = {
+    'max_techs_for_combinations': MAX_TECHS_FOR_COMBINATIONS,
+    'group_size_search_range': GROUP_SIZE_SEARCH_RANGE
+}
+
+DEFAULT_BUDGETS = {
+    'greedy': {'max_permutation_tasks': MAX_PERMUTATION_TASKS, **_SEARCH_KNOBS},
+    'beam': {'beam_width': 4, 'branching': 3, 'time_limit': 5.0, **_SEARCH_KNOBS},
+    'local_search': {'max_iterations': 200, 'time_limit': 5.0, 'max_permutation_tasks': MAX_PERMUTATION_TASKS, **_SEARCH_KNOBS},
+    'exact': {'time_limit': 10.0, 'max_permutation_tasks': MAX_PERMUTATION_TASKS, **_SEARCH_KNOBS}
+}
+
+
+class PlanningContext:
+    """Inputs shared by all strategies, prepared once by assign_tasks."""
+
+    def __init__(self, tasks, hp_tasks, other_tasks, present_technicians, total_work_minutes, db_conn,
+                 rep_assignments, logger, technician_technology_skills, technician_groups,
+                 pm_task_names_normalized, profile, trace=None):
+        self.tasks = tasks
+        self.hp_tasks = hp_tasks
+        self.other_tasks = other_tasks
+        self.present_technicians = present_technicians
+        self.total_work_minutes = total_work_minutes
+        self.db_conn = db_conn
+        self.rep_assignments = rep_assignments
+        self.logger = logger
+        self.technician_technology_skills = technician_technology_skills
+        self.technician_groups = technician_groups
+        self.pm_task_names_normalized = pm_task_names_normalized
+        self.profile = profile
+        self.trace = trace
+        self.under_resourced_tasks = []
+
+    def new_result(self):
+        return PlanResult(self.present_technicians)
+
+    def assign(self, task_def, result, budget, trace=None):
+        """Place every instance of one task definition onto ``result`` (modified in place)."""
+        with self.profile.task(task_def) as counters:
+            _assign_task_definition_to_schedule(
+                task_def, self.present_technicians, self.total_work_minutes, self.rep_assignments, self.logger,
+                result.schedules, result.assignments,
+                result.unassigned, result.incomplete,
+                self.pm_task_names_normalized,
+                self.db_conn,
+                technician_technology_skills=self.technician_technology_skills,
+                under_resourced_tasks=self.under_resourced_tasks,
+                technician_groups=self.technician_groups,
+                counters=counters,
+                trace=trace,
+                max_techs_for_combinations=budget['max_techs_for_combinations'],
+                group_size_search_range=budget['group_size_search_range'],
+                helper_promotions=result.helper_promotions
+            )
+
+
+class PlanResult:
+    """Schedules and outcome of one strategy run, in the structures assign_tasks returns."""
+
+    def __init__(self, present_technicians):
+        self.assignments = []
+        self.schedules = {tech: [] for tech in present_technicians}
+        self.unassigned = {}
+        self.incomplete = []
+        self.helper_promotions = []
+        self.solver = None
+        # Task definitions in the order they were assigned, when the strategy plans by order
+        self.order = []
+
+    def copy(self):
+        clone = PlanResult(())
+        clone.assignments = list(self.assignments)
+        clone.schedules = {tech: list(entries) for tech, entries in self.schedules.items()}
+        clone.unassigned = dict(self.unassigned)
+        clone.incomplete = list(self.incomplete)
+        clone.helper_promotions = list(self.helper_promotions)
+        clone.solver = self.solver
+        clone.order = list(self.order)
+        return clone
+
+    def score(self, tasks_by_id):
+        """Priority-weighted number of planned instances; incomplete instances count half."""
+        planned = {a['instance_id'] for a in self.assignments if a.get('technician')}
+        incomplete = set(self.incomplete)
+        total = 0.0
+        for instance_id in planned:
+            task = tasks_by_id.get(instance_id.rsplit('_', 1)[0])
+            weight = PRIORITY_WEIGHTS.get(task['priority_val'], 1) if task else 1
+            total += weight * (0.5 if instance_id in incomplete else 1.0)
+        return total
+
+
+def _greedy_hp_order(hp_tasks):
+    return sorted(hp_tasks, key=lambda t: (
+        -int(t.get('mitarbeiter_pro_aufgabe', 1)),
+        -int(t.get('planned_worktime_min', 0)),
+        t['id']
+    ))
+
+
+def _greedy_other_order(other_tasks):
+    return sorted(other_tasks, key=lambda t: (
+        t['priority_val'],
+        -int(t.get('mitarbeiter_pro_aufgabe', 1)),
+        -int(t.get('planned_worktime_min', 0)),
+        t['id']
+    ))
+
+
+class PlannerStrategy:
+    """Base class: subclasses set ``name`` and implement plan(context) -> PlanResult."""
+
+    name = None
+
+    def __init__(self, budget=None):
+        self.budget = dict(DEFAULT_BUDGETS[self.name])
+        if budget:
+            self.budget.update({key: value for key, value in budget.items() if key in self.budget})
+
+    def plan(self, context):
+        raise NotImplementedError
+
+
+class GreedyStrategy(PlannerStrategy):
+    """The original planner: HP permutations (small HP sets) followed by greedy assignment."""
+
+    name = 'greedy'
+
+    def plan(self, context, record_trace=True):
+        logger, profile = context.logger, context.profile
+        trace = context.trace if record_trace else None
+        hp_tasks = list(context.hp_tasks)
+        max_permutation_tasks = self.budget['max_permutation_tasks']
+        result = context.new_result()
+
+        with profile.phase('hp_optimization'):
+            if 0 < len(hp_tasks) <= max_permutation_tasks:
+                _log(logger, "info", f"Optimizing {len(hp_tasks)} high-priority tasks using permutations (limit: {max_permutation_tasks}).")
+
+                best_hp_result = None
+                best_hp_overall_score = (-1, float('inf'))
+                best_hp_ordering = 0
+
+                count = 0
+                for p_hp_task_list in permutations(hp_tasks):
+                    count += 1
+                    if trace is not None:
+                        trace.ordering = count
+
+                    current_perm_result = context.new_result()
+                    for task_def in p_hp_task_list:
+                        context.assign(task_def, current_perm_result, self.budget, trace)
+
+                    current_score = _calculate_hp_assignment_score(current_perm_result.assignments, hp_tasks, current_perm_result.unassigned, logger)
+
+                    if current_score > best_hp_overall_score:
+                        best_hp_overall_score = current_score
+                        best_hp_ordering = count
+                        best_hp_result = current_perm_result
+                        best_hp_result.order = list(p_hp_task_list)
+
+                profile.orderings_evaluated = count
+                if trace is not None:
+                    trace.ordering = 0
+                    trace.selected_ordering = best_hp_ordering
+                _log(logger, "info", f"Best HP permutation score: {best_hp_overall_score}. Using this schedule for HP tasks.")
+                result = best_hp_result
+
+            else:
+                if len(hp_tasks) > max_permutation_tasks:
+                    _log(logger, "info", f"Number of high-priority tasks ({len(hp_tasks)}) > {max_permutation_tasks}. Assigning HP tasks greedily.")
+                    hp_tasks = _greedy_hp_order(hp_tasks)
+                    _log(logger, "info", "Greedy HP tasks re-sorted by num_techs (desc), duration (desc), id (asc).")
+                    profile.orderings_evaluated = 1
+                elif not hp_tasks:
+                    _log(logger, "info", "No high-priority tasks to optimize with permutations.")
+
+                for task_def in hp_tasks:
+                    context.assign(task_def, result, self.budget, trace)
+                result.order = list(hp_tasks)
+
+        with profile.phase('other_tasks'):
+            _log(logger, "info", "Assigning other-priority tasks.")
+            other_tasks = _greedy_other_order(context.other_tasks)
+            _log(logger, "info", "Other-priority tasks re-sorted by prio (asc), num_techs (desc), duration (desc), id (asc).")
+
+            for task_def in other_tasks:
+                context.assign(task_def, result, self.budget, trace)
+            result.order.extend(other_tasks)
+
+        return result
+
+
+class BeamStrategy(PlannerStrategy):
+    """
+    Builds the task order one definition at a time. At each step every kept partial plan is
+    extended with each of the next ``branching`` tasks in greedy order, and the
+    ``beam_width`` best partial plans survive.
+    """
+
+    name = 'beam'
+
+    def plan(self, context):
+        tasks_by_id = {str(t['id']): t for t in context.tasks}
+        order = _greedy_hp_order(context.hp_tasks) + _greedy_other_order(context.other_tasks)
+        beam_width = max(1, int(self.budget['beam_width']))
+        branching = max(1, int(self.budget['branching']))
+        deadline = time.perf_counter() + self.budget['time_limit']
+
+        with context.profile.phase('search'):
+            beam = [(context.new_result(), order)]
+            while beam[0][1]:
+                if time.perf_counter() > deadline:
+                    # Out of budget: finish the best partial plan in greedy order
+                    result, remaining = beam[0]
+                    for task_def in remaining:
+                        context.assign(task_def, result, self.budget)
+                    beam = [(result, [])]
+                    break
+                expanded = []
+                for result, remaining in beam:
+                    for index in range(min(branching, len(remaining))):
+                        child = result.copy()
+                        context.assign(remaining[index], child, self.budget)
+                        expanded.append((child, remaining[:index] + remaining[index + 1:]))
+                        context.profile.orderings_evaluated += 1
+                expanded.sort(key=lambda entry: -entry[0].score(tasks_by_id))
+                beam = expanded[:beam_width]
+
+        result = beam[0][0]
+        _log(context.logger, "info", f"Beam planner kept the best of {context.profile.orderings_evaluated} partial plans (width {beam_width}, branching {branching}).")
+        return result
+
+
+class LocalSearchStrategy(PlannerStrategy):
+    """
+    Starts from the greedy plan and tries swapping pairs of task definitions in the
+    order greedy assigned them, keeping any order that plans more priority-weighted work.
+    """
+
+    name = 'local_search'
+
+    def plan(self, context):
+        tasks_by_id = {str(t['id']): t for t in context.tasks}
+        # The seed is only a starting point, so its HP orderings are not traced
+        best = GreedyStrategy(self.budget).plan(context, record_trace=False)
+        best_score = best.score(tasks_by_id)
+        order = best.order
+        deadline = time.perf_counter() + self.budget['time_limit']
+        iterations = 0
+
+        with context.profile.phase('search'):
+            improved = True
+            while improved and iterations < self.budget['max_iterations'] and time.perf_counter() < deadline:
+                improved = False
+                for i in range(len(order) - 1):
+                    for j in range(i + 1, len(order)):
+                        if iterations >= self.budget['max_iterations'] or time.perf_counter() >= deadline:
+                            break
+                        if order[i]['priority_val'] != order[j]['priority_val']:
+                            continue
+                        iterations += 1
+                        candidate_order = list(order)
+                        candidate_order[i], candidate_order[j] = candidate_order[j], candidate_order[i]
+                        candidate = context.new_result()
+                        for task_def in candidate_order:
+                            context.assign(task_def, candidate, self.budget)
+                        candidate.order = candidate_order
+                        candidate_score = candidate.score(tasks_by_id)
+                        if candidate_score > best_score:
+                            best, best_score, order = candidate, candidate_score, candidate_order
+                            improved = True
+                            break
+                    if improved:
+                        break
+
+        context.profile.orderings_evaluated += iterations
+        _log(context.logger, "info", f"Local search evaluated {iterations} task orders. Best score: {best_score:.1f}.")
+        return best
+
+
+class ExactStrategy(PlannerStrategy):
+    """Exact model with a time limit; plans above the model size limits use the greedy strategy."""
+
+    name = 'exact'
+
+    def plan(self, context):
+        with context.profile.phase('exact_solve'):
+            solution = solve_exact(
+                context.tasks, context.present_technicians, context.total_work_minutes, context.rep_assignments,
+                context.technician_technology_skills, context.logger, time_limit=self.budget['time_limit'],
+                trace=context.trace, profile=context.profile,
+                max_techs_for_combinations=self.budget['max_techs_for_combinations'],
+                group_size_search_range=self.budget['group_size_search_range']
+            )
+        if solution is None:
+            _log(context.logger, "info", "Exact planner unavailable for this plan. Falling back to the heuristic planner.")
+            return GreedyStrategy(self.budget).plan(context)
+
+        result = context.new_result()
+        result.assignments = solution.assignments
+        result.schedules = solution.schedules
+        result.unassigned = solution.unassigned
+        result.incomplete = solution.incomplete
+        for task_def, group in solution.helper_assignments:
+            technology_ids = task_def.get('technology_ids', [])
+            helpers_in_group = [tech for tech in group if not any(
+                context.technician_technology_skills.get(tech, {}).get(tech_id, 0) > 0 for tech_id in technology_ids
+            )]
+            result.helper_promotions.append((helpers_in_group, technology_ids, task_def['id'], task_def.get('name', 'Unknown')))
+        for entry in solution.under_resourced:
+            if not any(t['task_id'] == entry['task_id'] for t in context.under_resourced_tasks):
+                context.under_resourced_tasks.append(entry)
+        result.solver = solution.stats()
+        return result
+
+
+STRATEGIES = {strategy.name: strategy for strategy in (GreedyStrategy, BeamStrategy, LocalSearchStrategy, ExactStrategy)}
+
+
+def get_strategy(name, budget=None):
+    """Instantiate a strategy by name; raises ValueError for unknown names."""
+    strategy_class = STRATEGIES.get((name or 'greedy').lower())
+    if strategy_class is None:
+        raise ValueError(f"Unknown planner strategy '{name}'. Available: {', '.join(sorted(STRATEGIES))}")
+    return strategy_class(budget)
@@ -0,0 +1,70 @@
+"""
+Structured decision trace for the task planner.
+
+Instead of formatting a log line per task instance, the planner appends one compact
+tuple per decision to a bounded ring buffer. The trace is disabled by default; the
+planner checks ``enabled`` once per task definition, so a disabled trace costs a
+single attribute lookup and no string formatting.
+"""
+import json
+from collections import deque
+
+# Reason codes recorded for each task instance
+SCHEDULED = 'scheduled'
+SCHEDULED_INCOMPLETE = 'scheduled_incomplete'
+NO_TECHNOLOGY_IDS = 'no_technology_ids'
+NO_ELIGIBLE_TECHNICIANS = 'no_eligible_technicians'
+NO_VIABLE_GROUP = 'no_viable_group'
+NO_SLOT = 'no_slot'
+REP_NOT_RECEIVED = 'rep_not_received'
+REP_SKIPPED = 'rep_skipped'
+REP_ZERO_WORK = 'rep_zero_work'
+
+FIELDS = ('ordering', 'instance_id', 'task_type', 'reason', 'candidates', 'group', 'start', 'duration')
+
+
+class DecisionTrace:
+    """
+    Ring buffer of planner decisions: one tuple per task instance and ordering.
+
+    ``ordering`` is 0 outside the HP permutation search; ``selected_ordering`` names the
+    permutation whose HP schedule was kept.
+    """
+
+    def __init__(self, capacity=5000, enabled=False):
+        self.enabled = enabled
+        self.capacity = capacity
+        self.ordering = 0
+        self.selected_ordering = 0
+        self.dropped = 0
+        self._records = deque(maxlen=capacity)
+
+    def record(self, instance_id, task_type, reason, candidates=0, group=None, start=None, duration=None):
+        """Append a decision; the oldest entry is dropped once the buffer is full."""
+        if len(self._records) == self.capacity:
+            self.dropped += 1
+        self._records.append((
+            self.ordering, instance_id, task_type, reason, candidates,
+            tuple(group) if group else None, start, duration
+        ))
+
+    def __len__(self):
+        return len(self._records)
+
+    def records(self):
+        """Return the buffered decisions as dicts keyed by FIELDS."""
+        return [dict(zip(FIELDS, entry)) for entry in self._records]
+
+    def to_dict(self):
+        """JSON-serialisable view of the trace for one plan."""
+        return {
+            'enabled': self.enabled,
+            'capacity': self.capacity,
+            'dropped': self.dropped,
+            'selected_ordering': self.selected_ordering,
+            'fields': list(FIELDS),
+            'records': [list(entry) for entry in self._records]
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
@@ -0,0 +1,265 @@
+"""
+Storage of uploaded Excel rows per browser session.
+
+/upload keeps the extracted rows of a session until the dashboard is generated. The
+store hides where they live:
+
+* MemorySessionStore keeps entries in the process. Expiry is driven by a min-heap of
+  deadlines, so a lookup only pops the entries that actually expired instead of
+  sweeping every session, and the total payload size is bounded by evicting the least
+  recently used sessions.
+* SqliteSessionStore keeps entries in a SQLite file, so every worker process of a
+  multi-process server sees the same sessions. The same TTL and size bound apply.
+
+The state of background upload jobs is kept in a second store of the same backend
+(table ``upload_jobs``), so any worker can answer for a job another worker runs.
+
+Payloads are stored as zlib-compressed compact JSON; a session that is read or touched
+gets a fresh TTL.
+"""
+import contextlib
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+BACKENDS = ('memory', 'sqlite')
+# Tables of the sqlite backend: browser sessions and background upload jobs (see upload_jobs)
+TABLES = ('sessions', 'upload_jobs')
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _now():
+    return time.time()
+
+
+def encode_payload(entry):
+    return zlib.compress(json.dumps(entry, separators=(',', ':'), default=str).encode('utf-8'))
+
+
+def decode_payload(blob):
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+
+class SessionStore:
+    """Interface of the session stores; entries are JSON-serializable dicts."""
+
+    def get(self, session_id):
+        """The entry of a live session, or None if it is unknown or expired."""
+        raise NotImplementedError
+
+    def put(self, session_id, entry):
+        """Store ``entry`` for ``session_id`` with a fresh TTL."""
+        raise NotImplementedError
+
+    def touch(self, session_id):
+        """Extend the TTL of a live session; returns False if there is none."""
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        raise NotImplementedError
+
+    def __contains__(self, session_id):
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """Per-process store with heap-driven expiry and a byte-size-bounded LRU."""
+
+    def __init__(self, ttl_seconds, max_bytes):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        # session_id -> (payload, expires_at), least recently used first
+        self._entries = OrderedDict()
+        # (expires_at, session_id); stale items (touched or replaced sessions) are skipped when popped
+        self._deadlines = []
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self._size
+
+    def __len__(self):
+        with self._lock:
+            self._expire(_now())
+            return len(self._entries)
+
+    def _expire(self, now):
+        while self._deadlines and self._deadlines[0][0] <= now:
+            expires_at, session_id = heapq.heappop(self._deadlines)
+            current = self._entries.get(session_id)
+            if current is not None and current[1] == expires_at:
+                self._remove(session_id)
+
+    def _remove(self, session_id):
+        payload, _ = self._entries.pop(session_id)
+        self._size -= len(payload)
+
+    def _live(self, session_id, now):
+        self._expire(now)
+        return self._entries.get(session_id)
+
+    def _schedule(self, session_id, payload, now):
+        expires_at = now + self.ttl_seconds
+        self._entries[session_id] = (payload, expires_at)
+        self._entries.move_to_end(session_id)
+        heapq.heappush(self._deadlines, (expires_at, session_id))
+        # Every refresh leaves a stale deadline behind; rebuild once they dominate the heap
+        if len(self._deadlines) > 2 * len(self._entries) + 64:
+            self._deadlines = [(expires, sid) for sid, (_, expires) in self._entries.items()]
+            heapq.heapify(self._deadlines)
+
+    def get(self, session_id):
+        with self._lock:
+            now = _now()
+            current = self._live(session_id, now)
+            if current is None:
+                return None
+            self._schedule(session_id, current[0], now)
+            payload = current[0]
+        return decode_payload(payload)
+
+    def put(self, session_id, entry):
+        payload = encode_payload(entry)
+        with self._lock:
+            now = _now()
+            self._expire(now)
+            if session_id in self._entries:
+                self._remove(session_id)
+            self._schedule(session_id, payload, now)
+            self._size += len(payload)
+            # The newest session is always kept, even if it alone exceeds the bound
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+
+    def touch(self, session_id):
+        with self._lock:
+            now = _now()
+            current = self._live(session_id, now)
+            if current is None:
+                return False
+            self._schedule(session_id, current[0], now)
+            return True
+
+    def delete(self, session_id):
+        with self._lock:
+            if session_id in self._entries:
+                self._remove(session_id)
+
+    def __contains__(self, session_id):
+        with self._lock:
+            return self._live(session_id, _now()) is not None
+
+
+class SqliteSessionStore(SessionStore):
+    """Store shared by every process that opens the same SQLite file."""
+
+    def __init__(self, path, ttl_seconds, max_bytes, table='sessions'):
+        if table not in TABLES:
+            raise ValueError(f"Unknown session store table '{table}'")
+        self.path = path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    session_id TEXT PRIMARY KEY,
+                    payload BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_expires_at ON {self.table} (expires_at)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_last_access ON {self.table} (last_access)")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """A short-lived connection per call (safe across threads and processes), committed and closed on exit."""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _refresh(self, conn, session_id, now):
+        cursor = conn.execute(
+            f"UPDATE {self.table} SET expires_at = ?, last_access = ? WHERE session_id = ? AND expires_at > ?",
+            (now + self.ttl_seconds, now, session_id, now)
+        )
+        return cursor.rowcount > 0
+
+    def get(self, session_id):
+        now = _now()
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT payload FROM {self.table} WHERE session_id = ? AND expires_at > ?", (session_id, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._refresh(conn, session_id, now)
+        return decode_payload(row[0])
+
+    def put(self, session_id, entry):
+        payload = encode_payload(entry)
+        now = _now()
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (session_id, payload, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (session_id, payload, len(payload), now + self.ttl_seconds, now)
+            )
+            total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+            if total > self.max_bytes:
+                evicted = 0
+                for other_id, size in conn.execute(
+                        f"SELECT session_id, size FROM {self.table} WHERE session_id != ? ORDER BY last_access", (session_id,)
+                ).fetchall():
+                    if total - evicted <= self.max_bytes:
+                        break
+                    conn.execute(f"DELETE FROM {self.table} WHERE session_id = ?", (other_id,))
+                    evicted += size
+
+    def touch(self, session_id):
+        with self._connect() as conn:
+            return self._refresh(conn, session_id, _now())
+
+    def delete(self, session_id):
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {self.table} WHERE session_id = ?", (session_id,))
+
+    def __contains__(self, session_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT 1 FROM {self.table} WHERE session_id = ? AND expires_at > ?", (session_id, _now())
+            ).fetchone()
+        return row is not None
+
+
+def get_session_store(backend, ttl_seconds, max_bytes, path=None, table='sessions'):
+    """Return the process-wide store for these settings, created on first use."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown session store backend '{backend}'. Available: {', '.join(BACKENDS)}.")
+    key = (backend, path if backend == 'sqlite' else None, table)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None or store.ttl_seconds != ttl_seconds or store.max_bytes != max_bytes:
+            if backend == 'sqlite':
+                store = SqliteSessionStore(path, ttl_seconds, max_bytes, table)
+            else:
+                store = MemorySessionStore(ttl_seconds, max_bytes)
+            _stores[key] = store
+        return store
@@ -0,0 +1,83 @@
+"""
+Process-wide snapshot of technician skills.
+
+The planner needs every technician's skill level per technology. Instead of reading the
+whole technician_technology_skills table on each /generate_dashboard, the skills are
+loaded once into a SkillSnapshot tagged with the database's 'skills' data version.
+Triggers created by init_db() bump that version on every write to technicians or their
+skills -- the skill API, the technician and technology APIs and the planner's helper
+promotions alike, from any process -- so a request only reads the version row and
+reloads the snapshot when it changed.
+
+Snapshots are shared between requests and must not be modified.
+"""
+import threading
+
+import numpy as np
+
+from .db_utils import SKILLS_DATA_VERSION, get_all_technician_skills_by_name, get_data_version
+
+_snapshots = {}
+_lock = threading.Lock()
+
+
+class SkillSnapshot:
+    """Skill levels as {technician_name: {technology_id: level}} and as a dense matrix."""
+
+    def __init__(self, by_name, version=None):
+        self.by_name = by_name
+        self.version = version
+        self.technicians = sorted(by_name)
+        self.technology_ids = sorted({technology_id for skills in by_name.values() for technology_id in skills})
+        self.technician_index = {name: i for i, name in enumerate(self.technicians)}
+        self.technology_index = {technology_id: j for j, technology_id in enumerate(self.technology_ids)}
+        self._matrix = None
+
+    @classmethod
+    def from_connection(cls, conn, version=None):
+        return cls(get_all_technician_skills_by_name(conn), version)
+
+    @property
+    def matrix(self):
+        """Levels as an int8 array, rows in ``technicians`` and columns in ``technology_ids`` order (0 = no skill)."""
+        if self._matrix is None:
+            matrix = np.zeros((len(self.technicians), len(self.technology_ids)), dtype=np.int8)
+            for name, skills in self.by_name.items():
+                row = self.technician_index[name]
+                for technology_id, level in skills.items():
+                    matrix[row, self.technology_index[technology_id]] = level or 0
+            matrix.setflags(write=False)
+            self._matrix = matrix
+        return self._matrix
+
+    def level(self, technician_name, technology_id):
+        return self.by_name.get(technician_name, {}).get(technology_id, 0)
+
+
+def get_skill_snapshot(conn, cache_key):
+    """
+    Return the snapshot for ``cache_key`` (the database path), reloading it if the
+    database's skills version changed. Databases without version triggers are read on
+    every call.
+    """
+    # Read the version before the skills: a write in between only causes one extra reload
+    version = get_data_version(conn, SKILLS_DATA_VERSION)
+    if version is not None:
+        with _lock:
+            snapshot = _snapshots.get(cache_key)
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+    snapshot = SkillSnapshot.from_connection(conn, version)
+    if version is not None:
+        with _lock:
+            _snapshots[cache_key] = snapshot
+    return snapshot
+
+
+def invalidate_skill_snapshot(cache_key=None):
+    """Drop the cached snapshot of ``cache_key`` (or all of them), e.g. after replacing the database file."""
+    with _lock:
+        if cache_key is None:
+            _snapshots.clear()
+        else:
+            _snapshots.pop(cache_key, None)
@@ -1,8 +1,11 @@
 # src/task_assigner.py
 
-from itertools import combinations, permutations # Ensure permutations is imported
+from itertools import combinations
 from .data_processing import normalize_string
 from .config_manager import TASK_NAME_MAPPING, TECHNICIAN_TASKS, TECHNICIAN_LINES # Corrected relative import
+from .planner_profile import PlannerProfile, TaskCounters
+from . import planner_trace
+from .logging_config import metrics_collector
 from ..services.db_utils import update_technician_skill, log_technician_skill_update
 
 # Maximum number of high-priority tasks to consider for permutation-based optimization.
@@ -62,6 +65,40 @@ def _calculate_hp_assignment_score(hp_assignments_details, hp_tasks_in_permutati
 
     return (num_fully_assigned_hp_task_definitions, -penalty_score_from_unassigned_or_incomplete)
 
+def _promote_helper_skills(db_conn, helpers_in_group, task_technology_ids, task_id, task_name_excel, logger):
+    """Raise helpers' skill level from 0 to 1 for the technologies of the task they were assigned to."""
+    if not helpers_in_group:
+        return
+    helper_names_str = ', '.join(helpers_in_group)
+    _log(logger, "info", f"Helper(s) assigned to task {task_name_excel} (ID: {task_id}): {helper_names_str}")
+    try:
+        cursor = db_conn.cursor()
+        for helper_name in helpers_in_group:
+            cursor.execute("SELECT id FROM technicians WHERE name = ?", (helper_name,))
+            helper_row = cursor.fetchone()
+            if not helper_row:
+                continue
+            helper_id = helper_row[0]
+            for tech_id in task_technology_ids:
+                cursor.execute("SELECT skill_level FROM technician_technology_skills WHERE technician_id = ? AND technology_id = ?", (helper_id, tech_id))
+                skill_row = cursor.fetchone()
+                prev_level = skill_row[0] if skill_row else 0
+                if prev_level == 0:
+                    update_technician_skill(db_conn, helper_id, tech_id, 1)
+                    log_technician_skill_update(
+                        db_conn,
+                        helper_id,
+                        tech_id,
+                        task_id,
+                        prev_level,
+                        1,
+                        f"Worked on task {task_name_excel} and level updated: 0 -> 1"
+                    )
+                    _log(logger, "info", f"Helper {helper_name} skill for technology {tech_id} updated from 0 to 1 due to assignment to {task_name_excel}")
+        db_conn.commit()
+    except Exception as e:
+        _log(logger, "warning", f"Helper skill update/logging failed for task {task_name_excel} (ID: {task_id}): {e}")
+
 def _assign_task_definition_to_schedule(
     task_to_assign, present_technicians, total_work_minutes, rep_assignments, logger,
     technician_schedules, all_task_assignments_details,
@@ -70,14 +107,32 @@ def _assign_task_definition_to_schedule(
     db_conn, # Pass the database connection
     technician_technology_skills=None,
     under_resourced_tasks=None,
-    technician_groups=None
+    technician_groups=None,
+    counters=None,
+    trace=None,
+    max_techs_for_combinations=None,
+    group_size_search_range=None,
+    helper_promotions=None
 ):
     """
     Processes a single task definition (which may have multiple instances due to quantity)
     and attempts to assign its instances to the provided schedules.
     This function encapsulates the main loop body from the original assign_tasks.
     Modifies technician_schedules, all_task_assignments_details, etc., in-place.
+    The candidate groups and slot probes it tries are counted on ``counters`` (see
+    PlannerProfile.task, which also times the call).
+    When an enabled DecisionTrace is passed, one entry per instance is appended to it.
+    max_techs_for_combinations / group_size_search_range override the module defaults, and
+    when a helper_promotions list is passed, helper skill promotions are collected there
+    instead of being written, so that only the plan finally kept updates the database.
     """
+    tracing = trace is not None and trace.enabled
+    if max_techs_for_combinations is None:
+        max_techs_for_combinations = MAX_TECHS_FOR_COMBINATIONS
+    if group_size_search_range is None:
+        group_size_search_range = GROUP_SIZE_SEARCH_RANGE
+    if counters is None:
+        counters = TaskCounters()
     task_id = task_to_assign['id']
     task_name_excel = task_to_assign.get('name', 'Unknown')
     task_type = task_to_assign['task_type_upper']
@@ -111,13 +166,16 @@ def _assign_task_definition_to_schedule(
         _log(logger, "warning", f"Task definition {task_name_excel} (ID: {task_id}) unassigned for all {quantity} instances: {reason}")
         return
 
-    task_lines_str = str(task_to_assign.get('lines', ''))
-    task_lines_list = []
-    if task_lines_str and task_lines_str.lower() != 'nan' and task_lines_str.strip() != '':
-        try:
-            task_lines_list = [int(line.strip()) for line in task_lines_str.split(',') if line.strip().isdigit()]
-        except ValueError:
-            _log(logger, "warning", f"  Warning ({task_type}): Invalid line format '{task_lines_str}' for task {task_name_excel}")
+    # Typed session tasks carry their parsed lines (see build_typed_tasks)
+    task_lines_list = task_to_assign.get('line_numbers')
+    if task_lines_list is None:
+        task_lines_str = str(task_to_assign.get('lines', ''))
+        task_lines_list = []
+        if task_lines_str and task_lines_str.lower() != 'nan' and task_lines_str.strip() != '':
+            try:
+                task_lines_list = [int(line.strip()) for line in task_lines_str.split(',') if line.strip().isdigit()]
+            except ValueError:
+                _log(logger, "warning", f"  Warning ({task_type}): Invalid line format '{task_lines_str}' for task {task_name_excel}")
 
     for instance_num in range(1, quantity + 1):
         instance_id_str = f"{task_id}_{instance_num}"
@@ -126,11 +184,10 @@ def _assign_task_definition_to_schedule(
         last_known_failure_reason_for_instance = f"Could not find a suitable time slot or group for {instance_task_display_name}."
 
         if task_type == 'PM' and not is_additional_task_flag:
-            _log(logger, "debug", f"    (Helper) Assigning Standard PM instance: {instance_task_display_name}, Required Technology IDs: {task_technology_ids}")
-
             if not task_technology_ids:
                 last_known_failure_reason_for_instance = f"Skipped (PM): Task {task_name_excel} (ID: {task_id}) has no required technology_ids defined."
                 unassigned_tasks_reasons_dict[instance_id_str] = last_known_failure_reason_for_instance
+                if tracing: trace.record(instance_id_str, task_type, planner_trace.NO_TECHNOLOGY_IDS)
                 _log(logger, "warning", f"      {last_known_failure_reason_for_instance}")
                 continue
 
@@ -166,6 +223,7 @@ def _assign_task_definition_to_schedule(
             if not eligible_technicians_details_pm:
                 last_known_failure_reason_for_instance = "No technicians eligible for this PM task (possess at least one skill > 0, meet line/task mapping)."
                 unassigned_tasks_reasons_dict[instance_id_str] = last_known_failure_reason_for_instance
+                if tracing: trace.record(instance_id_str, task_type, planner_trace.NO_ELIGIBLE_TECHNICIANS)
                 _log(logger, "warning", f"      {last_known_failure_reason_for_instance} for {instance_task_display_name}")
                 continue
 
@@ -186,8 +244,8 @@ def _assign_task_definition_to_schedule(
 
             eligible_technicians_details_pm.sort(key=get_tech_score, reverse=True)
 
-            if len(eligible_technicians_details_pm) > MAX_TECHS_FOR_COMBINATIONS:
-                eligible_technicians_details_pm = eligible_technicians_details_pm[:MAX_TECHS_FOR_COMBINATIONS]
+            if len(eligible_technicians_details_pm) > max_techs_for_combinations:
+                eligible_technicians_details_pm = eligible_technicians_details_pm[:max_techs_for_combinations]
 
             sorted_eligible_tech_names_pm = [d['name'] for d in eligible_technicians_details_pm]
             tech_details_map_pm = {d['name']: d for d in eligible_technicians_details_pm}
@@ -196,8 +254,8 @@ def _assign_task_definition_to_schedule(
             
             possible_sizes_to_try = []
             if num_technicians_needed > 0 and len(sorted_eligible_tech_names_pm) > 0:
-                min_size = max(1, num_technicians_needed - GROUP_SIZE_SEARCH_RANGE)
-                max_size = min(len(sorted_eligible_tech_names_pm), num_technicians_needed + GROUP_SIZE_SEARCH_RANGE)
+                min_size = max(1, num_technicians_needed - group_size_search_range)
+                max_size = min(len(sorted_eligible_tech_names_pm), num_technicians_needed + group_size_search_range)
                 
                 unique_sizes = set()
                 for i in range(min_size, max_size + 1):
@@ -210,6 +268,7 @@ def _assign_task_definition_to_schedule(
             
             for r_actual_group_size in possible_sizes_to_try:
                 for group_tuple in combinations(sorted_eligible_tech_names_pm, r_actual_group_size):
+                    counters.groups_enumerated += 1
                     group_tech_names = list(group_tuple)
                     if not group_tech_names: continue
 
@@ -218,6 +277,7 @@ def _assign_task_definition_to_schedule(
                         group_skills_possessed_by_id.update(tech_details_map_pm[tech_name_in_group]['relevant_skills'].keys())
 
                     if not set(task_technology_ids).issubset(group_skills_possessed_by_id):
+                        counters.groups_pruned += 1
                         continue
 
                     per_skill_avg_levels = {}
@@ -287,9 +347,11 @@ def _assign_task_definition_to_schedule(
                             group_skills_possessed_by_id.update(tech_details_map_pm[tech_name_in_group]['relevant_skills'].keys())
                         
                         if not set(task_technology_ids).issubset(group_skills_possessed_by_id):
+                            counters.groups_pruned += 1
                             continue
 
                         for helper_group_tuple in combinations(all_helper_names, num_helpers_needed):
+                            counters.groups_enumerated += 1
                             group_tech_names = skilled_names + list(helper_group_tuple)
                             
                             per_skill_avg_levels = {}
@@ -354,6 +416,7 @@ def _assign_task_definition_to_schedule(
 
                 unassigned_tasks_reasons_dict[instance_id_str] = last_known_failure_reason_for_instance
                 _log(logger, "warning", f"      {last_known_failure_reason_for_instance} for {instance_task_display_name}")
+                if tracing: trace.record(instance_id_str, task_type, planner_trace.NO_VIABLE_GROUP)
                 continue
 
             assignment_successful_this_instance = False
@@ -378,6 +441,7 @@ def _assign_task_definition_to_schedule(
                 is_incomplete_for_slot = False
 
                 while search_start_time <= total_work_minutes:
+                    counters.slot_probes += 1
                     if current_effective_duration == 0 and search_start_time > total_work_minutes: break
                     if current_effective_duration > 0 and search_start_time >= total_work_minutes: break
 
@@ -432,36 +496,10 @@ def _assign_task_definition_to_schedule(
 
                 if final_is_helper_group:
                     helpers_in_group = [tech for tech in final_chosen_group_for_instance if tech not in tech_details_map_pm]
-                    if helpers_in_group:
-                        helper_names_str = ', '.join(helpers_in_group)
-                        _log(logger, "info", f"Helper(s) assigned to task {task_name_excel} (ID: {task_id}): {helper_names_str}")
-                        try:
-                            cursor = db_conn.cursor()
-                            for helper_name in helpers_in_group:
-                                cursor.execute("SELECT id FROM technicians WHERE name = ?", (helper_name,))
-                                helper_row = cursor.fetchone()
-                                if not helper_row:
-                                    continue
-                                helper_id = helper_row[0]
-                                for tech_id in task_technology_ids:
-                                    cursor.execute("SELECT skill_level FROM technician_technology_skills WHERE technician_id = ? AND technology_id = ?", (helper_id, tech_id))
-                                    skill_row = cursor.fetchone()
-                                    prev_level = skill_row[0] if skill_row else 0
-                                    if prev_level == 0:
-                                        update_technician_skill(db_conn, helper_id, tech_id, 1)
-                                        log_technician_skill_update(
-                                            db_conn,
-                                            helper_id,
-                                            tech_id,
-                                            task_id,
-                                            prev_level,
-                                            1,
-                                            f"Worked on task {task_name_excel} and level updated: 0 -> 1"
-                                        )
-                                        _log(logger, "info", f"Helper {helper_name} skill for technology {tech_id} updated from 0 to 1 due to assignment to {task_name_excel}")
-                            db_conn.commit()
-                        except Exception as e:
-                            _log(logger, "warning", f"Helper skill update/logging failed for task {task_name_excel} (ID: {task_id}): {e}")
+                    if helper_promotions is not None:
+                        helper_promotions.append((helpers_in_group, task_technology_ids, task_id, task_name_excel))
+                    else:
+                        _promote_helper_skills(db_conn, helpers_in_group, task_technology_ids, task_id, task_name_excel, logger)
 
                 resource_mismatch_note_pm = None
                 if num_technicians_needed > 0:
@@ -496,25 +534,33 @@ def _assign_task_definition_to_schedule(
                             'technician_task_info': final_technician_task_info,
                             'resource_mismatch_info': resource_mismatch_note_pm
                         })
-                _log(logger, "info", f"    (Helper) Successfully scheduled PM {instance_task_display_name} for group {final_chosen_group_for_instance} at {final_start_time_for_instance} for {final_assigned_duration_for_instance} min. Incomplete: {instance_id_str in incomplete_tasks_instance_ids}. Required skills: {task_technology_ids}")
+                if tracing:
+                    trace.record(
+                        instance_id_str, task_type,
+                        planner_trace.SCHEDULED_INCOMPLETE if instance_id_str in incomplete_tasks_instance_ids else planner_trace.SCHEDULED,
+                        len(viable_groups_with_scores_pm), final_chosen_group_for_instance,
+                        final_start_time_for_instance, final_assigned_duration_for_instance
+                    )
             else:
                 if not last_known_failure_reason_for_instance or "Could not find a suitable time slot" in last_known_failure_reason_for_instance or "No viable technician groups" in last_known_failure_reason_for_instance:
                     last_known_failure_reason_for_instance = f"No suitable group/slot for PM task {instance_task_display_name}. Required skills: {task_technology_ids}"
                 unassigned_tasks_reasons_dict[instance_id_str] = last_known_failure_reason_for_instance
                 _log(logger, "warning", f"      Failed to assign PM instance {instance_task_display_name}. Reason: {last_known_failure_reason_for_instance}")
+                if tracing: trace.record(instance_id_str, task_type, planner_trace.NO_SLOT, len(viable_groups_with_scores_pm))
 
         elif task_type == 'REP':
-            _log(logger, "debug", f"    (Helper) Assigning REP instance: {instance_task_display_name}")
             rep_assignments_map = {item['task_id']: item for item in rep_assignments} if rep_assignments else {}
             assignment_info_rep = rep_assignments_map.get(task_id)
 
             if not assignment_info_rep:
                 last_known_failure_reason_for_instance = "Skipped (REP): Task data not received from UI."
                 unassigned_tasks_reasons_dict[instance_id_str] = last_known_failure_reason_for_instance
+                if tracing: trace.record(instance_id_str, task_type, planner_trace.REP_NOT_RECEIVED)
                 continue
             if assignment_info_rep.get('skipped'):
                 last_known_failure_reason_for_instance = assignment_info_rep.get('skip_reason', "Skipped by user.")
                 unassigned_tasks_reasons_dict[instance_id_str] = last_known_failure_reason_for_instance
+                if tracing: trace.record(instance_id_str, task_type, planner_trace.REP_SKIPPED)
                 continue
 
             selected_tech_assignments_from_ui = assignment_info_rep.get('technicians', [])
@@ -542,11 +588,13 @@ def _assign_task_definition_to_schedule(
                 })
                 assigned_this_instance_flag = True
                 if instance_id_str in unassigned_tasks_reasons_dict: del unassigned_tasks_reasons_dict[instance_id_str]
+                if tracing: trace.record(instance_id_str, task_type, planner_trace.REP_ZERO_WORK)
                 continue
 
             if not eligible_user_selected_techs_rep and num_technicians_needed > 0:
                 last_known_failure_reason_for_instance = "Skipped (REP): None of the user-selected technicians are eligible."
                 unassigned_tasks_reasons_dict[instance_id_str] = last_known_failure_reason_for_instance
+                if tracing: trace.record(instance_id_str, task_type, planner_trace.NO_ELIGIBLE_TECHNICIANS)
                 continue
 
             viable_groups_with_scores_rep = []
@@ -556,6 +604,7 @@ def _assign_task_definition_to_schedule(
 
             for r_size in range(len(other_eligible_techs) + 1):
                 for other_group_tuple in combinations(other_eligible_techs, r_size):
+                    counters.groups_enumerated += 1
                     group = forced_tech_list + list(other_group_tuple)
                     if not group: continue
 
@@ -565,6 +614,7 @@ def _assign_task_definition_to_schedule(
             if not viable_groups_with_scores_rep and num_technicians_needed > 0:
                 last_known_failure_reason_for_instance = "Skipped (REP): No viable groups could be formed from eligible UI-selected techs."
                 unassigned_tasks_reasons_dict[instance_id_str] = last_known_failure_reason_for_instance
+                if tracing: trace.record(instance_id_str, task_type, planner_trace.NO_VIABLE_GROUP)
                 continue
 
             viable_groups_with_scores_rep.sort(key=lambda x: (abs(x['len'] - num_technicians_needed), x['workload'], ''.join(sorted(x['group']))))
@@ -593,6 +643,7 @@ def _assign_task_definition_to_schedule(
 
                 search_start_time_rep = 0
                 while search_start_time_rep <= total_work_minutes:
+                    counters.slot_probes += 1
                     if current_effective_duration_rep == 0 and search_start_time_rep > total_work_minutes: break
                     if current_effective_duration_rep > 0 and search_start_time_rep >= total_work_minutes: break
 
@@ -643,172 +694,118 @@ def _assign_task_definition_to_schedule(
                         'technician_task_info': 'N/A_REP',
                         'resource_mismatch_info': final_resource_mismatch_note_rep
                     })
+                if tracing:
+                    trace.record(
+                        instance_id_str, task_type,
+                        planner_trace.SCHEDULED_INCOMPLETE if instance_id_str in incomplete_tasks_instance_ids else planner_trace.SCHEDULED,
+                        len(viable_groups_with_scores_rep), final_chosen_group_for_rep_instance,
+                        final_start_time_for_rep_instance, final_assigned_duration_for_rep_instance
+                    )
             else:
                 if not last_known_failure_reason_for_instance or "Could not find a suitable time slot" in last_known_failure_reason_for_instance:
                     last_known_failure_reason_for_instance = "No group/slot for REP task from UI selection."
                 unassigned_tasks_reasons_dict[instance_id_str] = last_known_failure_reason_for_instance
+                if tracing: trace.record(instance_id_str, task_type, planner_trace.NO_SLOT, len(viable_groups_with_scores_rep))
 
         if not assigned_this_instance_flag and instance_id_str not in unassigned_tasks_reasons_dict:
             unassigned_tasks_reasons_dict[instance_id_str] = last_known_failure_reason_for_instance
 
-def assign_tasks(tasks, present_technicians, total_work_minutes, db_conn, rep_assignments=None, logger=None, technician_technology_skills=None):
-    _log(logger, "info",
-        f"Unified Assigning (Global Opt Mode): {len(tasks)} tasks with {len(present_technicians)} technicians. Total work minutes: {total_work_minutes}"
-    )
-    if technician_technology_skills is None:
-        technician_technology_skills = {}
-        _log(logger, "warning", "Technician technology skills not provided to assign_tasks. Skill-based assignment will be limited.")
-
-    technician_groups = _get_technician_groups(db_conn)
-
-    priority_order = {'A': 1, 'B': 2, 'C': 3, 'DEFAULT': 4}
-    all_tasks_combined = []
-    under_resourced_tasks = []
-    for task in tasks:
-        task_type = task.get('task_type', '').upper()
-        if task_type in ['PM', 'REP']:
-            current_name = task.get('name')
-            if not current_name:
-                current_name = task.get('scheduler_group_task', 'Unknown Task')
-
-            processed_task = {
-                **task,
-                'name': current_name,
-                'task_type_upper': task_type,
-                'priority_val': priority_order.get(str(task.get('priority', 'C')).upper(), priority_order['DEFAULT'])
-            }
-            all_tasks_combined.append(processed_task)
-
-    all_tasks_combined.sort(key=lambda x: (x['priority_val'], x['id']))
+def assign_tasks(tasks, present_technicians, total_work_minutes, db_conn, rep_assignments=None, logger=None, technician_technology_skills=None, profile=None, trace=None, strategy='greedy', budget=None):
+    """
+    Plans every PM/REP task instance onto the present technicians' schedules.
+    If a PlannerProfile is passed it is filled with per-phase wall time and search counters;
+    the finished profile is always published to metrics_collector.
+    An enabled DecisionTrace receives one structured entry per task instance decision;
+    entries made while evaluating HP permutations carry the ordering number.
+    strategy selects the planning strategy from planner_strategies (greedy, beam,
+    local_search, exact) and budget overrides its default knobs; the solver status and
+    optimality gap of the exact strategy are reported in the profile.
+    """
+    # Imported lazily: the strategies build on this module's assignment helpers
+    from .planner_strategies import PlanningContext, get_strategy
 
-    all_pm_task_names_from_excel_normalized_set = {
-        normalize_string(TASK_NAME_MAPPING.get(t['name'], t['name']))
-        for t in all_tasks_combined if t['task_type_upper'] == 'PM'
-    }
+    planner = get_strategy(strategy, budget)
+    if profile is None:
+        profile = PlannerProfile()
+    profile.strategy = planner.name
 
-    hp_tasks = [t for t in all_tasks_combined if t['priority_val'] == 1]
-    other_tasks = [t for t in all_tasks_combined if t['priority_val'] != 1]
+    with profile.phase('preprocessing'):
+        _log(logger, "info",
+            f"Unified Assigning (Global Opt Mode): {len(tasks)} tasks with {len(present_technicians)} technicians. Total work minutes: {total_work_minutes}"
+        )
+        if technician_technology_skills is None:
+            technician_technology_skills = {}
+            _log(logger, "warning", "Technician technology skills not provided to assign_tasks. Skill-based assignment will be limited.")
+
+        technician_groups = _get_technician_groups(db_conn)
+
+        priority_order = {'A': 1, 'B': 2, 'C': 3, 'DEFAULT': 4}
+        all_tasks_combined = []
+        for task in tasks:
+            task_type = task.get('task_type', '').upper()
+            if task_type in ['PM', 'REP']:
+                current_name = task.get('name')
+                if not current_name:
+                    current_name = task.get('scheduler_group_task', 'Unknown Task')
+
+                processed_task = {
+                    **task,
+                    'name': current_name,
+                    'task_type_upper': task_type,
+                    'priority_val': priority_order.get(str(task.get('priority', 'C')).upper(), priority_order['DEFAULT'])
+                }
+                all_tasks_combined.append(processed_task)
 
-    final_all_task_assignments_details = []
-    final_technician_schedules = {tech: [] for tech in present_technicians}
-    final_unassigned_tasks_reasons_dict = {}
-    final_incomplete_tasks_instance_ids = []
+        all_tasks_combined.sort(key=lambda x: (x['priority_val'], x['id']))
 
-    if 0 < len(hp_tasks) <= MAX_PERMUTATION_TASKS:
-        _log(logger, "info", f"Optimizing {len(hp_tasks)} high-priority tasks using permutations (limit: {MAX_PERMUTATION_TASKS}).")
+        all_pm_task_names_from_excel_normalized_set = {
+            normalize_string(TASK_NAME_MAPPING.get(t['name'], t['name']))
+            for t in all_tasks_combined if t['task_type_upper'] == 'PM'
+        }
 
-        best_hp_overall_assignments = []
-        best_hp_overall_schedules = {}
-        best_hp_overall_unassigned_reasons = {}
-        best_hp_overall_incomplete_ids = []
-        best_hp_overall_score = (-1, float('inf'))
+        hp_tasks = [t for t in all_tasks_combined if t['priority_val'] == 1]
+        other_tasks = [t for t in all_tasks_combined if t['priority_val'] != 1]
 
-        count = 0
-        num_permutations = 0
-        if len(hp_tasks) > 0:
-            num_permutations = 1
-            for i in range(1, len(hp_tasks) + 1): num_permutations *= i
-
-        for p_hp_task_list in permutations(hp_tasks):
-            count += 1
-
-            current_perm_schedules = {tech: [] for tech in present_technicians}
-            current_perm_assignments = []
-            current_perm_unassigned_reasons = {}
-            current_perm_incomplete_ids = []
-
-            for task_def in p_hp_task_list:
-                _assign_task_definition_to_schedule(
-                    task_def, present_technicians, total_work_minutes, rep_assignments, logger,
-                    current_perm_schedules, current_perm_assignments,
-                    current_perm_unassigned_reasons, current_perm_incomplete_ids,
-                    all_pm_task_names_from_excel_normalized_set,
-                    db_conn,
-                    technician_technology_skills=technician_technology_skills,
-                    under_resourced_tasks=under_resourced_tasks,
-                    technician_groups=technician_groups
-                )
-
-            current_score = _calculate_hp_assignment_score(current_perm_assignments, hp_tasks, current_perm_unassigned_reasons, logger)
-
-            if current_score > best_hp_overall_score:
-                best_hp_overall_score = current_score
-                best_hp_overall_assignments = list(current_perm_assignments)
-                best_hp_overall_schedules = {k: list(v) for k, v in current_perm_schedules.items()}
-                best_hp_overall_unassigned_reasons = dict(current_perm_unassigned_reasons)
-                best_hp_overall_incomplete_ids = list(current_perm_incomplete_ids)
-
-        _log(logger, "info", f"Best HP permutation score: {best_hp_overall_score}. Using this schedule for HP tasks.")
-        final_all_task_assignments_details = best_hp_overall_assignments
-        final_technician_schedules = best_hp_overall_schedules
-        final_unassigned_tasks_reasons_dict.update(best_hp_overall_unassigned_reasons)
-        final_incomplete_tasks_instance_ids.extend(iid for iid in best_hp_overall_incomplete_ids if iid not in final_incomplete_tasks_instance_ids)
-
-    else: 
-        if len(hp_tasks) > MAX_PERMUTATION_TASKS:
-            _log(logger, "info", f"Number of high-priority tasks ({len(hp_tasks)}) > {MAX_PERMUTATION_TASKS}. Assigning HP tasks greedily.")
-            hp_tasks.sort(key=lambda t: (
-                -int(t.get('mitarbeiter_pro_aufgabe', 1)),
-                -int(t.get('planned_worktime_min', 0)),
-                t['id']
-            ))
-            _log(logger, "info", "Greedy HP tasks re-sorted by num_techs (desc), duration (desc), id (asc).")
-        elif not hp_tasks:
-             _log(logger, "info", "No high-priority tasks to optimize with permutations.")
-
-        for task_def in hp_tasks:
-            _assign_task_definition_to_schedule(
-                task_def, present_technicians, total_work_minutes, rep_assignments, logger,
-                final_technician_schedules, final_all_task_assignments_details,
-                final_unassigned_tasks_reasons_dict, final_incomplete_tasks_instance_ids,
-                all_pm_task_names_from_excel_normalized_set,
-                db_conn,
-                technician_technology_skills=technician_technology_skills,
-                under_resourced_tasks=under_resourced_tasks,
-                technician_groups=technician_groups
-            )
-
-    _log(logger, "info", "Assigning other-priority tasks.")
-    other_tasks.sort(key=lambda t: (
-        t['priority_val'],
-        -int(t.get('mitarbeiter_pro_aufgabe', 1)),
-        -int(t.get('planned_worktime_min', 0)),
-        t['id']
-    ))
-    _log(logger, "info", "Other-priority tasks re-sorted by prio (asc), num_techs (desc), duration (desc), id (asc).")
-
-    for task_def in other_tasks:
-        _assign_task_definition_to_schedule(
-            task_def, present_technicians, total_work_minutes, rep_assignments, logger,
-            final_technician_schedules, final_all_task_assignments_details,
-            final_unassigned_tasks_reasons_dict, final_incomplete_tasks_instance_ids,
-            all_pm_task_names_from_excel_normalized_set,
-            db_conn,
-            technician_technology_skills=technician_technology_skills,
-            under_resourced_tasks=under_resourced_tasks,
-            technician_groups=technician_groups
+        context = PlanningContext(
+            all_tasks_combined, hp_tasks, other_tasks, present_technicians, total_work_minutes, db_conn,
+            rep_assignments, logger, technician_technology_skills, technician_groups,
+            all_pm_task_names_from_excel_normalized_set, profile, trace
         )
 
-    final_available_time_summary_map = {tech: total_work_minutes for tech in present_technicians}
-    for tech_name_final, schedule_entries_final in final_technician_schedules.items():
-        total_scheduled_time_for_tech = sum(end - start for start, end, _ in schedule_entries_final)
-        final_available_time_summary_map[tech_name_final] -= total_scheduled_time_for_tech
-        if final_available_time_summary_map[tech_name_final] < 0:
-            final_available_time_summary_map[tech_name_final] = 0
-
-    # Balance workload with helpers
-    final_all_task_assignments_details, final_technician_schedules, final_available_time_summary_map = balance_workload_with_helpers(
-        final_all_task_assignments_details,
-        final_technician_schedules,
-        final_available_time_summary_map,
-        present_technicians,
-        total_work_minutes,
-        technician_technology_skills,
-        all_tasks_combined,
-        rep_assignments,
-        logger
-    )
+    result = planner.plan(context)
+    for helpers_in_group, task_technology_ids, task_id, task_name_excel in result.helper_promotions:
+        _promote_helper_skills(db_conn, helpers_in_group, task_technology_ids, task_id, task_name_excel, logger)
+    profile.solver = result.solver
+    final_all_task_assignments_details = result.assignments
+    final_technician_schedules = result.schedules
+    final_unassigned_tasks_reasons_dict = result.unassigned
+    final_incomplete_tasks_instance_ids = result.incomplete
+    under_resourced_tasks = context.under_resourced_tasks
+
+    with profile.phase('balancing'):
+        final_available_time_summary_map = {tech: total_work_minutes for tech in present_technicians}
+        for tech_name_final, schedule_entries_final in final_technician_schedules.items():
+            total_scheduled_time_for_tech = sum(end - start for start, end, _ in schedule_entries_final)
+            final_available_time_summary_map[tech_name_final] -= total_scheduled_time_for_tech
+            if final_available_time_summary_map[tech_name_final] < 0:
+                final_available_time_summary_map[tech_name_final] = 0
+
+        # Balance workload with helpers
+        final_all_task_assignments_details, final_technician_schedules, final_available_time_summary_map = balance_workload_with_helpers(
+            final_all_task_assignments_details,
+            final_technician_schedules,
+            final_available_time_summary_map,
+            present_technicians,
+            total_work_minutes,
+            technician_technology_skills,
+            all_tasks_combined,
+            rep_assignments,
+            logger
+        )
 
+    profile.finish()
+    metrics_collector.record_planner_profile(profile.to_dict())
+    _log(logger, "info", f"Planner profile: {profile.total_seconds:.3f}s total, {profile.orderings_evaluated} HP orderings, {profile.groups_enumerated} candidate groups ({profile.groups_pruned} pruned), {profile.slot_probes} slot probes.")
     _log(logger, "info", f"Unified task assignment process completed. Assigned {len(final_all_task_assignments_details)} task segments.")
     if final_unassigned_tasks_reasons_dict:
         _log(logger, "warning", f"Unassigned task instances: {len(final_unassigned_tasks_reasons_dict)}. Reasons (sample):")
@@ -0,0 +1,168 @@
+"""
+Task-name resolution index.
+
+Maps task names as they appear in the Excel export to ``tasks.id``. Names are matched
+exactly first, then by their normalized form (see normalize_string), then through the
+TASK_NAME_MAPPING aliases, and finally by token overlap (Jaccard similarity) above a
+threshold. A fuzzy match is only accepted when both names carry the same identifier
+tokens (anything with a digit: robot, station, line numbers) in the same order, their
+shared words appear in the same order, and exactly one task qualifies; near-misses are
+logged and the name is treated as a new task. The index is built once per database and
+kept until a task write calls invalidate_task_name_index().
+"""
+import re
+import threading
+
+from .data_processing import normalize_string
+from .config_manager import TASK_NAME_MAPPING
+from .db_utils import TaskManager
+
+# Minimum token Jaccard similarity for the fuzzy fallback
+DEFAULT_FUZZY_THRESHOLD = 0.8
+
+_indexes = {}
+_version = 0
+_lock = threading.Lock()
+
+
+_DIGIT = re.compile(r'\d')
+
+
+def _log(logger, level, message):
+    if logger:
+        getattr(logger, level)(message)
+    else:
+        print(f"[{level.upper()}] {message}")
+
+
+def _token_list(normalized_name):
+    return [token for token in normalized_name.replace('_', ' ').split() if token]
+
+
+def _identifiers(tokens):
+    """Tokens that name a specific thing (R2, 10, line3) rather than describe it."""
+    return [token for token in tokens if _DIGIT.search(token)]
+
+
+def _same_order(tokens, other_tokens, shared):
+    return [token for token in tokens if token in shared] == [token for token in other_tokens if token in shared]
+
+
+class TaskNameIndex:
+    """In-memory lookup from Excel task names to task IDs."""
+
+    def __init__(self, rows, fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD, version=0):
+        self.version = version
+        self.fuzzy_threshold = fuzzy_threshold
+        self._by_name = {}
+        self._by_normalized = {}
+        self._by_token = {}
+        self._token_lists = {}
+        for task_id, name in sorted(rows, key=lambda row: row[0]):
+            self._by_name.setdefault(name, task_id)
+            normalized = normalize_string(name)
+            if normalized and normalized not in self._by_normalized:
+                self._by_normalized[normalized] = task_id
+                tokens = _token_list(normalized)
+                self._token_lists[normalized] = tokens
+                for token in set(tokens):
+                    self._by_token.setdefault(token, set()).add(normalized)
+        # Excel aliases resolve to the task of their canonical database name
+        for excel_name, canonical_name in TASK_NAME_MAPPING.items():
+            task_id = self._by_name.get(canonical_name) or self._by_normalized.get(normalize_string(canonical_name))
+            if task_id is not None:
+                self._by_normalized.setdefault(normalize_string(excel_name), task_id)
+
+    @classmethod
+    def from_connection(cls, conn, fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD, version=0):
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name FROM tasks")
+        return cls([(row[0], row[1]) for row in cursor.fetchall()], fuzzy_threshold, version)
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def resolve(self, name, logger=None):
+        """Return the task ID for an Excel task name, or None if nothing matches well enough."""
+        if not name:
+            return None
+        task_id = self._by_name.get(name)
+        if task_id is not None:
+            return task_id
+        normalized = normalize_string(name)
+        task_id = self._by_normalized.get(normalized)
+        if task_id is not None:
+            return task_id
+        return self._resolve_fuzzy(name, normalized, logger)
+
+    def _resolve_fuzzy(self, name, normalized, logger=None):
+        token_list = _token_list(normalized)
+        tokens = set(token_list)
+        if not tokens:
+            return None
+        candidates = set()
+        for token in tokens:
+            candidates.update(self._by_token.get(token, ()))
+        identifiers = _identifiers(token_list)
+        accepted, rejected = [], []
+        for key in sorted(candidates):
+            key_list = self._token_lists[key]
+            key_tokens = set(key_list)
+            score = len(tokens & key_tokens) / len(tokens | key_tokens)
+            if score < self.fuzzy_threshold:
+                continue
+            if _identifiers(key_list) == identifiers and _same_order(token_list, key_list, tokens & key_tokens):
+                accepted.append(key)
+            else:
+                rejected.append(key)
+        if len(accepted) == 1:
+            return self._by_normalized[accepted[0]]
+        if accepted or rejected:
+            reason = "several tasks match" if len(accepted) > 1 else "numbers or word order differ"
+            _log(logger, "info", f"Task name '{name}' is close to {accepted + rejected} but {reason}; not matched")
+        return None
+
+
+def get_task_name_index(conn, cache_key, fuzzy_threshold=DEFAULT_FUZZY_THRESHOLD):
+    """Return the process-wide index for ``cache_key`` (the database path), rebuilding it if stale."""
+    with _lock:
+        index = _indexes.get(cache_key)
+        if index is not None and index.version == _version and index.fuzzy_threshold == fuzzy_threshold:
+            return index
+        version = _version
+    index = TaskNameIndex.from_connection(conn, fuzzy_threshold, version)
+    with _lock:
+        _indexes[cache_key] = index
+    return index
+
+
+def invalidate_task_name_index():
+    """Mark every cached index stale; called after tasks are created, renamed or deleted."""
+    global _version
+    with _lock:
+        _version += 1
+
+
+def resolve_tasks(conn, index, task_names, logger=None):
+    """
+    {name: (task_id, [technology_ids])} for every name in ``task_names``.
+
+    Names are resolved through ``index`` first; the rest are looked up and, if missing,
+    created in bulk. Required skills of all tasks come from one grouped query, and the
+    whole resolution runs in a single transaction.
+    """
+    task_manager = TaskManager(conn)
+    names = list(dict.fromkeys(task_names))
+    task_ids = {}
+    for name in names:
+        task_id = index.resolve(name, logger)
+        if task_id is not None:
+            task_ids[name] = task_id
+    unresolved = [name for name in names if name not in task_ids]
+    with conn:
+        if unresolved:
+            task_ids.update(task_manager.get_or_create_many(unresolved))
+        technology_ids = task_manager.get_required_technology_ids(set(task_ids.values()))
+    if unresolved:
+        invalidate_task_name_index()
+    return {name: (task_id, technology_ids[task_id]) for name, task_id in task_ids.items()}
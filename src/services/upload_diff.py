@@ -0,0 +1,75 @@
+"""
+Change sets between two uploads of the same session.
+
+When a supervisor fixes a few cells and uploads the workbook again, the new extracted
+rows are compared with the rows cached for the session. A row is identified by its
+task name and its occurrence among rows with that name (so inserting a row does not
+shift the identity of every row below it) and compared by a fingerprint of its
+extracted fields. The result lists added, removed and modified tasks, which /upload
+reports back to the upload page.
+"""
+import hashlib
+import json
+
+# Fields added by /upload after extraction; they are positional and not part of a row's content
+DERIVED_FIELDS = frozenset(['id', 'name'])
+
+
+def row_fingerprint(row):
+    """Stable hash of a row's extracted fields."""
+    content = {field: value for field, value in row.items() if field not in DERIVED_FIELDS}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def row_keys(rows):
+    """(task name, occurrence) per row, in row order."""
+    seen = {}
+    keys = []
+    for row in rows:
+        name = row.get('scheduler_group_task', '')
+        occurrence = seen.get(name, 0)
+        seen[name] = occurrence + 1
+        keys.append((name, occurrence))
+    return keys
+
+
+class ChangeSet:
+    """Tasks added, removed and modified by a re-upload."""
+
+    def __init__(self, added, removed, modified, unchanged):
+        self.added = added
+        self.removed = removed
+        self.modified = modified
+        self.unchanged = unchanged
+
+    def to_dict(self):
+        return {
+            'added': self.added,
+            'removed': self.removed,
+            'modified': self.modified,
+            'unchanged': self.unchanged
+        }
+
+
+def diff_rows(old_rows, new_rows):
+    """ChangeSet from the session's cached rows to a new upload's rows (both with /upload ids)."""
+    old_by_key = dict(zip(row_keys(old_rows), old_rows))
+    new_keys = row_keys(new_rows)
+    added, modified = [], []
+    unchanged = 0
+    for key, row in zip(new_keys, new_rows):
+        old_row = old_by_key.pop(key, None)
+        entry = {'id': row.get('id'), 'name': key[0]}
+        if old_row is None:
+            added.append(entry)
+        elif row_fingerprint(old_row) != row_fingerprint(row):
+            entry['previous_id'] = old_row.get('id')
+            entry['fields'] = sorted(
+                field for field in set(row) | set(old_row)
+                if field not in DERIVED_FIELDS and row.get(field) != old_row.get(field)
+            )
+            modified.append(entry)
+        else:
+            unchanged += 1
+    removed = [{'id': row.get('id'), 'name': key[0]} for key, row in old_by_key.items()]
+    return ChangeSet(added, removed, modified, unchanged)
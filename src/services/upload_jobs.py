@@ -0,0 +1,113 @@
+"""
+Background processing of Excel uploads.
+
+/upload can hand the workbook to a small thread pool and answer with a job id right
+away. The job records each extraction phase as it starts (see EXTRACTION_PHASES) so
+the browser can follow real progress by polling the status endpoint, and keeps the
+JSON response the synchronous upload would have returned.
+
+The job runs in the process that received the upload, but its state is written to a
+session store (see session_store, table ``upload_jobs``) after every change. With the
+sqlite backend every worker process reads the same state, so a status request may land
+on any worker. Finished jobs expire with the store's TTL.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .extract_data import EXTRACTION_PHASES
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def _now():
+    return time.time()
+
+
+def _log(logger, level, message):
+    if logger:
+        getattr(logger, level)(message)
+
+
+def job_status(job):
+    """The status endpoint's view of a stored job."""
+    return {
+        'job_id': job['job_id'],
+        'session_id': job['session_id'],
+        'status': job['status'],
+        'phase': job['phase'],
+        'progress': job['events'][-1]['progress'] if job['events'] else 0,
+        'status_code': job['status_code'],
+        'result': job['result']
+    }
+
+
+class UploadJobManager:
+    """Runs upload jobs on a thread pool and keeps their state in a shared store."""
+
+    def __init__(self, max_workers, store, logger=None):
+        self.max_workers = max_workers
+        self.store = store
+        self.logger = logger
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='upload-job')
+
+    def submit(self, session_id, work):
+        """
+        Queue ``work(progress)`` and return the job's state.
+
+        ``work`` gets a progress callback taking a phase name and returns the
+        (response_dict, status_code) of the upload.
+        """
+        job = {
+            'job_id': uuid.uuid4().hex, 'session_id': session_id, 'status': QUEUED, 'phase': None,
+            'events': [], 'status_code': None, 'result': None, 'created': _now(), 'finished': None
+        }
+        self.store.put(job['job_id'], job)
+        self._executor.submit(self._run, job, work)
+        return job
+
+    def get(self, job_id):
+        """State of a job run by any process sharing the store, or None if unknown or expired."""
+        return self.store.get(job_id)
+
+    def _run(self, job, work):
+        # Only this thread writes the job, so the local copy is the current state
+        job['status'] = RUNNING
+        self.store.put(job['job_id'], job)
+        try:
+            response, status_code = work(lambda phase: self._report(job, phase))
+            status = DONE
+        except Exception as e:
+            _log(self.logger, 'error', f"Upload job {job['job_id']} failed: {e}")
+            response, status_code, status = {"message": f"Error processing file: {str(e)}"}, 500, FAILED
+        job.update(result=response, status_code=status_code, status=status, finished=_now())
+        self.store.put(job['job_id'], job)
+
+    def _report(self, job, phase):
+        # A cache lookup that falls back to a full parse reports its phases twice
+        if any(event['phase'] == phase for event in job['events']):
+            return
+        position = EXTRACTION_PHASES.index(phase) + 1 if phase in EXTRACTION_PHASES else 0
+        job['phase'] = phase
+        job['events'].append({
+            'phase': phase,
+            'progress': round(100 * position / (len(EXTRACTION_PHASES) + 1)),
+            'time': _now() - job['created']
+        })
+        self.store.put(job['job_id'], job)
+
+
+def get_upload_job_manager(max_workers, store, logger=None):
+    """Return the process-wide job manager, created on first use."""
+    global _manager
+    with _manager_lock:
+        if _manager is None or _manager.max_workers != max_workers or _manager.store is not store:
+            _manager = UploadJobManager(max_workers, store, logger)
+        return _manager
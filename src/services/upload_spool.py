@@ -0,0 +1,60 @@
+"""
+Single-copy handling of uploaded workbooks.
+
+An upload is copied once, in fixed-size chunks, from the request stream into a
+SpooledTemporaryFile: small files stay in memory, larger ones roll over to a temp file
+on disk. The SHA-256 used by the parse cache is computed during that copy, and every
+parser reads the spooled file directly, so a request holds at most one copy of the
+workbook no matter how many times it is read. The file is deleted when the spool is
+closed (at the end of the request, or when a background upload job finishes).
+"""
+import hashlib
+import tempfile
+
+CHUNK_SIZE = 1024 * 1024
+# Uploads up to this size are kept in memory
+DEFAULT_MAX_MEMORY = 1024 * 1024
+
+
+class UploadSpool:
+    """An uploaded file spooled once, with its size and content hash."""
+
+    def __init__(self, stream, filename, max_memory=DEFAULT_MAX_MEMORY):
+        self.filename = filename
+        self._file = tempfile.SpooledTemporaryFile(max_size=max_memory)
+        digest = hashlib.sha256()
+        self.size = 0
+        try:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                self._file.write(chunk)
+                self.size += len(chunk)
+        except Exception:
+            self._file.close()
+            raise
+        self.content_hash = digest.hexdigest()
+        # get_excel_engine() picks the reader from the original file name
+        self._file.filename = filename
+        self._file.seek(0)
+
+    @property
+    def on_disk(self):
+        return self._file._rolled
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def open(self):
+        """The spooled file, rewound; every reader of the upload shares this handle."""
+        self._file.seek(0)
+        return self._file
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
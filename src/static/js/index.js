@@ -835,6 +835,57 @@ function hideProgressBar(progressInterval) {
     }
 }
 
+const UPLOAD_PHASE_LABELS = {
+    read: 'Reading workbook',
+    sheet_detect: 'Detecting week sheet',
+    filter: 'Filtering tasks for this shift',
+    validate: 'Validating tasks'
+};
+
+function showUploadProgress(event) {
+    const label = UPLOAD_PHASE_LABELS[event.phase] || event.phase;
+    showMessage(`${label}... (${event.progress}%)`, 'info');
+}
+
+// Summary of a re-upload's change set, e.g. "Since the last upload: 2 modified, 1 added."
+function describeUploadChanges(changes) {
+    const parts = [];
+    if (changes.modified.length) parts.push(`${changes.modified.length} modified`);
+    if (changes.added.length) parts.push(`${changes.added.length} added`);
+    if (changes.removed.length) parts.push(`${changes.removed.length} removed`);
+    return parts.length ? `Since the last upload: ${parts.join(', ')}.` : 'No task changes since the last upload.';
+}
+
+// Follow a background upload job until it finishes; resolves like the upload fetch ({ data, status, ok })
+function followUploadJob(job) {
+    showMessage(job.message, 'info');
+    const toResult = finishedJob => ({
+        data: finishedJob.result || { message: 'Upload failed. Please try again.' },
+        status: finishedJob.status_code || 500,
+        ok: finishedJob.status === 'done' && finishedJob.status_code >= 200 && finishedJob.status_code < 300
+    });
+
+    // The job may run on another server process; its state is polled from the shared store
+    return new Promise((resolve, reject) => {
+        const poll = () => {
+            fetch(job.status_url)
+                .then(response => response.json().then(data => ({ data, ok: response.ok })))
+                .then(({ data, ok }) => {
+                    if (!ok) {
+                        resolve({ data, status: 404, ok: false });
+                    } else if (data.status === 'done' || data.status === 'failed') {
+                        resolve(toResult(data));
+                    } else {
+                        if (data.phase) showUploadProgress(data);
+                        setTimeout(poll, 1000);
+                    }
+                })
+                .catch(reject);
+        };
+        poll();
+    });
+}
+
 // Helper functions for UI updates
 function updateFileDisplay(fileName) {
     const fileLabel = document.querySelector('.file-label');
@@ -1051,6 +1102,8 @@ document.addEventListener('DOMContentLoaded', function() {
             formData.append('csrf_token', getCSRFToken());
             formData.append('excelFile', uploadedFile);
             formData.append('session_id', sessionId);
+            // Parse in the background and follow the job's progress
+            formData.append('async', '1');
 
             // Set upload in progress flag
             isUploadInProgress = true;
@@ -1067,6 +1120,13 @@ document.addEventListener('DOMContentLoaded', function() {
                     return { data, status: response.status, ok: response.ok };
                 });
             })
+            .then(result => {
+                // 202: the file is parsed by a background job; wait for its result
+                if (result.status === 202 && result.data.job_id) {
+                    return followUploadJob(result.data);
+                }
+                return result;
+            })
             .then(({ data, status, ok }) => {
                 if (!ok || data.error || (data.message && data.message.includes('mismatch'))) {
                     // Handle error cases
@@ -1078,6 +1138,9 @@ document.addEventListener('DOMContentLoaded', function() {
 
                 // Success - process the data
                 console.log('Upload successful, proceeding to absent modal');
+                if (data.changes) {
+                    showMessage(describeUploadChanges(data.changes), 'info');
+                }
                 repTasks = data.rep_tasks || [];
                 eligibleTechnicians = data.eligible_technicians || {};
                 savePageState();
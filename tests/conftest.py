@@ -3,8 +3,15 @@ Test configuration and fixtures for the Weekend Planning Project.
 """
 import pytest
 import os
+import shutil
 import tempfile
 from unittest.mock import patch
+
+# Jinja bytecode of the test apps goes to a temp folder, not the repo's instance/ folder.
+# Set before importing the app: src.config reads it at import time.
+TEMPLATE_CACHE_DIR = tempfile.mkdtemp(prefix='template_cache_')
+os.environ['TEMPLATE_CACHE_DIR'] = TEMPLATE_CACHE_DIR
+
 from src.app import create_app
 from src.services.db_utils import init_db
 from src.config import Config
@@ -15,6 +22,7 @@ class TestConfig(Config):
     TESTING = True
     DEBUG_MODE = True
     WTF_CSRF_ENABLED = False  # Disable CSRF for testing
+    TEMPLATE_CACHE_DIR = TEMPLATE_CACHE_DIR
 
     # Use in-memory database for tests
     @property
@@ -22,6 +30,13 @@ class TestConfig(Config):
         return ':memory:'
 
 
+@pytest.fixture(scope='session', autouse=True)
+def template_cache_dir():
+    """Remove the temporary template cache after the test session."""
+    yield TEMPLATE_CACHE_DIR
+    shutil.rmtree(TEMPLATE_CACHE_DIR, ignore_errors=True)
+
+
 @pytest.fixture
 def app():
     """Create and configure a test app instance."""
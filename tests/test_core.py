@@ -55,6 +55,669 @@ class TestDatabaseOperations:
             conn.close()
 
 
+class TestTaskNameResolution:
+    """Test task name normalization and the task name index."""
+
+    def test_normalize_string(self):
+        """Test case, whitespace, umlaut and German word folding."""
+        from src.services.data_processing import normalize_string
+
+        assert normalize_string("  BiW_PM_Laser Absauger_6 Monatlich   Inspektion ") == "biw_pm_laser absauger_6 monthly inspection"
+        assert normalize_string("BiW_PM_Tünkers_Größe") == "biw_pm_tunkers_grosse"
+        assert normalize_string("Prüfung der Druckanlage alle 10 Jahre") == "prufung  all 10 years"
+        assert normalize_string(None) == ""
+
+    def test_index_resolves_exact_alias_and_fuzzy(self, app):
+        """Test exact, normalized, alias and fuzzy lookups and invalidation."""
+        from src.services.db_utils import get_db_connection
+        from src.services.task_name_index import get_task_name_index, invalidate_task_name_index
+
+        conn = get_db_connection(app.config['DATABASE_PATH'])
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO tasks (name) VALUES ('BiW_PM_Laser Absauger_6 Monatlich Inspektion')")
+        laser_id = cursor.lastrowid
+        cursor.execute("INSERT INTO tasks (name) VALUES ('BiW_PM_Robot Gripper Weekly Check')")
+        gripper_id = cursor.lastrowid
+        conn.commit()
+
+        index = get_task_name_index(conn, app.config['DATABASE_PATH'])
+        assert index.resolve('BiW_PM_Laser Absauger_6 Monatlich Inspektion') == laser_id
+        assert index.resolve('biw_pm_laser absauger_6 monatlich  inspektion') == laser_id
+        assert index.resolve('BiW_PM_Laser Absauger_6 Monthly Inspection') == laser_id
+        assert index.resolve('BiW_PM_Robot Gripper Weekly Check Station') == gripper_id
+        assert index.resolve('BiW_PM_Robot Gripper Weekly Check Line2') is None
+        assert index.resolve('Completely different task') is None
+        assert get_task_name_index(conn, app.config['DATABASE_PATH']) is index
+
+        invalidate_task_name_index()
+        assert get_task_name_index(conn, app.config['DATABASE_PATH']) is not index
+        conn.close()
+
+    def test_fuzzy_match_requires_same_numbers(self, app):
+        """Test names that differ only by a robot or station number are not matched to each other."""
+        from src.services.db_utils import get_db_connection
+        from src.services.task_name_index import get_task_name_index, resolve_tasks
+
+        conn = get_db_connection(app.config['DATABASE_PATH'])
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO tasks (name) VALUES ('Wartung Roboter R1 Linie 3 Station 10 Greifer Schmierung Sichtpruefung Dokumentation')")
+        r1_id = cursor.lastrowid
+        conn.commit()
+
+        index = get_task_name_index(conn, app.config['DATABASE_PATH'])
+        assert index.resolve('Wartung Roboter R2 Linie 3 Station 10 Greifer Schmierung Sichtpruefung Dokumentation') is None
+        assert index.resolve('Wartung Roboter R1 Linie 3 Station 11 Greifer Schmierung Sichtpruefung Dokumentation') is None
+        assert index.resolve('Station 10 Linie 3 Roboter R1 Wartung Greifer Schmierung Sichtpruefung Dokumentation') is None
+
+        resolved = resolve_tasks(conn, index, ['Wartung Roboter R2 Linie 3 Station 10 Greifer Schmierung Sichtpruefung Dokumentation'])
+        assert resolved['Wartung Roboter R2 Linie 3 Station 10 Greifer Schmierung Sichtpruefung Dokumentation'][0] != r1_id
+        conn.close()
+
+    def test_resolve_tasks_creates_missing_and_groups_skills(self, app):
+        """Test bulk resolution returns task IDs and ordered skills and creates unknown tasks once."""
+        from src.services.db_utils import get_db_connection
+        from src.services.task_name_index import get_task_name_index, resolve_tasks
+
+        conn = get_db_connection(app.config['DATABASE_PATH'])
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO tasks (name) VALUES ('BiW_PM_Known Task')")
+        known_id = cursor.lastrowid
+        cursor.execute("INSERT INTO technologies (name) VALUES ('Welding')")
+        welding_id = cursor.lastrowid
+        cursor.execute("INSERT INTO technologies (name) VALUES ('Pneumatics')")
+        pneumatics_id = cursor.lastrowid
+        cursor.executemany("INSERT INTO task_required_skills (task_id, technology_id) VALUES (?, ?)",
+                           [(known_id, welding_id), (known_id, pneumatics_id)])
+        conn.commit()
+
+        index = get_task_name_index(conn, app.config['DATABASE_PATH'])
+        resolved = resolve_tasks(conn, index, ['BiW_PM_Known Task', 'New Task', 'New Task'])
+
+        assert resolved['BiW_PM_Known Task'] == (known_id, [pneumatics_id, welding_id])
+        new_id, new_skills = resolved['New Task']
+        assert new_skills == []
+        assert [row[0] for row in cursor.execute("SELECT id FROM tasks WHERE name = 'New Task'")] == [new_id]
+        conn.close()
+
+    def test_skill_snapshot_reloads_only_after_writes(self, app):
+        """Test the skill snapshot is reused until a skill or technician write bumps the data version."""
+        from src.services.db_utils import get_db_connection, update_technician_skill
+        from src.services.skill_snapshot import get_skill_snapshot
+
+        conn = get_db_connection(app.config['DATABASE_PATH'])
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO technicians (name) VALUES ('Snapshot Tech')")
+        tech_id = cursor.lastrowid
+        cursor.execute("INSERT INTO technologies (name) VALUES ('Snapshot Technology')")
+        technology_id = cursor.lastrowid
+        conn.commit()
+        update_technician_skill(conn, tech_id, technology_id, 2)
+
+        snapshot = get_skill_snapshot(conn, app.config['DATABASE_PATH'])
+        assert snapshot.by_name['Snapshot Tech'] == {technology_id: 2}
+        assert get_skill_snapshot(conn, app.config['DATABASE_PATH']) is snapshot
+        row, column = snapshot.technician_index['Snapshot Tech'], snapshot.technology_index[technology_id]
+        assert snapshot.matrix[row, column] == 2
+
+        update_technician_skill(conn, tech_id, technology_id, 4)
+        assert get_skill_snapshot(conn, app.config['DATABASE_PATH']).level('Snapshot Tech', technology_id) == 4
+        cursor.execute("DELETE FROM technician_technology_skills WHERE technician_id = ?", (tech_id,))
+        conn.commit()
+        assert 'Snapshot Tech' not in get_skill_snapshot(conn, app.config['DATABASE_PATH']).by_name
+        conn.close()
+
+
+class TestExcelExtraction:
+    """Test single-pass workbook extraction."""
+
+    @staticmethod
+    def _upload(filename):
+        import io
+        with open(f"test_data/{filename}", 'rb') as f:
+            upload = io.BytesIO(f.read())
+        upload.filename = filename
+        return upload
+
+    def test_extract_workbook_returns_sheets_and_rows(self, monkeypatch):
+        """Test the sheet list and the week's rows come back from one call."""
+        from datetime import datetime
+        from src.services import extract_data as ed
+
+        monkeypatch.setattr(ed, '_now', lambda: datetime(2025, 4, 14, 8))
+        sheet_names, rows, errors = ed.extract_workbook(self._upload('testsExcel.xlsb'))
+
+        assert 'Summary KW16' in sheet_names
+        assert rows
+        assert (rows, errors) == ed.extract_data(self._upload('testsExcel.xlsb'))
+
+    def test_missing_week_sheet_is_not_parsed(self, monkeypatch):
+        """Test a workbook without the current week sheet reports it without parsing."""
+        from datetime import datetime
+        from src.services import extract_data as ed
+
+        monkeypatch.setattr(ed, '_now', lambda: datetime(2025, 5, 5, 8))
+        sheet_names, rows, errors = ed.extract_workbook(self._upload('testsExcel.xlsb'))
+
+        assert 'Summary KW19' not in sheet_names
+        assert rows == []
+        assert errors == ["Configuration or File Error: Worksheet named 'Summary KW19' not found"]
+
+    @staticmethod
+    def _xlsx_upload(data_rows):
+        """Summary KW16 workbook with task columns A-F and the Monday early/late quantity columns G-H."""
+        import io
+        openpyxl = pytest.importorskip('openpyxl')
+
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = 'Summary KW16'
+        for col, header in enumerate(["Scheduler Group /  Task", "Lines", "Mitarbeiter pro Aufgabe",
+                                      "Planned Worktime in Min", "Prio", "PM & Rep", "early", "late"], start=1):
+            sheet.cell(row=2, column=col, value=header)
+        sheet.cell(row=1, column=7, value="Monday CW-16")
+        for excel_row, values in data_rows:
+            for col, value in enumerate(values, start=1):
+                sheet.cell(row=excel_row, column=col, value=value)
+        upload = io.BytesIO()
+        workbook.save(upload)
+        upload.seek(0)
+        upload.filename = 'summary.xlsx'
+        return upload
+
+    def test_streaming_reader_keeps_only_rows_with_quantity(self, monkeypatch):
+        """Test .xlsx sheets are streamed and only rows from Excel row 10 with quantity >= 1 are kept."""
+        from datetime import datetime
+        from src.services import extract_data as ed
+
+        upload = self._xlsx_upload((
+            (5, ["Too early", "L1", 1, 30, "A", "PM", 1]),
+            (10, ["Weld check", "L1", 2, 60, "A", "PM", 2]),
+            (11, ["Skipped", "L2", 1, 30, "B", "PM", 0]),
+            (12, ["Conveyor", "L3", 1, 45, "C", "Rep", "1", None, "ignored"]),
+        ))
+        monkeypatch.setattr(ed, '_now', lambda: datetime(2025, 4, 14, 8))
+        _, rows, errors = ed.extract_workbook(upload)
+
+        assert errors == []
+        assert [(r['scheduler_group_task'], r['quantity'], r['task_type']) for r in rows] == [
+            ('Weld check', '2.0', 'PM'), ('Conveyor', '1.0', 'REP')
+        ]
+        assert rows[0]['planning_notes'] == '' and rows[0]['ticket_mo'] == ''
+
+    def test_invalid_rows_are_reported_in_check_order(self, monkeypatch):
+        """Test each failing row gets its messages in check order and is left out of the data."""
+        from datetime import datetime
+        from src.services import extract_data as ed
+
+        upload = self._xlsx_upload((
+            (10, [None, "L1", "x", 0, "ab", "PM", 1]),
+            (11, ["Weld check", "L1", 2, 60, "A", "PM", 1]),
+            (12, ["Pump", "L2", -1, "", "B", "PM", 1]),
+        ))
+        monkeypatch.setattr(ed, '_now', lambda: datetime(2025, 4, 14, 8))
+        _, rows, errors = ed.extract_workbook(upload)
+
+        assert [r['scheduler_group_task'] for r in rows] == ['Weld check']
+        assert errors == [
+            "Excel Row 10 (Task: 'N/A'): Scheduler Group / Task cannot be blank.",
+            "Excel Row 10 (Task: 'N/A'): Mitarbeiter pro Aufgabe ('x') must be a numeric value.",
+            "Excel Row 10 (Task: 'N/A'): Prio ('ab') must be a single uppercase letter (A-Z).",
+            "Excel Row 10 (Task: 'N/A'): Planned Worktime in Min ('0') must be a positive number.",
+            "Excel Row 12 (Task: 'Pump'): Mitarbeiter pro Aufgabe ('-1') must be a positive number.",
+            "Excel Row 12 (Task: 'Pump'): Planned Worktime in Min cannot be blank.",
+        ]
+
+
+    def test_header_map_fills_merged_cells_and_resolves_columns(self):
+        """Test merged day headers are filled once and columns come from the shared header map."""
+        from src.services import extract_data as ed
+
+        headers = ed.HeaderMap.from_values(
+            ['', '', '', 'Monday CW-16', None, 'Tuesday CW-16'],
+            ['Scheduler Group /  Task', 'PM & Rep', 'Lines Mitarbeiter pro Aufgabe Planned Worktime in Min',
+             'Early', ' late ', 'early']
+        )
+        assert headers.day_headers == ['', '', '', 'Monday CW-16', 'Monday CW-16', 'Tuesday CW-16']
+        assert headers.quantity_column('Monday', 'late', 16) == ('Monday CW-16', 4)
+        assert headers.quantity_column('Tuesday', 'early', 16) == ('Tuesday CW-16', 5)
+        with pytest.raises(ValueError, match="No columns found"):
+            headers.quantity_column('Sunday', 'early', 16)
+
+        column_indices, defaults = headers.resolve_columns()
+        assert column_indices['scheduler_col'] == 0 and column_indices['task_type_col'] == 1
+        assert column_indices['lines_col'] == column_indices['worktime_col'] == 2
+        assert defaults == {'planning_notes': '', 'priority': 'R', 'ticket_mo': ''}
+
+    def test_weekly_index_serves_every_shift(self):
+        """Test one indexed sheet answers each day/shift like a dedicated parse."""
+        import json
+        from src.services import extract_data as ed
+
+        context = ('Summary KW16', 'Monday', 'early', 16)
+        _, index, _, _ = ed.extract_workbook_index(self._upload('testsExcel.xlsb'), context)
+        assert index is not None
+        index = ed.WeeklyTaskIndex.from_dict(json.loads(json.dumps(index.to_dict(), default=str)))
+        for day in ('Monday', 'Wednesday', 'Sunday'):
+            for shift in ed.SHIFTS:
+                other = ('Summary KW16', day, shift, 16)
+                expected = ed.extract_workbook(self._upload('testsExcel.xlsb'), other)[1:]
+                assert ed.extract_from_index(index, other) == expected
+        assert ed.extract_from_index(index, ('Summary KW17', 'Monday', 'early', 17)) is None
+
+
+class TestParseCache:
+    """Test the content-addressed parse cache."""
+
+    def test_repeated_upload_is_served_from_cache(self, tmp_path, monkeypatch):
+        """Test a second upload of the same bytes skips the workbook, for any shift of the week."""
+        import io
+        from datetime import datetime
+        from src.services import extract_data as ed
+        from src.services import parse_cache as pc
+
+        monkeypatch.setattr(ed, '_now', lambda: datetime(2025, 4, 14, 8))
+        with open('test_data/testsExcel.xlsb', 'rb') as f:
+            data = f.read()
+
+        def upload():
+            stream = io.BytesIO(data)
+            stream.filename = 'testsExcel.xlsb'
+            return stream
+
+        cache = pc.ParseCache(str(tmp_path), max_bytes=10 * 1024 * 1024, ttl_seconds=3600)
+        first = pc.extract_workbook_cached(upload(), cache)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("workbook parsed again")
+        monkeypatch.setattr(pc, 'extract_workbook_index', fail)
+        assert pc.extract_workbook_cached(upload(), cache) == first
+        assert cache.stats() == {'hits': 1, 'misses': 1}
+
+        # Another shift is answered from the cached weekly index
+        monkeypatch.setattr(ed, '_now', lambda: datetime(2025, 4, 16, 20))
+        late = pc.extract_workbook_cached(upload(), cache)
+        assert cache.stats() == {'hits': 2, 'misses': 1}
+        assert late == ed.extract_workbook(upload())
+        assert late[1] != first[1]
+
+    def test_lru_size_limit_and_ttl(self, tmp_path, monkeypatch):
+        """Test old entries are evicted beyond the size limit and expire after the TTL."""
+        import os
+        from src.services import parse_cache as pc
+
+        now = [1000.0]
+        monkeypatch.setattr(pc, '_now', lambda: now[0])
+        cache = pc.ParseCache(str(tmp_path), max_bytes=10 ** 6, ttl_seconds=60)
+        errors = ["Configuration or File Error: Worksheet named 'Summary KW16' not found"]
+        for key in ('a', 'b', 'c'):
+            cache.put(key, ['Summary KW15'], None, errors)
+            now[0] += 1
+        assert cache.get('a') == (['Summary KW15'], None, errors)
+
+        # Shrink the limit to two entries: 'b' is now the least recently used one
+        cache.max_bytes = 2 * os.path.getsize(cache._path('a'))
+        cache.put('d', ['Summary KW15'], None, errors)
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
+
+        now[0] += 120
+        assert cache.get('a') is None
+        assert not os.path.exists(cache._path('a'))
+
+
+class TestUploadJobs:
+    """Test background upload processing."""
+
+    def test_async_upload_reports_phases_and_result(self, app, client, tmp_path, monkeypatch):
+        """Test /upload answers 202 and the job reports every phase and the synchronous response."""
+        import time
+        from datetime import datetime
+        from src.services import extract_data as ed
+
+        monkeypatch.setattr(ed, '_now', lambda: datetime(2025, 4, 14, 8))
+        app.config['PARSE_CACHE_ENABLED'] = False
+
+        def post(**extra):
+            with open('test_data/testsExcel.xlsb', 'rb') as f:
+                return client.post('/upload', data=dict(session_id='job-test', excelFile=(f, 'testsExcel.xlsb'), **extra),
+                                   content_type='multipart/form-data')
+
+        response = post(**{'async': '1'})
+        assert response.status_code == 202
+        job = response.get_json()
+
+        deadline = time.time() + 30
+        status = client.get(job['status_url']).get_json()
+        while status['status'] in ('queued', 'running') and time.time() < deadline:
+            time.sleep(0.05)
+            status = client.get(job['status_url']).get_json()
+        assert status['status'] == 'done' and status['status_code'] == 200 and status['progress'] > 0
+        with app.app_context():
+            from src.routes.main import get_upload_jobs
+            events = get_upload_jobs().get(job['job_id'])['events']
+        assert [event['phase'] for event in events] == list(ed.EXTRACTION_PHASES)
+
+        synchronous = post().get_json()
+        assert synchronous.pop('changes')['modified'] == []
+        assert status['result'] == synchronous
+        assert client.get('/upload/jobs/unknown').status_code == 404
+
+    def test_job_state_is_shared_through_the_sqlite_store(self, tmp_path):
+        """Test a job run by one manager can be read by another process's manager from the same database."""
+        import time
+        from src.services.session_store import SqliteSessionStore
+        from src.services.upload_jobs import UploadJobManager, job_status
+
+        path = str(tmp_path / 'sessions.db')
+        worker = UploadJobManager(1, SqliteSessionStore(path, 600, 1 << 20, table='upload_jobs'))
+        other = UploadJobManager(1, SqliteSessionStore(path, 600, 1 << 20, table='upload_jobs'))
+
+        def work(progress):
+            progress('read')
+            return {'message': 'ok'}, 200
+
+        job = worker.submit('s1', work)
+        deadline = time.time() + 10
+        while other.get(job['job_id'])['status'] != 'done' and time.time() < deadline:
+            time.sleep(0.01)
+        status = job_status(other.get(job['job_id']))
+        assert status['status'] == 'done' and status['phase'] == 'read'
+        assert status['result'] == {'message': 'ok'} and status['status_code'] == 200
+        # Jobs and sessions share the database file but not the table
+        assert SqliteSessionStore(path, 600, 1 << 20).get(job['job_id']) is None
+
+
+    def test_upload_spool_hashes_once_and_is_released(self):
+        """Test the spooled copy carries the cache hash, rolls over to disk and is closed deterministically."""
+        import io
+        from src.services.parse_cache import hash_upload
+        from src.services.upload_spool import UploadSpool
+
+        with open('test_data/testsExcel.xlsb', 'rb') as f:
+            data = f.read()
+        with UploadSpool(io.BytesIO(data), 'testsExcel.xlsb', max_memory=1024) as upload:
+            assert upload.on_disk and upload.size == len(data)
+            assert upload.content_hash == hash_upload(io.BytesIO(data))
+            assert upload.open().filename == 'testsExcel.xlsb'
+            assert upload.open().read() == data
+        assert upload.closed
+        with UploadSpool(io.BytesIO(b'small'), 'small.xlsx') as upload:
+            assert not upload.on_disk
+
+
+class TestUploadDiff:
+    """Test change sets between uploads of one session."""
+
+    def test_diff_reports_added_removed_and_modified_tasks(self):
+        """Test rows are matched by task name and occurrence, not by position."""
+        from src.services.upload_diff import diff_rows
+
+        def row(row_id, name, quantity='1.0'):
+            return {'id': row_id, 'name': name, 'scheduler_group_task': name, 'quantity': quantity}
+
+        old = [row('1', 'Task A'), row('2', 'Task B'), row('3', 'Task C')]
+        new = [row('1', 'Task New'), row('2', 'Task A'), row('3', 'Task B', '2.0')]
+        changes = diff_rows(old, new)
+
+        assert changes.added == [{'id': '1', 'name': 'Task New'}]
+        assert changes.removed == [{'id': '3', 'name': 'Task C'}]
+        assert changes.modified == [{'id': '3', 'name': 'Task B', 'previous_id': '2', 'fields': ['quantity']}]
+        assert changes.unchanged == 1
+
+    def test_reupload_returns_change_set(self, app, client, monkeypatch):
+        """Test a second upload in the same session reports its changes."""
+        from datetime import datetime
+        from src.services import extract_data as ed
+
+        monkeypatch.setattr(ed, '_now', lambda: datetime(2025, 4, 14, 8))
+        app.config['PARSE_CACHE_ENABLED'] = False
+
+        def upload():
+            with open('test_data/testsExcel.xlsb', 'rb') as f:
+                return client.post('/upload', data={'session_id': 'diff-test', 'excelFile': (f, 'testsExcel.xlsb')},
+                                   content_type='multipart/form-data').get_json()
+
+        assert 'changes' not in upload()
+        changes = upload()['changes']
+        assert changes['added'] == changes['removed'] == changes['modified'] == []
+        assert changes['unchanged'] > 0
+
+
+class TestSessionStore:
+    """Test the session stores behind the upload cache."""
+
+    def test_memory_store_expires_and_evicts_least_recently_used(self, monkeypatch):
+        """Test TTL expiry, TTL refresh on access and the byte-size bound."""
+        from src.services import session_store as ss
+
+        clock = [1000.0]
+        monkeypatch.setattr(ss, '_now', lambda: clock[0])
+        entry = {'data': [{'scheduler_group_task': f'Task {i}'} for i in range(50)]}
+        size = len(ss.encode_payload(entry))
+        store = ss.MemorySessionStore(ttl_seconds=60, max_bytes=2 * size)
+
+        store.put('a', entry)
+        store.put('b', entry)
+        clock[0] += 50
+        assert store.touch('a')
+        clock[0] += 20
+        assert 'b' not in store
+        assert store.get('a') == entry
+
+        store.put('c', entry)
+        store.put('d', entry)
+        assert 'a' not in store and 'c' in store and 'd' in store
+        assert store.size <= 2 * size
+
+    def test_sqlite_store_is_shared_between_instances(self, tmp_path, monkeypatch):
+        """Test a session stored through one store is visible through another on the same file."""
+        import sqlite3
+        from src.services import session_store
+        from src.services.session_store import SqliteSessionStore
+
+        opened, connect = [], sqlite3.connect
+        monkeypatch.setattr(session_store.sqlite3, 'connect', lambda *args, **kwargs: opened.append(connect(*args, **kwargs)) or opened[-1])
+        path = str(tmp_path / 'sessions.db')
+        writer = SqliteSessionStore(path, ttl_seconds=60, max_bytes=1024 * 1024)
+        reader = SqliteSessionStore(path, ttl_seconds=60, max_bytes=1024 * 1024)
+        writer.put('shared', {'data': [{'id': '1'}], 'tasks': None})
+
+        assert 'shared' in reader
+        assert reader.get('shared') == {'data': [{'id': '1'}], 'tasks': None}
+        reader.delete('shared')
+        assert writer.get('shared') is None
+        for conn in opened:  # Every connection is closed after its call
+            with pytest.raises(sqlite3.ProgrammingError):
+                conn.execute('SELECT 1')
+
+    def test_session_keeps_typed_tasks(self, app, client, monkeypatch):
+        """Test stage 2 of /upload reuses the typed tasks stored at upload instead of sanitizing again."""
+        from datetime import datetime
+        from src.routes import main
+        from src.services import extract_data as ed
+
+        monkeypatch.setattr(ed, '_now', lambda: datetime(2025, 4, 14, 8))
+        app.config['PARSE_CACHE_ENABLED'] = False
+        with open('test_data/testsExcel.xlsb', 'rb') as f:
+            client.post('/upload', data={'session_id': 'typed-test', 'excelFile': (f, 'testsExcel.xlsb')},
+                        content_type='multipart/form-data')
+
+        def fail(*args, **kwargs):
+            raise AssertionError("session rows typed again")
+        monkeypatch.setattr(main, 'build_typed_tasks', fail)
+        response = client.post('/upload', data={'session_id': 'typed-test', 'absentTechnicians': '[]'})
+
+        assert response.status_code == 200
+        rep_tasks = response.get_json()['rep_tasks']
+        assert rep_tasks and all(isinstance(task['planned_worktime_min'], int) for task in rep_tasks)
+
+    def test_legacy_session_tasks_are_typed_once(self, app, monkeypatch):
+        """Test a session stored without typed tasks gets them written back on first use."""
+        from src.routes import main
+
+        calls = []
+        build_typed_tasks = main.build_typed_tasks
+        monkeypatch.setattr(main, 'build_typed_tasks', lambda rows, logger: calls.append(1) or build_typed_tasks(rows, logger))
+        with app.app_context():
+            main.get_sessions().put('legacy', {'data': [{'id': '1', 'scheduler_group_task': 'Task', 'task_type': 'REP'}]})
+            first = main.get_session_tasks('legacy')
+            assert main.get_session_tasks('legacy') == first
+
+        assert len(calls) == 1
+
+
+class TestPlanCache:
+    """Test the plan cache behind /generate_dashboard."""
+
+    def test_concurrent_identical_plans_are_computed_once(self):
+        """Test single-flight: callers with the same key share one computation."""
+        import threading
+        from src.services.plan_cache import PlanCache, make_plan_key
+
+        cache = PlanCache(max_entries=4, ttl_seconds=60)
+        key = make_plan_key({'tasks': [{'id': '1', 'quantity': 2}], 'present_technicians': ['a', 'b']})
+        assert key == make_plan_key({'present_technicians': ['a', 'b'], 'tasks': [{'quantity': 2, 'id': '1'}]})
+
+        started, release, calls, results = threading.Event(), threading.Event(), [], []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'html': '<html></html>'}
+
+        leader = threading.Thread(target=lambda: results.append(cache.get_or_compute(key, compute)))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=lambda: results.append(cache.get_or_compute(key, compute))) for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        assert len(calls) == 1
+        assert sorted(source for _, source in results) == ['coalesced'] * 3 + ['miss']
+        assert cache.get_or_compute(key, compute)[1] == 'hit'
+
+    def test_least_recently_used_plan_is_evicted(self):
+        """Test the LRU bound."""
+        from src.services.plan_cache import PlanCache
+
+        cache = PlanCache(max_entries=2, ttl_seconds=60)
+        for key in ('a', 'b'):
+            cache.get_or_compute(key, lambda: key)
+        cache.get_or_compute('a', lambda: 'a')
+        cache.get_or_compute('c', lambda: 'c')
+
+        assert cache.get_or_compute('a', lambda: 'recomputed')[1] == 'hit'
+        assert cache.get_or_compute('b', lambda: 'recomputed') == ('recomputed', 'miss')
+
+
+class TestDashboardOutput:
+    """Test the dashboard data and the content-addressed dashboard files."""
+
+    def test_prepare_dashboard_data_summarizes_instances(self):
+        """Test group counters, unassigned and incomplete instances per task."""
+        from src.services.dashboard import prepare_dashboard_data
+
+        tasks = [{'id': '2', 'task_type': 'REP', 'quantity': 1}, {'id': 'pm1', 'task_type': 'PM', 'quantity': 3}]
+        assignments = [
+            {'instance_id': 'pm1_1', 'technician': 'B'}, {'instance_id': 'pm1_1', 'technician': 'A'},
+            {'instance_id': 'pm1_2', 'technician': 'A'}, {'instance_id': 'pm1_2', 'technician': 'B'},
+            {'instance_id': '2_1', 'technician': 'C'}
+        ]
+        pm_tasks, rep_tasks, display_ids = prepare_dashboard_data(
+            tasks, assignments, {'pm1_3': 'No technician available'}, ['pm1_2']
+        )
+
+        assert display_ids == {'pm1': 1, '2': 2}
+        assert pm_tasks[0]['group_counter'] == {'A & B': 2}
+        assert pm_tasks[0]['unassigned_instance_details'] == [{'num': 3, 'reason': 'No technician available'}]
+        assert pm_tasks[0]['incomplete_instances_list'] == [2]
+        assert rep_tasks[0]['group_counter'] == {'C': 1}
+
+    def test_dashboards_are_written_once_per_content_and_cleaned_up(self, tmp_path):
+        """Test hashed file names, reuse of identical content and the count limit."""
+        import os
+        from src.services.dashboard import DASHBOARD_OUTPUT_DIR, cleanup_dashboard_outputs, write_dashboard_html
+
+        first = write_dashboard_html(str(tmp_path), '<html>a</html>')
+        assert write_dashboard_html(str(tmp_path), '<html>a</html>') == first
+        second = write_dashboard_html(str(tmp_path), '<html>b</html>')
+        assert second != first
+        output_dir = tmp_path / DASHBOARD_OUTPUT_DIR
+        os.utime(output_dir / first, (0, 0))
+
+        assert cleanup_dashboard_outputs(str(tmp_path), max_age_seconds=3600, max_files=10) == 1
+        assert not any(name.startswith(first) for name in os.listdir(output_dir))
+        assert os.path.exists(output_dir / second) and os.path.exists(output_dir / f'{second}.gz')
+
+    def test_dashboard_route_sends_immutable_cache_headers(self, app, client, tmp_path):
+        """Test the cache headers and that only dashboard file names are served."""
+        from src.services.dashboard import write_dashboard_html
+
+        app.config['OUTPUT_FOLDER'] = str(tmp_path)
+        filename = write_dashboard_html(str(tmp_path), '<html>plan</html>')
+
+        response = client.get(f'/dashboards/{filename}')
+        assert response.status_code == 200
+        assert 'immutable' in response.headers['Cache-Control']
+        assert client.get('/dashboards/other.html').status_code == 404
+
+    def test_dashboard_is_served_precompressed(self, app, client, tmp_path):
+        """Test that the stored .gz sibling is sent to clients accepting gzip."""
+        import gzip
+        from src.services.dashboard import write_dashboard_html
+
+        app.config['OUTPUT_FOLDER'] = str(tmp_path)
+        filename = write_dashboard_html(str(tmp_path), '<html>plan</html>')
+
+        response = client.get(f'/dashboards/{filename}', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.mimetype == 'text/html'
+        assert gzip.decompress(response.get_data()) == b'<html>plan</html>'
+        assert client.get(f'/dashboards/{filename}').get_data() == b'<html>plan</html>'
+
+
+class TestResponseCompression:
+    """Test compression of large JSON/HTML responses."""
+
+    def test_large_json_is_compressed_for_accepting_clients(self, app):
+        """Test the size threshold and Accept-Encoding negotiation."""
+        import gzip
+        from flask import jsonify
+        from src.services.compression import choose_encoding, compress_response
+
+        assert choose_encoding('gzip;q=0, deflate', ('gzip',)) is None
+        assert choose_encoding('br;q=0.5, gzip', ('br', 'gzip')) == 'br'
+        with app.app_context():
+            large = compress_response(jsonify({'rows': ['x' * 10] * 200}), 'gzip, deflate', min_size=1024)
+            small = compress_response(jsonify({'ok': True}), 'gzip', min_size=1024)
+            refused = compress_response(jsonify({'rows': ['x' * 10] * 200}), 'identity', min_size=1024)
+
+        assert large.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in large.headers['Vary']
+        assert b'xxxxxxxxxx' in gzip.decompress(large.get_data())
+        assert 'Content-Encoding' not in small.headers
+        assert 'Content-Encoding' not in refused.headers
+
+
+class TestTemplateCache:
+    """Test template precompilation at startup."""
+
+    def test_templates_are_precompiled_into_bytecode_cache(self, app, tmp_path):
+        """Test every page template is compiled into the shared environment and the bytecode cache."""
+        from jinja2 import FileSystemBytecodeCache
+        from src.app import precompile_templates
+
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(str(tmp_path))
+        app.jinja_env.cache.clear()
+        precompile_templates(app)
+
+        assert any(name == 'technician_dashboard.html' for _, name in app.jinja_env.cache.keys())
+        assert len(list(tmp_path.iterdir())) == len(app.jinja_env.list_templates())
+
 class TestSecurityValidation:
     """Test security and input validation."""
 
@@ -0,0 +1,225 @@
+"""
+Unit tests for the task planner.
+"""
+import pytest
+
+
+@pytest.fixture
+def planner_db(app):
+    """Database connection seeded with two technologies, three technicians and their skills."""
+    from src.services.db_utils import get_db_connection, update_technician_skill
+
+    conn = get_db_connection(app.config['DATABASE_PATH'])
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO technologies (name) VALUES ('Welding')")
+    cursor.execute("INSERT INTO technologies (name) VALUES ('PLC')")
+    for name in ('tech_a', 'tech_b', 'tech_c'):
+        cursor.execute("INSERT INTO technicians (name) VALUES (?)", (name,))
+    conn.commit()
+    update_technician_skill(conn, 1, 1, 3)
+    update_technician_skill(conn, 2, 1, 2)
+    update_technician_skill(conn, 2, 2, 4)
+    update_technician_skill(conn, 3, 2, 1)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def planner_tasks():
+    """Sanitized task definitions as produced by render_dashboard."""
+    return [
+        {'id': '1', 'name': 'PM weld check', 'task_type': 'PM', 'priority': 'A', 'quantity': 2,
+         'mitarbeiter_pro_aufgabe': 1, 'planned_worktime_min': 60, 'lines': '', 'technology_ids': [1]},
+        {'id': '2', 'name': 'PM PLC backup', 'task_type': 'PM', 'priority': 'B', 'quantity': 1,
+         'mitarbeiter_pro_aufgabe': 2, 'planned_worktime_min': 120, 'lines': '', 'technology_ids': [2]},
+        {'id': '3', 'name': 'REP conveyor', 'task_type': 'REP', 'priority': 'C', 'quantity': 1,
+         'mitarbeiter_pro_aufgabe': 1, 'planned_worktime_min': 45, 'lines': ''},
+    ]
+
+
+@pytest.fixture
+def planner_skills():
+    return {'tech_a': {1: 3}, 'tech_b': {1: 2, 2: 4}, 'tech_c': {2: 1}}
+
+
+class TestPlannerProfile:
+    """Test per-phase profiling of assign_tasks."""
+
+    def test_profile_is_filled_by_assign_tasks(self, planner_db, planner_tasks, planner_skills):
+        """Test phases, counters and the expensive task list are recorded."""
+        from src.services.task_assigner import assign_tasks
+        from src.services.planner_profile import PlannerProfile
+
+        profile = PlannerProfile(top_n=2)
+        rep_assignments = [{'task_id': '3', 'technicians': [{'name': 'tech_c'}]}]
+        assignments, unassigned, _, _, _ = assign_tasks(
+            planner_tasks, ['tech_a', 'tech_b', 'tech_c'], 434, planner_db,
+            rep_assignments, technician_technology_skills=planner_skills, profile=profile
+        )
+
+        assert assignments
+        assert not unassigned
+        result = profile.to_dict()
+        assert set(result['phase_seconds']) == set(PlannerProfile.PHASES)
+        assert result['orderings_evaluated'] == 1
+        assert result['groups_enumerated'] > 0
+        assert result['slot_probes'] > 0
+        assert result['task_definitions_profiled'] == 3
+        assert len(result['most_expensive_tasks']) == 2
+
+    def test_profile_is_published_to_metrics(self, planner_db, planner_tasks, planner_skills):
+        """Test every run is aggregated in the global metrics collector."""
+        from src.services.task_assigner import assign_tasks
+        from src.services.logging_config import metrics_collector
+
+        runs_before = metrics_collector.planner_metrics['runs']
+        assign_tasks(planner_tasks, ['tech_a', 'tech_b'], 434, planner_db,
+                     technician_technology_skills=planner_skills)
+
+        assert metrics_collector.planner_metrics['runs'] == runs_before + 1
+        assert metrics_collector.planner_metrics['last_profile']['task_definitions_profiled'] == 3
+        assert 'planner' in metrics_collector.get_all_metrics()
+
+
+class TestDecisionTrace:
+    """Test the structured planner decision trace."""
+
+    def test_enabled_trace_records_each_instance(self, planner_db, planner_tasks, planner_skills):
+        """Test one entry per instance with the chosen group and reason code."""
+        from src.services.task_assigner import assign_tasks
+        from src.services.planner_trace import DecisionTrace, SCHEDULED, REP_NOT_RECEIVED
+
+        trace = DecisionTrace(capacity=100, enabled=True)
+        assign_tasks(planner_tasks, ['tech_a', 'tech_b', 'tech_c'], 434, planner_db,
+                     technician_technology_skills=planner_skills, trace=trace)
+
+        records = {r['instance_id']: r for r in trace.records()}
+        assert set(records) == {'1_1', '1_2', '2_1', '3_1'}
+        assert records['1_1']['reason'] == SCHEDULED
+        assert records['1_1']['candidates'] > 0
+        assert records['1_1']['group']
+        assert records['3_1']['reason'] == REP_NOT_RECEIVED
+        assert trace.to_dict()['fields'][1] == 'instance_id'
+
+    def test_disabled_trace_and_capacity(self, planner_db, planner_tasks, planner_skills):
+        """Test a disabled trace stays empty and the buffer keeps only the newest entries."""
+        from src.services.task_assigner import assign_tasks
+        from src.services.planner_trace import DecisionTrace
+
+        disabled = DecisionTrace()
+        assign_tasks(planner_tasks, ['tech_a', 'tech_b', 'tech_c'], 434, planner_db,
+                     technician_technology_skills=planner_skills, trace=disabled)
+        assert len(disabled) == 0
+
+        bounded = DecisionTrace(capacity=2, enabled=True)
+        for i in range(5):
+            bounded.record(f"9_{i}", 'PM', 'scheduled')
+        assert [r['instance_id'] for r in bounded.records()] == ['9_3', '9_4']
+        assert bounded.dropped == 3
+
+
+class TestExactStrategy:
+    """Test the exact planning mode."""
+
+    def test_exact_strategy_returns_same_structure(self, planner_db, planner_tasks, planner_skills):
+        """Test the exact plan is overlap-free and reports an optimal solve."""
+        from src.services.task_assigner import assign_tasks
+        from src.services.planner_profile import PlannerProfile
+
+        profile = PlannerProfile()
+        rep_assignments = [{'task_id': '3', 'technicians': [{'name': 'tech_c'}]}]
+        assignments, unassigned, incomplete, available, under_resourced = assign_tasks(
+            planner_tasks, ['tech_a', 'tech_b', 'tech_c'], 434, planner_db, rep_assignments,
+            technician_technology_skills=planner_skills, profile=profile, strategy='exact'
+        )
+
+        assert {a['instance_id'] for a in assignments} == {'1_1', '1_2', '2_1', '3_1'}
+        assert not unassigned
+        assert set(available) == {'tech_a', 'tech_b', 'tech_c'}
+        by_tech = {}
+        for a in assignments:
+            by_tech.setdefault(a['technician'], []).append((a['start'], a['start'] + a['duration']))
+        for intervals in by_tech.values():
+            intervals.sort()
+            assert all(later[0] >= earlier[1] for earlier, later in zip(intervals, intervals[1:]))
+        assert profile.solver['status'] == 'optimal'
+        assert profile.solver['gap'] == 0.0
+
+    def test_exact_strategy_falls_back_for_large_models(self, planner_db, planner_tasks, planner_skills, monkeypatch):
+        """Test plans above the model limits are handled by the heuristic planner."""
+        from src.services import exact_solver
+        from src.services.task_assigner import assign_tasks
+        from src.services.planner_profile import PlannerProfile
+
+        monkeypatch.setattr(exact_solver, 'MAX_OPTIONS', 1)
+        profile = PlannerProfile()
+        assignments, _, _, _, _ = assign_tasks(
+            planner_tasks, ['tech_a', 'tech_b', 'tech_c'], 434, planner_db,
+            technician_technology_skills=planner_skills, profile=profile, strategy='exact'
+        )
+
+        assert assignments
+        assert profile.solver is None
+
+
+class TestPlannerStrategies:
+    """Test the pluggable strategy API."""
+
+    @pytest.mark.parametrize('strategy', ['greedy', 'beam', 'local_search', 'exact'])
+    def test_every_strategy_plans_all_instances(self, planner_db, planner_tasks, planner_skills, strategy):
+        """Test each strategy returns the common result structure."""
+        from src.services.task_assigner import assign_tasks
+        from src.services.planner_profile import PlannerProfile
+
+        profile = PlannerProfile()
+        rep_assignments = [{'task_id': '3', 'technicians': [{'name': 'tech_c'}]}]
+        assignments, unassigned, incomplete, available, under_resourced = assign_tasks(
+            planner_tasks, ['tech_a', 'tech_b', 'tech_c'], 434, planner_db, rep_assignments,
+            technician_technology_skills=planner_skills, profile=profile, strategy=strategy
+        )
+
+        assert {a['instance_id'] for a in assignments} == {'1_1', '1_2', '2_1', '3_1'}
+        assert not unassigned
+        assert isinstance(incomplete, list)
+        assert isinstance(under_resourced, list)
+        assert profile.to_dict()['strategy'] == strategy
+
+    def test_local_search_swaps_around_the_greedy_order(self, planner_db, planner_tasks, planner_skills, monkeypatch):
+        """Test the swaps start from the HP order greedy kept and the greedy seed is not traced."""
+        from src.services.task_assigner import assign_tasks
+        from src.services.planner_strategies import PlanningContext
+        from src.services.planner_trace import DecisionTrace
+
+        # Two HP tasks that plan equally well in either order: greedy keeps the first
+        # permutation (1, 2), while the num_techs/duration sort would give (2, 1)
+        planner_tasks[1]['priority'] = 'A'
+        assigned = []
+        original_assign = PlanningContext.assign
+
+        def record_assign(context, task_def, result, budget, trace=None):
+            assigned.append(str(task_def['id']))
+            return original_assign(context, task_def, result, budget, trace)
+
+        monkeypatch.setattr(PlanningContext, 'assign', record_assign)
+        trace = DecisionTrace(capacity=100, enabled=True)
+        assign_tasks(
+            planner_tasks, ['tech_a', 'tech_b', 'tech_c'], 434, planner_db,
+            [{'task_id': '3', 'technicians': [{'name': 'tech_c'}]}], technician_technology_skills=planner_skills,
+            trace=trace, strategy='local_search', budget={'max_iterations': 1}
+        )
+
+        seed, first_swap = assigned[:5], assigned[5:]
+        assert seed == ['1', '2', '2', '1', '3']
+        assert first_swap == ['2', '1', '3']
+        assert trace.records() == []
+
+    def test_budget_overrides_defaults(self):
+        """Test budgets merge over the defaults and unknown strategies are rejected."""
+        from src.services.planner_strategies import get_strategy, DEFAULT_BUDGETS
+
+        beam = get_strategy('beam', {'beam_width': 2, 'not_a_knob': 1})
+        assert beam.budget['beam_width'] == 2
+        assert beam.budget['branching'] == DEFAULT_BUDGETS['beam']['branching']
+        assert 'not_a_knob' not in beam.budget
+        with pytest.raises(ValueError):
+            get_strategy('simulated_annealing')